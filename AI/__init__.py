@@ -1,2 +1,33 @@
-from .autobrowser import AutoBrowser, BrowserType
-from .ai import *
\ No newline at end of file
+import importlib
+
+"""
+AI package. Submodules load on first attribute access (PEP 562): `import AI` does not
+import Playwright, the OpenAI client or PyMuPDF, and nothing touches the filesystem.
+"""
+
+_EXPORTS = {
+    'AutoBrowser': 'autobrowser',
+    'BrowserType': 'autobrowser',
+    'PromptAI': 'ai',
+    'GetLinksFromResponse': 'ai',
+    'DownloadFile': 'ai',
+    'DocumentInfo': 'ai',
+    'CreateErrorResponse': 'ai',
+    'TempFolder': 'ai',
+    'temp_folder': 'ai',
+    'deepseek_chat_model': 'ai',
+    'deepseek_r1_model': 'ai',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(f'{__name__}.{_EXPORTS[name]}')
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
\ No newline at end of file
@@ -8,15 +8,15 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(current_dir)
 sys.path.insert(0, root_dir)
 
-from openai import OpenAI
 import re
-from AI.autobrowser import AutoBrowser, BrowserType
-import pymupdf
-import requests
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
+
+# openai, pymupdf and Playwright are imported where they are used, so importing
+# this module stays cheap for processes that never prompt or parse documents
+if TYPE_CHECKING:
+    from AI.autobrowser import AutoBrowser
 
 temp_folder = os.path.join(current_dir, 'temp')
-os.makedirs(temp_folder, exist_ok=True)
 
 deepseek_chat_model = "deepseek/deepseek-chat-v3-0324:free"
 deepseek_r1_model = "deepseek/deepseek-r1-0528:free"
@@ -33,6 +33,13 @@ api_calls = 0
 max_calls_per_key = 50
 max_total_calls = len(openrouter_api_keys) * max_calls_per_key
 
+
+def TempFolder() -> str:
+    """The scratch folder for downloads, created on first use"""
+    os.makedirs(temp_folder, exist_ok=True)
+    return temp_folder
+
+
 def PromptAI(model: str, prompt: str) -> Optional[str] | bool:
     try:
         global api_calls
@@ -46,6 +53,7 @@ def PromptAI(model: str, prompt: str) -> Optional[str] | bool:
             print("Warning: API calls limit reached, switching to next key")
 
 
+        from openai import OpenAI
         client = OpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=current_key
@@ -71,7 +79,7 @@ def GetLinksFromResponse(response_text: str) -> List[str]:
     return list(set(urls))  # Remove duplicates
 
 
-def DownloadFile(browser: AutoBrowser, url: str, save_dir: str, filename: str) -> Optional[str]:
+def DownloadFile(browser: 'AutoBrowser', url: str, save_dir: str, filename: str) -> Optional[str]:
     """Download any file from a URL and save it with a user-specified filename."""
     try:
         if not filename:
@@ -112,6 +120,7 @@ def DocumentInfo(document_path: str, details: str, json_structure: Optional[str]
         ext = document_path.split('.')[-1]
         # PDF
         if ext == ".pdf":
+            import pymupdf
             doc = pymupdf.open(document_path)
             for page in doc:
                 content += page.get_text()  # type: ignore
@@ -1 +1,40 @@
-from .agents import *
\ No newline at end of file
+import importlib
+
+"""
+Agents package. Submodules load on first attribute access (PEP 562), so a spawned
+agent or the command server only imports what it uses; WebCrawler does not pull in
+the AI package or Playwright until a crawl needs them.
+"""
+
+_EXPORTS = {
+    'Agent': 'agents',
+    'AgentManager': 'agents',
+    'AgentStatus': 'agents',
+    'AgentType': 'agents',
+    'COMMAND_PORT': 'agents',
+    'CONTROL_ENDPOINT': 'agents',
+    'AgentIdentity': 'agents',
+    'AgentClass': 'agents',
+    'STATUS_PORT': 'agents',
+    'STATUS_ENDPOINT': 'agents',
+    'STATUS_STREAM_PORT': 'agents',
+    'WebCrawler': 'webcrawler',
+    'StatusAggregator': 'status',
+    'CommandChannels': 'commands',
+    'WarmPool': 'workers',
+    'TaskRunner': 'tasks',
+    'TaskCancelled': 'tasks',
+}
+
+__all__ = [name for name, module in _EXPORTS.items() if module == 'agents']
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(f'{__name__}.{_EXPORTS[name]}')
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
\ No newline at end of file
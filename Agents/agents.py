@@ -7,13 +7,52 @@ sys.path.insert(0, root_dir)
 
 import zmq
 import time
+import json
+import socket
+import asyncio
+import tempfile
+import threading
 from enum import Enum
+from collections import deque
 from Logger import get_logger
+from Logger.tracing import span, inject
 from multiprocessing import Process, Value, Lock
 
 
 STATUS_PORT = 5600
-COMMAND_PORT = 5500
+STATUS_STREAM_PORT = 5601  # Aggregated status events, see Agents/status.py
+COMMAND_PORT = 5500  # Control endpoint port when agents are reached over TCP
+
+# The AgentManager's ROUTER socket; every agent connects to it with a DEALER socket.
+# IPC where the platform has it, TCP otherwise. Set AGENT_CONTROL_ENDPOINT to bind
+# e.g. tcp://0.0.0.0:5500 for agents on other hosts.
+CONTROL_ENDPOINT = os.getenv('AGENT_CONTROL_ENDPOINT') or (
+    f"tcp://127.0.0.1:{COMMAND_PORT}" if sys.platform.startswith('win')
+    else f"ipc://{os.path.join(tempfile.gettempdir(), 'apexea-agent-control')}"
+)
+READY = b'READY'  # Sent by an agent once its control connection is up
+
+# The StatusAggregator's SUB socket; agents connect PUB sockets to it. Local only by
+# default, like CONTROL_ENDPOINT; set AGENT_STATUS_ENDPOINT (e.g. tcp://0.0.0.0:5600)
+# to accept status from agents on other hosts.
+STATUS_ENDPOINT = os.getenv('AGENT_STATUS_ENDPOINT') or (
+    f"tcp://127.0.0.1:{STATUS_PORT}" if sys.platform.startswith('win')
+    else f"ipc://{os.path.join(tempfile.gettempdir(), 'apexea-agent-status')}"
+)
+
+
+def AgentIdentity(agent_id: int) -> bytes:
+    """Routing identity of an agent on the control endpoint"""
+    return f"agent-{agent_id}".encode()
+
+
+def ControlConnectAddress(endpoint: str) -> str:
+    """Address an agent connects to for a bind `endpoint` (wildcard hosts become localhost)"""
+    for wildcard in ('tcp://*:', 'tcp://0.0.0.0:'):
+        if endpoint.startswith(wildcard):
+            return 'tcp://localhost:' + endpoint[len(wildcard):]
+    return endpoint
+
 
 class AgentStatus(Enum):
     IDLE = 0
@@ -29,10 +68,19 @@ class AgentType(Enum):
     WEB_CRAWLER = "WebCrawler"
 
 
+def AgentClass(agent_type: AgentType):
+    """Agent subclass implementing `agent_type`, imported on demand"""
+    if agent_type == AgentType.WEB_CRAWLER:
+        from .webcrawler import WebCrawler
+        return WebCrawler
+    raise ValueError(f"Unsupported agent type: {agent_type}")
+
+
 class Agent(Process):
-    def __init__(self, agent_id):
+    def __init__(self, agent_id, control_endpoint: str = None):
         super().__init__()
         self.agent_id = agent_id
+        self.control_endpoint = control_endpoint or CONTROL_ENDPOINT
         self.running = False
         self._status = Value('i', 0)  # Shared integer value for status
         self._status_lock = Lock()    # Lock for thread-safe status updates
@@ -41,6 +89,15 @@ class Agent(Process):
         self.command_socket = None
         self.status_socket = None
         self.poller = None
+        self.poll_timeout = None  # ms; None blocks until a socket or the wakeup pipe is readable
+        self._handlers = {}
+        self._wakeup_recv = None
+        self._wakeup_send = None
+        self._envelope = None  # Routing frames of the command being handled
+        self.max_tasks = 2     # Long operations running at once, see submit()
+        self.tasks = None      # TaskRunner, created in run()
+        self._loop_thread = None
+        self._outbox = deque()  # Status messages from task threads, sent by the main loop
     
     @property
     def status(self):
@@ -60,16 +117,28 @@ class Agent(Process):
         return f"Agent ID: {self.agent_id} \nRunning: {self.running} \nStatus: {self.status.name}"
 
     def close(self):
+        if self.tasks:
+            self.tasks.shutdown()
+            self._flush_status()
         if self.command_socket:  
-            self.command_socket.close(linger=0)
+            # Give the reply to a final command (e.g. "stop") a moment to go out
+            self.command_socket.close(linger=500)
         if self.status_socket:
             self.status_socket.close(linger=0)
+        for pipe in (self._wakeup_recv, self._wakeup_send):
+            if pipe:
+                pipe.close()
         if self.context:
             self.context.term()
         self.logger.info("Agent closed", extra={'agent_id': self.agent_id})
 
     def send_status(self, message):
-        """Send a status message to the manager"""
+        """Send a status message to the manager; safe to call from task threads"""
+        if self._loop_thread is not None and threading.get_ident() != self._loop_thread:
+            # ZMQ sockets are not thread-safe: hand the message to the main loop
+            self._outbox.append(message)
+            self.wake()
+            return
         if self.status_socket:
             self.status_socket.send_multipart([
                 str(self.agent_id).encode(),
@@ -81,7 +150,10 @@ class Agent(Process):
             })
 
     def run(self):
+        from .tasks import TaskRunner
         self.running = True
+        self._loop_thread = threading.get_ident()
+        self.tasks = TaskRunner(self.send_status, self.max_tasks, self.logger)
         self.logger.info(f"Agent {self.agent_id} starting", extra={'agent_id': self.agent_id})
         self.send_status(f"Agent {self.agent_id} started")
 
@@ -94,10 +166,12 @@ class Agent(Process):
         # Initialize ZMQ context and sockets
         self._setup_sockets()
         
-        # Main agent loop
+        # Main agent loop: block until a registered socket is readable, then dispatch
         while self.running:
-            self._process_commands()
-            time.sleep(1)
+            for readable, _ in self.poller.poll(self.poll_timeout):
+                self._handlers[readable]()
+                if not self.running:
+                    break
         
         self.close()
 
@@ -108,35 +182,102 @@ class Agent(Process):
     def _setup_sockets(self):
         self.context = zmq.Context()
         
-        # Setup command socket
-        self.command_socket = self.context.socket(zmq.REP)
-        port = int(self.agent_id) + COMMAND_PORT
-        self.command_socket.bind(f"tcp://*:{port}")
+        # Setup command socket: connect out to the manager's control endpoint
+        self.command_socket = self.context.socket(zmq.DEALER)
+        self.command_socket.setsockopt(zmq.IDENTITY, AgentIdentity(self.agent_id))
+        self.command_socket.connect(ControlConnectAddress(self.control_endpoint))
+        self.command_socket.send_multipart([b'', READY])
         
         # Setup status socket
         self.status_socket = self.context.socket(zmq.PUB)
-        self.status_socket.connect(f"tcp://localhost:{STATUS_PORT}")
+        self.status_socket.connect(ControlConnectAddress(STATUS_ENDPOINT))
         
-        # Setup poller
+        # Setup poller; the socket pair lets other threads interrupt a blocking poll
         self.poller = zmq.Poller()
-        self.poller.register(self.command_socket, zmq.POLLIN)
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self.register(self.command_socket, self._process_commands)
+        self.register(self._wakeup_recv, self._drain_wakeups)
         
         self.logger.debug(f"Sockets initialized", extra={'agent_id': self.agent_id})
         self.send_status(f"Agent {self.agent_id} sockets initialized")
 
-    def _process_commands(self):
-        if not self.poller or not self.command_socket:
+    def register(self, sock, handler):
+        """
+        Watch `sock` (a ZMQ socket, or anything with fileno()) in the main loop and
+        call `handler()` whenever it is readable. Call from initialize() or later.
+        """
+        self.poller.register(sock, zmq.POLLIN)
+        self._handlers[self._poll_key(sock)] = handler
+
+    def unregister(self, sock):
+        self.poller.unregister(sock)
+        self._handlers.pop(self._poll_key(sock), None)
+
+    @staticmethod
+    def _poll_key(sock):
+        # zmq.Poller reports ZMQ sockets as themselves but other objects by file descriptor
+        return sock if isinstance(sock, zmq.Socket) else sock.fileno()
+
+    def wake(self):
+        """Interrupt the main loop's poll; safe to call from any thread of the agent process"""
+        if self._wakeup_send:
+            try:
+                self._wakeup_send.send(b'\0')
+            except (BlockingIOError, OSError):
+                pass  # A wakeup is already pending, or the agent is closing
+
+    def _drain_wakeups(self):
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self._flush_status()
+
+    def _flush_status(self):
+        while self._outbox:
+            self.send_status(self._outbox.popleft())
+
+    def submit(self, name: str, fn, *args, **kwargs):
+        """
+        Run fn(task, *args, **kwargs) on a task thread and return the Task. The
+        command loop keeps handling commands meanwhile; `cancel <task_id>` and `stop`
+        cancel it at its next task.check().
+        """
+        return self.tasks.submit(name, fn, *args, **kwargs)
+
+    def reply(self, message: str):
+        """Answer the command being handled; each command gets one reply"""
+        if self._envelope is None:
+            self.logger.warning("Reply without a pending command", extra={'agent_id': self.agent_id})
             return
-        socks = dict(self.poller.poll(500))
-        
-        if self.command_socket in socks:
+        self.command_socket.send_multipart([*self._envelope, message.encode()])
+        self._envelope = None
+
+    def _process_commands(self):
+        # Commands can be queued back to back on the DEALER socket; handle all of them
+        while self.running and self.command_socket:
             try:
-                command = self.command_socket.recv_string(zmq.NOBLOCK)
-                self.handle_command(command)
+                # [request id, empty delimiter, command] or [..., command, trace context JSON]
+                frames = self.command_socket.recv_multipart(zmq.NOBLOCK)
             except zmq.Again:
-                pass
+                return
+            if len(frames) < 3:
+                continue
+            self._envelope = frames[:2]
+            try:
+                command = frames[2].decode()
+                trace = json.loads(frames[3]) if len(frames) > 3 and frames[3] else None
+                with span('command', f'agent_{self.agent_id}', parent=trace, command=command):
+                    self.handle_command(command)
             except Exception as e:
                 self.logger.error(f"Error processing command: {str(e)}", extra={'agent_id': self.agent_id})
+                if self._envelope is not None:
+                    self.reply(f"Error: {str(e)}")
+            finally:
+                self._envelope = None
 
     def handle_command(self, command):
         """Process received commands. Override to add custom commands."""
@@ -145,20 +286,35 @@ class Agent(Process):
             return
         
         if command == "stop":
-            self.command_socket.send_string("Stopping")
+            self.reply("Stopping")
             self.send_status(f"Agent {self.agent_id} stopping")
             self.stop()
         elif command == "test":
             self.logger.debug("Received test command", extra={'agent_id': self.agent_id})
-            self.command_socket.send_string("Test received")
+            self.reply("Test received")
             self.send_status("Test command received and acknowledged")
+        elif command == "progress":
+            self.reply(json.dumps(self.tasks.snapshot()))
+        elif command.startswith("cancel "):
+            argument = command.split(" ", 1)[1].strip()
+            task = self.tasks.cancel(int(argument)) if argument.isdigit() else None
+            if task is None:
+                self.reply(f"Unknown task: {argument}")
+            elif task.done:
+                self.reply(f"Task {task.task_id} already {task.state.name}")
+            else:
+                self.reply(f"Cancelling task {task.task_id}")
+                self.send_status(f"Task {task.task_id} {task.name} cancellation requested")
         else:
-            self.command_socket.send_string(f"Unknown command: {command}")
+            self.reply(f"Unknown command: {command}")
             self.send_status(f"Agent {self.agent_id} received unknown command: {command}")
 
     def stop(self):
+        # The main loop closes the sockets once it sees running is False
         self.running = False
-        self.close()
+        if self.tasks:
+            self.tasks.cancel_all()
+        self.wake()
 
 
 class AgentManager(Process):
@@ -175,7 +331,13 @@ class AgentManager(Process):
             self._agents = {}  # Store agent info
             self._processes = {}  # Store process info
             self.context = None
-            self.status_socket = None
+            self.collector = None  # StatusAggregator owning the SUB socket on STATUS_ENDPOINT
+            self.channels = None   # CommandChannels, the ROUTER end of the control endpoint
+            self.pool = None       # WarmPool of pre-imported workers, see StartPool
+            self.control_endpoint = CONTROL_ENDPOINT
+            self._last_id = Value('i', 0)  # Agent ids are never reused, even after deletion
+            self.command_timeout = 5.0  # seconds, per agent
+            self.ready_timeout = 10.0   # seconds for a started agent to announce itself
             self.logger = get_logger('agent_manager', log_to_console=True)
             self.initialized = True
     
@@ -186,68 +348,196 @@ class AgentManager(Process):
     @property
     def processes(self):
         return self._processes
-    
-    def Create(self, agent_type: AgentType):
-        agent_id = len(self.agents) + 1
-        if agent_type == AgentType.WEB_CRAWLER:
-            from .webcrawler import WebCrawler
-            agent = WebCrawler(agent_id)
-            # Store only essential information about the agent
-            self.agents[agent_id] = {
+
+    def StartCollector(self, timeout: float = 5.0):
+        """
+        Bind STATUS_ENDPOINT and start collecting agent status in a background thread.
+        Called in the process that uses the manager, after start(), since the thread
+        cannot be pickled for a spawned process.
+        """
+        if self.collector is not None and self.collector.is_alive():
+            return self.collector
+        from .status import StatusAggregator
+        self.collector = StatusAggregator()
+        self.collector.start()
+        if not self.collector.wait_ready(timeout):
+            self.logger.warning("Status collector did not start in time")
+        return self.collector
+
+    def Channels(self):
+        """The manager's command connections, created on first use"""
+        if self.channels is None:
+            from .commands import CommandChannels
+            self.channels = CommandChannels(self.control_endpoint, timeout=self.command_timeout)
+            self.channels.start()
+        return self.channels
+
+    def StartPool(self, size: int = 2, preload=None):
+        """
+        Keep `size` idle worker processes, with the agent modules already imported,
+        ready to become agents. Like StartCollector, called after start().
+        """
+        if self.pool is not None:
+            return self.pool
+        from .workers import WarmPool, DEFAULT_PRELOAD
+        self.pool = WarmPool(size, preload or DEFAULT_PRELOAD)
+        self.pool.fill()
+        return self.pool
+
+    def StopPool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def StopCollector(self):
+        if self.collector is not None:
+            self.collector.stop()
+            self.collector = None
+
+    def _record(self, agent_id: int, status: AgentStatus, message: str = None):
+        self.agents[agent_id]['status'] = status.name
+        if self.collector is not None:
+            self.collector.record(agent_id, status, message)
+
+    def Snapshot(self) -> list:
+        """Every known agent with its latest collected state, without contacting the agents"""
+        states = self.collector.states() if self.collector is not None else {}
+        agents = []
+        for agent_id, info in list(self.agents.items()):
+            process = self.processes.get(agent_id)
+            state = states.get(agent_id) or {}
+            agents.append({
                 'id': agent_id,
-                'type': agent_type.value,
-                'class_name': agent.__class__.__name__,
-                'status': AgentStatus.IDLE.name
-            }
-            return agent
-        raise ValueError(f"Unsupported agent type: {agent_type}")
+                'type': info['type'],
+                'alive': process.is_alive() if process else False,
+                'status': state.get('status') or info['status'],
+                'status_since': state.get('status_since'),
+                'updated': state.get('updated'),
+                'message': state.get('message'),
+                'events': state.get('events', []),
+                'identity': AgentIdentity(agent_id).decode(),
+                'pid': process.pid if process else None
+            })
+        return agents
+    
+    def _NextId(self) -> int:
+        with self._last_id.get_lock():
+            self._last_id.value += 1
+            return self._last_id.value
+
+    def Create(self, agent_type: AgentType) -> int:
+        """Register a new agent and return its id; Start() brings up its process"""
+        agent_class = AgentClass(agent_type)
+        agent_id = self._NextId()
+        # Store only essential information about the agent
+        self.agents[agent_id] = {
+            'id': agent_id,
+            'type': agent_type.value,
+            'class_name': agent_class.__name__,
+            'status': AgentStatus.IDLE.name
+        }
+        return agent_id
 
-    def Start(self, agent_id: int):
+    def Start(self, agent_id: int, timeout: float = None) -> bool:
+        """
+        Start the agent, on a warm worker from the pool when one is ready, and wait
+        up to `timeout` for it to announce itself on the control endpoint. Returns
+        whether it did.
+        """
         if agent_id not in self.agents:
             raise ValueError(f"Agent {agent_id} not found")
             
         if agent_id in self.processes:
             if self.processes[agent_id].is_alive():
                 self.logger.info(f"Agent {agent_id} already running")
-                return
+                return True
                 
-        # Create a new agent instance
-        if self.agents[agent_id]['type'] == AgentType.WEB_CRAWLER.value:
-            from .webcrawler import WebCrawler
-            agent = WebCrawler(agent_id)
-            agent.start()
-            self.processes[agent_id] = agent
-            self.agents[agent_id]['status'] = AgentStatus.IDLE.name
-            self.logger.info(f"Agent {agent_id} started")
+        agent_type = AgentType(self.agents[agent_id]['type'])
+        # Bind the control endpoint before the agent connects to it
+        channels = self.Channels()
+        process = None
+        if self.pool is not None:
+            process = self.pool.assign(agent_type, agent_id, self.control_endpoint)
+        warm = process is not None
+        if process is None:
+            process = AgentClass(agent_type)(agent_id, self.control_endpoint)
+            process.start()
+        self.processes[agent_id] = process
+        self.agents[agent_id]['warm'] = warm
+
+        ready = channels.wait_ready(agent_id, timeout or self.ready_timeout)
+        if ready:
+            self._record(agent_id, AgentStatus.IDLE, f"Agent {agent_id} process started")
+            self.logger.info(f"Agent {agent_id} started{' on a warm worker' if warm else ''}")
+        else:
+            self.logger.warning(f"Agent {agent_id} did not connect within {timeout or self.ready_timeout}s")
+        return ready
 
     def Stop(self, agent_id: int):
         if agent_id not in self.processes:
             self.logger.warning(f"Agent {agent_id} not running")
             return
             
-        # Send stop command via ZeroMQ
-        ctx = zmq.Context()
-        sock = ctx.socket(zmq.REQ)
-        sock.connect(f"tcp://localhost:{COMMAND_PORT + agent_id}")
-        sock.send_string("stop")
-        sock.close()
-        ctx.term()
+        # Send stop command over the agent's command connection
+        self.Channels().send_sync(agent_id, "stop", trace=inject())
         
         # Wait for process termination
-        self.processes[agent_id].join(timeout=5)
+        self._Reap(agent_id, timeout=5)
+
+    def _Reap(self, agent_id: int, timeout: float):
+        """Join a stopping agent, terminate it if it overstays `timeout`, and mark it stopped"""
+        self.processes[agent_id].join(timeout=timeout)
         if self.processes[agent_id].is_alive():
             self.logger.warning(f"Force-terminating agent {agent_id}")
             self.processes[agent_id].terminate()
+        if self.channels is not None:
+            self.channels.drop(agent_id)
         
         # Update agent status
-        self.agents[agent_id]['status'] = AgentStatus.STOPPED.name
+        self._record(agent_id, AgentStatus.STOPPED, f"Agent {agent_id} stopped by the manager")
+
+    def _ReapAll(self, agent_ids, timeout: float):
+        """
+        Reap agents one after another against a shared deadline. They were all told to
+        stop already, so they exit in parallel; reaping in one thread keeps the
+        process table and channel bookkeeping single-threaded.
+        """
+        deadline = time.monotonic() + timeout
+        for agent_id in agent_ids:
+            self._Reap(agent_id, max(0.0, deadline - time.monotonic()))
+
+    async def BroadcastCommand(self, command: str, agent_ids=None, timeout: float = None) -> dict:
+        """
+        Send `command` to many agents concurrently (every live agent by default) and
+        return {agent_id: {'status', 'message'}}. Each agent gets its own `timeout`.
+        """
+        if agent_ids is None:
+            agent_ids = [aid for aid, process in self.processes.items() if process.is_alive()]
+        results = {}
+        targets = []
+        for agent_id in agent_ids:
+            process = self.processes.get(agent_id)
+            if process is None or not process.is_alive():
+                results[agent_id] = {'status': 'error', 'message': f'Agent {agent_id} not running'}
+            else:
+                targets.append(agent_id)
+        with span('agent_broadcast', 'agent_manager', command=command, agents=len(targets)):
+            results.update(await self.Channels().broadcast(targets, command, timeout, trace=inject()))
+        return results
+
+    async def StopAll(self, agent_ids=None, timeout: float = 5.0) -> dict:
+        """Stop many agents at once: broadcast `stop`, then reap them all within one `timeout`"""
+        results = await self.BroadcastCommand("stop", agent_ids, timeout)
+        running = [aid for aid in results if aid in self.processes]
+        await asyncio.to_thread(self._ReapAll, running, timeout)
+        return results
 
     def CleanupProcesses(self):
         dead = [aid for aid, p in self.processes.items() if not p.is_alive()]
         for aid in dead:
             del self.processes[aid]
             if aid in self.agents:
-                self.agents[aid]['status'] = AgentStatus.STOPPED.name
+                self._record(aid, AgentStatus.STOPPED, f"Agent {aid} process exited")
         if dead:
             self.logger.info(f"Cleaned {len(dead)} terminated agents")
 
@@ -275,32 +565,9 @@ class AgentManager(Process):
             }
             
         try:
-            # Create a new context and socket for this command
-            ctx = zmq.Context()
-            sock = ctx.socket(zmq.REQ)
-            sock.setsockopt(zmq.RCVTIMEO, 5000)  # 5 second timeout
-            sock.connect(f"tcp://localhost:{COMMAND_PORT + agent_id}")
-            
-            # Send command
-            sock.send_string(command)
-            
-            # Get response
-            response = sock.recv_string()
-            
-            # Cleanup
-            sock.close()
-            ctx.term()
-            
-            return {
-                'status': 'success',
-                'message': response
-            }
-            
-        except zmq.error.Again:
-            return {
-                'status': 'error',
-                'message': f'Timeout waiting for response from agent {agent_id}'
-            }
+            # Reuses the agent's persistent connection; the trace context rides along as a frame
+            with span('agent_command', 'agent_manager', agent_id=agent_id, command=command):
+                return self.Channels().send_sync(agent_id, command, trace=inject())
         except Exception as e:
             return {
                 'status': 'error',
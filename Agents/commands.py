@@ -0,0 +1,208 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import zmq
+import zmq.asyncio
+import json
+import asyncio
+import itertools
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from Logger.logger import get_logger
+from Agents.agents import CONTROL_ENDPOINT, READY, AgentIdentity
+
+
+def _AgentId(identity: bytes) -> Optional[int]:
+    try:
+        return int(identity.decode().rsplit('-', 1)[1])
+    except (UnicodeDecodeError, IndexError, ValueError):
+        return None
+
+
+class CommandChannels:
+    """
+    The manager's end of the agent control plane.
+
+    One ROUTER socket is bound on `endpoint`; every agent connects to it with a
+    DEALER socket whose identity is AgentIdentity(agent_id) and announces itself with
+    READY. Commands are routed by that identity, so the fleet needs one port (or IPC
+    path) however many agents run. Requests carry an id as their envelope frame,
+    which the agent echoes back, so replies are matched to requests even after a
+    timeout leaves a late reply in flight.
+
+    The socket lives on a private event loop thread; send() and broadcast() can be
+    awaited from any other loop, and the *_sync variants called from plain threads.
+    """
+
+    def __init__(self, endpoint: str = CONTROL_ENDPOINT, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.logger = get_logger('agent_channels', log_to_console=True)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._context: Optional[zmq.asyncio.Context] = None
+        # Loop thread only
+        self._socket: Optional[zmq.asyncio.Socket] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._ready: Dict[int, asyncio.Event] = {}
+        self._pending: Dict[bytes, Tuple[int, asyncio.Future]] = {}
+
+    def start(self):
+        """Bind the control endpoint; returns once agents can connect"""
+        with self._lock:
+            if self._loop is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._context = zmq.asyncio.Context()
+            self._thread = threading.Thread(target=self._loop.run_forever, name='agent-control', daemon=True)
+            self._thread.start()
+        self._submit(self._bind()).result()
+        self.logger.info(f"Agent control endpoint bound on {self.endpoint}")
+
+    def _submit(self, coroutine):
+        if self._loop is None:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    # ------------------------------------------------------------------ #
+    async def _bind(self):
+        socket = self._context.socket(zmq.ROUTER)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.setsockopt(zmq.ROUTER_MANDATORY, 1)  # Fail fast for agents that are not connected
+        socket.setsockopt(zmq.ROUTER_HANDOVER, 1)   # A restarted agent takes over its identity
+        socket.bind(self.endpoint)
+        self._socket = socket
+        self._reader = asyncio.create_task(self._read())
+
+    def _ready_event(self, agent_id: int) -> asyncio.Event:
+        event = self._ready.get(agent_id)
+        if event is None:
+            event = self._ready[agent_id] = asyncio.Event()
+        return event
+
+    async def _read(self):
+        try:
+            while True:
+                # [identity, request id, empty delimiter, reply] or [identity, empty, READY]
+                frames = await self._socket.recv_multipart()
+                agent_id = _AgentId(frames[0])
+                if agent_id is None or len(frames) < 3:
+                    continue
+                if frames[1] == b'' and frames[2] == READY:
+                    self._ready_event(agent_id).set()
+                    continue
+                _, waiter = self._pending.pop(frames[1], (None, None))
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(frames[-1].decode(errors='replace'))
+        except (asyncio.CancelledError, zmq.ZMQError):
+            pass
+
+    async def _request(self, agent_id: int, command: str, trace: Optional[Dict[str, Any]], timeout: float) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        request_id = str(next(self._ids)).encode()
+        try:
+            # The deadline covers waiting for a just-started agent to connect
+            try:
+                await asyncio.wait_for(self._ready_event(agent_id).wait(), timeout)
+            except asyncio.TimeoutError:
+                return {'status': 'error', 'message': f'Agent {agent_id} is not connected'}
+            waiter = loop.create_future()
+            self._pending[request_id] = (agent_id, waiter)
+            frames = [AgentIdentity(agent_id), request_id, b'', command.encode()]
+            if trace:
+                frames.append(json.dumps(trace).encode())
+            try:
+                await self._socket.send_multipart(frames)
+            except zmq.ZMQError as e:
+                if e.errno == zmq.EHOSTUNREACH:
+                    self._ready.pop(agent_id, None)
+                    return {'status': 'error', 'message': f'Agent {agent_id} is not connected'}
+                raise
+            message = await asyncio.wait_for(waiter, max(0.0, deadline - loop.time()))
+            return {'status': 'success', 'message': message}
+        except asyncio.TimeoutError:
+            return {'status': 'error', 'message': f'Timeout waiting for response from agent {agent_id}'}
+        except Exception as e:
+            return {'status': 'error', 'message': f'Error sending command to agent {agent_id}: {str(e)}'}
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _broadcast(self, agent_ids: List[int], command: str, trace: Optional[Dict[str, Any]],
+                         timeout: float) -> Dict[int, Dict[str, Any]]:
+        results = await asyncio.gather(*(self._request(agent_id, command, trace, timeout) for agent_id in agent_ids))
+        return dict(zip(agent_ids, results))
+
+    async def _drop(self, agent_id: int):
+        self._ready.pop(agent_id, None)
+        for request_id, (owner, waiter) in list(self._pending.items()):
+            if owner == agent_id and not waiter.done():
+                waiter.set_exception(ConnectionError("Agent disconnected"))
+
+    async def _close(self):
+        self._reader.cancel()
+        for _, waiter in self._pending.values():
+            if not waiter.done():
+                waiter.set_exception(ConnectionError("Control endpoint closed"))
+        self._socket.close(linger=0)
+
+    # ------------------------------------------------------------------ #
+    def connected(self, agent_id: int) -> bool:
+        """Whether the agent has announced itself and not been dropped"""
+        event = self._ready.get(agent_id)
+        return event is not None and event.is_set()
+
+    async def _wait_ready(self, agent_id: int, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._ready_event(agent_id).wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def wait_ready(self, agent_id: int, timeout: Optional[float] = None) -> bool:
+        """Block until the agent sends READY, or `timeout` passes; returns whether it did"""
+        return self._submit(self._wait_ready(agent_id, timeout or self.timeout)).result()
+
+    async def send(self, agent_id: int, command: str, timeout: Optional[float] = None,
+                   trace: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send one command and wait for the reply or the deadline"""
+        future = self._submit(self._request(agent_id, command, trace, timeout or self.timeout))
+        return await asyncio.wrap_future(future)
+
+    async def broadcast(self, agent_ids: Iterable[int], command: str, timeout: Optional[float] = None,
+                        trace: Optional[Dict[str, Any]] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Send `command` to every agent at once. Each agent has its own `timeout`
+        deadline, so one slow agent does not hold up the other results.
+        """
+        future = self._submit(self._broadcast(list(agent_ids), command, trace, timeout or self.timeout))
+        return await asyncio.wrap_future(future)
+
+    def send_sync(self, agent_id: int, command: str, timeout: Optional[float] = None,
+                  trace: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self._submit(self._request(agent_id, command, trace, timeout or self.timeout)).result()
+
+    def broadcast_sync(self, agent_ids: Iterable[int], command: str, timeout: Optional[float] = None,
+                       trace: Optional[Dict[str, Any]] = None) -> Dict[int, Dict[str, Any]]:
+        return self._submit(self._broadcast(list(agent_ids), command, trace, timeout or self.timeout)).result()
+
+    def drop(self, agent_id: int):
+        """Forget an agent's connection, e.g. once it has stopped; pending requests fail"""
+        if self._loop is not None:
+            self._submit(self._drop(agent_id)).result()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(2)
+        self._context.term()
@@ -0,0 +1,149 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import zmq
+import json
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+from Logger.logger import get_logger
+from Agents.agents import STATUS_ENDPOINT, STATUS_STREAM_PORT, AgentStatus
+
+
+STATUS_PREFIX = "Status changed to "
+RECENT_EVENTS = 20  # Status messages kept per agent
+LOCAL_STATUS_URL = "inproc://agent-status-local"
+
+
+class StatusAggregator(threading.Thread):
+    """
+    Collects the status messages agents publish to STATUS_ENDPOINT.
+
+    Agents connect PUB sockets to STATUS_ENDPOINT; the aggregator binds the matching SUB
+    socket and keeps a table with the latest state of every agent: its status, when
+    that status was entered, when the agent was last heard from, and its most recent
+    messages. Each update is also republished as a JSON event on STATUS_STREAM_PORT
+    for the API's event stream. State changes made by the manager itself (an agent
+    stopped or found dead) go through record(), so they reach the same table and
+    stream.
+    """
+
+    def __init__(self, status_endpoint: str = STATUS_ENDPOINT, stream_port: int = STATUS_STREAM_PORT,
+                 recent_events: int = RECENT_EVENTS):
+        super().__init__(name='status-aggregator', daemon=True)
+        self.status_endpoint = status_endpoint
+        self.stream_port = stream_port
+        self.recent_events = recent_events
+        self.logger = get_logger('status_aggregator', log_to_console=True)
+        self._states: Dict[int, Dict[str, Any]] = {}
+        self._events: Dict[int, deque] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        self._seq = 0
+        self._local = threading.local()  # Each calling thread's PUSH socket for record()
+        self._pushers = []
+        self._pushers_lock = threading.Lock()
+
+    def states(self) -> Dict[int, Dict[str, Any]]:
+        """Latest known state per agent, with its recent events"""
+        with self._lock:
+            return {
+                agent_id: {**state, 'events': list(self._events[agent_id])}
+                for agent_id, state in self._states.items()
+            }
+
+    def state(self, agent_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._states.get(agent_id)
+            return {**state, 'events': list(self._events[agent_id])} if state else None
+
+    def record(self, agent_id: int, status: AgentStatus, message: Optional[str] = None):
+        """Apply a state change observed by the manager rather than reported by the agent"""
+        if not self._ready.is_set():
+            return
+        frames = [str(agent_id).encode(), f"{STATUS_PREFIX}{status.name}".encode()]
+        if message:
+            frames.append(message.encode())
+        self._pusher().send_multipart(frames)
+
+    def _pusher(self) -> zmq.Socket:
+        # ZMQ sockets are not thread-safe, so each thread keeps its own
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = zmq.Context.instance().socket(zmq.PUSH)
+            sock.setsockopt(zmq.LINGER, 1000)
+            sock.connect(LOCAL_STATUS_URL)
+            self._local.sock = sock
+            with self._pushers_lock:
+                self._pushers.append(sock)
+        return sock
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def stop(self, timeout: float = 2.0):
+        self._stopping.set()
+        if self.is_alive():
+            self.join(timeout)
+        with self._pushers_lock:
+            pushers, self._pushers = self._pushers, []
+        for sock in pushers:
+            sock.close(linger=0)
+        self._local = threading.local()
+
+    def _apply(self, agent_id: int, message: str) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._seq += 1
+            state = self._states.setdefault(agent_id, {'agent_id': agent_id, 'status': None, 'status_since': None})
+            events = self._events.setdefault(agent_id, deque(maxlen=self.recent_events))
+            if message.startswith(STATUS_PREFIX):
+                name = message[len(STATUS_PREFIX):].strip()
+                if name in AgentStatus.__members__ and name != state['status']:
+                    state['status'] = name
+                    state['status_since'] = now
+            state['message'] = message
+            state['updated'] = now
+            events.append({'time': now, 'message': message})
+            return {'seq': self._seq, **state}
+
+    def run(self):
+        context = zmq.Context.instance()
+        receiver = context.socket(zmq.SUB)
+        receiver.setsockopt(zmq.SUBSCRIBE, b'')
+        receiver.bind(self.status_endpoint)
+        local = context.socket(zmq.PULL)
+        local.bind(LOCAL_STATUS_URL)
+        publisher = context.socket(zmq.PUB)
+        publisher.bind(f"tcp://127.0.0.1:{self.stream_port}")
+        poller = zmq.Poller()
+        poller.register(receiver, zmq.POLLIN)
+        poller.register(local, zmq.POLLIN)
+        self._ready.set()
+        self.logger.info(f"Collecting agent status on {self.status_endpoint}, streaming on {self.stream_port}")
+        try:
+            while not self._stopping.is_set():
+                for sock, _ in poller.poll(500):
+                    frames = sock.recv_multipart()
+                    if len(frames) < 2:
+                        continue
+                    try:
+                        agent_id = int(frames[0].decode())
+                    except ValueError:
+                        continue
+                    for message in frames[1:]:
+                        event = self._apply(agent_id, message.decode(errors='replace'))
+                        publisher.send_multipart([frames[0], json.dumps(event).encode()])
+        except zmq.ZMQError as e:
+            self.logger.error(f"Status aggregator stopped: {str(e)}", extra={'error': str(e)})
+        finally:
+            self._ready.clear()
+            receiver.close(linger=0)
+            local.close(linger=0)
+            publisher.close(linger=0)
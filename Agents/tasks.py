@@ -0,0 +1,225 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import time
+import queue
+import itertools
+import threading
+from enum import Enum
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+RECENT_TASKS = 20  # Finished tasks kept for `progress`
+
+
+class TaskCancelled(Exception):
+    """Raised at a cancellation point of a task that has been cancelled"""
+
+
+class TaskState(Enum):
+    QUEUED = 0
+    RUNNING = 1
+    DONE = 2
+    FAILED = 3
+    CANCELLED = 4
+
+    def __str__(self):
+        return self.name
+
+
+class Task:
+    """
+    One long operation run by a TaskRunner. The function receives the task as its
+    first argument and should call check() (or sleep()) between steps, so `cancel`
+    and `stop` take effect, and report() to publish progress.
+    """
+
+    def __init__(self, task_id: int, name: str, fn: Callable, args: tuple, kwargs: dict,
+                 report: Callable[[str], None]):
+        self.task_id = task_id
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.state = TaskState.QUEUED
+        self.progress: Optional[float] = None
+        self.message: Optional[str] = None
+        self.error: Optional[str] = None
+        self.result: Any = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._report = report
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.state in (TaskState.DONE, TaskState.FAILED, TaskState.CANCELLED)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        """Cancellation point: raise TaskCancelled if the task has been cancelled"""
+        if self._cancel.is_set():
+            raise TaskCancelled(f"Task {self.task_id} cancelled")
+
+    def sleep(self, seconds: float):
+        """Wait `seconds`, returning early with TaskCancelled if the task is cancelled"""
+        if self._cancel.wait(seconds):
+            raise TaskCancelled(f"Task {self.task_id} cancelled")
+
+    def report(self, progress: Optional[float] = None, message: Optional[str] = None):
+        """Record progress (0.0 to 1.0) and/or a message, publish it, and check for cancellation"""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+        text = f"Task {self.task_id} {self.name} progress"
+        if self.progress is not None:
+            text += f" {self.progress * 100:.0f}%"
+        self._report(f"{text}: {self.message}" if self.message else text)
+        self.check()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'task_id': self.task_id,
+            'name': self.name,
+            'state': self.state.name,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class TaskRunner:
+    """
+    Runs an agent's long operations on worker threads, so its command loop stays
+    free to answer `stop`, `progress` and `cancel` while they run.
+
+    Workers are daemon threads started on demand, up to `max_workers`; further tasks
+    queue. Lifecycle changes (started, completed, failed, cancelled) and progress go
+    to `report`, which must be safe to call from any thread. Cancellation is
+    cooperative: cancel() sets a flag that the task's check()/sleep()/report() calls
+    turn into TaskCancelled.
+    """
+
+    def __init__(self, report: Callable[[str], None], max_workers: int = 2, logger=None,
+                 history: int = RECENT_TASKS):
+        self.report = report
+        self.max_workers = max(1, max_workers)
+        self.logger = logger
+        self.history = history
+        self._queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._tasks: Dict[int, Task] = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> Task:
+        """Queue fn(task, *args, **kwargs) and return its Task"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Task runner is shut down")
+            task = Task(next(self._ids), name, fn, args, kwargs, self.report)
+            self._tasks[task.task_id] = task
+            busy = sum(1 for t in self._tasks.values() if not t.done)
+            if len(self._threads) < min(busy, self.max_workers):
+                thread = threading.Thread(target=self._worker, name=f'task-worker-{len(self._threads) + 1}',
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        self._queue.put(task)
+        self.report(f"Task {task.task_id} {name} queued")
+        return task
+
+    def get(self, task_id: int) -> Optional[Task]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def active(self) -> List[Task]:
+        """Queued and running tasks"""
+        with self._lock:
+            return [task for task in self._tasks.values() if not task.done]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [task.to_dict() for task in self._tasks.values()]
+
+    def cancel(self, task_id: int) -> Optional[Task]:
+        """Request cancellation of a task; returns it, or None if it is unknown"""
+        task = self.get(task_id)
+        if task is not None and not task.done:
+            task.cancel()
+        return task
+
+    def cancel_all(self):
+        for task in self.active():
+            task.cancel()
+
+    def shutdown(self, timeout: float = 2.0):
+        """Cancel every task and wait up to `timeout` for the workers to finish"""
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+        self.cancel_all()
+        for _ in threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            self._run(task)
+
+    def _run(self, task: Task):
+        label = f"Task {task.task_id} {task.name}"
+        if task.cancelled:
+            task.state = TaskState.CANCELLED
+            task.finished = time.time()
+            self.report(f"{label} cancelled before it started")
+            self._trim()
+            return
+        task.state = TaskState.RUNNING
+        task.started = time.time()
+        self.report(f"{label} started")
+        try:
+            task.result = task.fn(task, *task.args, **task.kwargs)
+            task.state = TaskState.DONE
+            task.progress = 1.0
+            self.report(f"{label} completed")
+        except TaskCancelled:
+            task.state = TaskState.CANCELLED
+            self.report(f"{label} cancelled")
+        except Exception as e:
+            task.state = TaskState.FAILED
+            task.error = str(e)
+            if self.logger:
+                self.logger.error(f"{label} failed: {str(e)}", extra={'error': str(e)})
+            self.report(f"{label} failed: {str(e)}")
+        finally:
+            task.finished = time.time()
+            self._trim()
+
+    def _trim(self):
+        with self._lock:
+            finished = [task_id for task_id, task in self._tasks.items() if task.done]
+            for task_id in finished[:max(0, len(finished) - self.history)]:
+                del self._tasks[task_id]
@@ -9,20 +9,16 @@ import zmq
 import time
 from enum import Enum
 from multiprocessing import Process
-from .agents import Agent, COMMAND_PORT, STATUS_PORT, AgentStatus
-from AI.autobrowser import AutoBrowser, BrowserType
-import requests
+from .agents import Agent, STATUS_PORT, AgentStatus
 import json
 from datetime import datetime, timedelta
-from playwright.sync_api import Error, TimeoutError
-from playwright.sync_api import sync_playwright
 from time import sleep
 from typing import List
 import re
 
 class WebCrawler(Agent):
-    def __init__(self, agent_id):
-        super().__init__(agent_id)
+    def __init__(self, agent_id, control_endpoint: str = None):
+        super().__init__(agent_id, control_endpoint)
 
     def initialize(self):
         self.logger.info(f"Initializing WebCrawler {self.agent_id}", extra={'agent_id': self.agent_id})
@@ -34,39 +30,40 @@ class WebCrawler(Agent):
             self.logger.error("Command socket not initialized", extra={'agent_id': self.agent_id})
             return
         
-        if command == "stop" or command == "test":
-            super().handle_command(command)
-        elif command == "crawl":
+        if command == "crawl":
             self.logger.info("Received crawl command", extra={'agent_id': self.agent_id})
-            self.command_socket.send_string("Crawling")
+            task = self.submit("crawl", self._CrawlTask, None)
+            self.reply(f"Crawling, task {task.task_id}")
             self.send_status("Crawling command received and acknowledged")
-            self.set_status(AgentStatus.CRAWLING)
-            self.Crawl()
-            self.set_status(AgentStatus.IDLE)
         elif command.startswith("crawl:"):
             # Handle parameterized crawl commands
-            try:
-                limits = command.split(":", 1)[1].strip()
-                
-                self.logger.info(f"Received limited crawl command: {limits}", 
-                               extra={'agent_id': self.agent_id})
-                self.command_socket.send_string(f"Crawling with limits: {limits}")
-                
-                self.set_status(AgentStatus.CRAWLING)
-                self.Crawl()
-                self.set_status(AgentStatus.IDLE)
-            except Exception as e:
-                error_msg = f"Error parsing crawl limits: {str(e)}"
-                self.logger.error(error_msg, extra={'agent_id': self.agent_id})
-                self.command_socket.send_string(f"Error: {error_msg}")
+            limits = command.split(":", 1)[1].strip()
+            self.logger.info(f"Received limited crawl command: {limits}", 
+                           extra={'agent_id': self.agent_id})
+            task = self.submit("crawl", self._CrawlTask, limits)
+            self.reply(f"Crawling with limits: {limits}, task {task.task_id}")
         else:
-            self.command_socket.send_string(f"Unknown command: {command}")
-            self.send_status(f"Received unknown command: {command}")
+            # stop, test, progress, cancel <task_id>
+            super().handle_command(command)
+
+    def _CrawlTask(self, task, limits):
+        self.set_status(AgentStatus.CRAWLING)
+        try:
+            return self.Crawl(task, limits)
+        finally:
+            if not any(t.name == "crawl" and t is not task for t in self.tasks.active()):
+                self.set_status(AgentStatus.IDLE)
 
-    def Crawl(self):
+    def Crawl(self, task=None, limits=None):
         """Crawl the web. This is the main function that will be called when the crawl command is received.
         You must implement this function.
+        Import AI.autobrowser (Playwright) and requests here rather than at module level,
+        so idle agents start without them.
+        Runs on a task thread: call task.check() (or task.sleep()) between steps so
+        `cancel` and `stop` take effect, and task.report() to publish progress.
         """
         self.logger.info(f"Starting crawl operation", extra={'agent_id': self.agent_id})
         self.send_status(f"Starting crawl operation")
+        if task:
+            task.check()
         
@@ -0,0 +1,161 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import atexit
+import importlib
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Iterable, Optional, Tuple
+from Logger.logger import get_logger
+from Agents.agents import AgentClass, AgentType
+
+
+# Imported by the fork server (or each spawned worker) before any agent role is assigned
+DEFAULT_PRELOAD = ('Agents.agents', 'Agents.webcrawler', 'Logger.logger', 'Logger.tracing')
+
+
+def _Worker(conn, preload: Tuple[str, ...]):
+    """Idle worker: import `preload`, report ready, then become the agent it is assigned"""
+    for module in preload:
+        importlib.import_module(module)
+    conn.send(('ready', os.getpid()))
+    try:
+        assignment = conn.recv()
+    except EOFError:
+        return
+    if assignment is None:  # Retired without a role
+        conn.close()
+        return
+    agent_type, agent_id, control_endpoint = assignment
+    conn.close()
+    agent = AgentClass(AgentType(agent_type))(agent_id, control_endpoint)
+    # Run the agent's main loop in this process instead of starting another one
+    agent.run()
+
+
+class WarmPool:
+    """
+    Pre-started, pre-imported worker processes that take on an agent role on demand.
+
+    Workers come from a fork server that has already imported `preload` (plain spawn
+    where the platform has no fork server), so a new agent skips interpreter start-up
+    and imports. Each worker reports ready over a pipe; assign() hands the oldest
+    ready worker an agent id and type and refills the pool in the background.
+    """
+
+    def __init__(self, size: int = 2, preload: Iterable[str] = DEFAULT_PRELOAD, start_method: Optional[str] = None):
+        self.size = max(0, size)
+        self.preload = tuple(preload)
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            self.context.set_forkserver_preload(list(self.preload))
+        self.logger = get_logger('agent_pool', log_to_console=True)
+        self._idle = deque()      # (process, conn) that reported ready
+        self._starting = []       # (process, conn) still importing
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def stats(self) -> dict:
+        self._collect()
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle), 'starting': len(self._starting)}
+
+    def fill(self):
+        """Start workers until `size` are idle or starting"""
+        with self._lock:
+            while not self._closed and len(self._idle) + len(self._starting) < self.size:
+                parent, child = self.context.Pipe()
+                process = self.context.Process(target=_Worker, args=(child, self.preload), name='agent-worker')
+                process.start()
+                child.close()
+                self._starting.append((process, parent))
+
+    def _collect(self, timeout: float = 0.0):
+        """Move workers that reported ready within `timeout` from starting to idle"""
+        with self._lock:
+            starting = list(self._starting)
+        if not starting:
+            return
+        for conn in wait([conn for _, conn in starting], timeout):
+            worker = next(w for w in starting if w[1] is conn)
+            try:
+                conn.recv()
+            except (EOFError, OSError):
+                # Died during start-up (e.g. a failed import); drop it
+                worker[0].join(0)
+                with self._lock:
+                    self._starting.remove(worker)
+                continue
+            with self._lock:
+                self._starting.remove(worker)
+                self._idle.append(worker)
+
+    def _acquire(self, timeout: float):
+        self._collect()
+        with self._lock:
+            while self._idle:
+                process, conn = self._idle.popleft()
+                if process.is_alive():
+                    return process, conn
+                conn.close()
+            waiting = bool(self._starting)
+        if waiting and timeout > 0:
+            # Every worker is still starting; wait for the first to come up
+            self._collect(timeout)
+            with self._lock:
+                if self._idle:
+                    return self._idle.popleft()
+        return None
+
+    def assign(self, agent_type: AgentType, agent_id: int, control_endpoint: str, timeout: float = 1.0):
+        """
+        Turn a ready worker into agent `agent_id` and return its process handle, or
+        None when no worker became ready within `timeout` (the caller starts the agent
+        the ordinary way).
+        """
+        if self._closed or self.size == 0:
+            return None
+        worker = self._acquire(timeout)
+        threading.Thread(target=self.fill, name='agent-pool-fill', daemon=True).start()
+        if worker is None:
+            return None
+        process, conn = worker
+        try:
+            conn.send((agent_type.value, agent_id, control_endpoint))
+        except (BrokenPipeError, OSError):
+            return None
+        finally:
+            conn.close()
+        return process
+
+    def close(self):
+        """Retire idle workers and stop the ones still starting. Registered with atexit."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            idle, starting = list(self._idle), list(self._starting)
+            self._idle.clear()
+            self._starting.clear()
+        for process, conn in idle:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for process, conn in starting:
+            conn.close()
+            process.terminate()
+        for process, _ in idle + starting:
+            process.join(2)
+            if process.is_alive():
+                process.terminate()
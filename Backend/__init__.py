@@ -1,5 +1,50 @@
-from .app import *
-from .api import *
-from .database import *
-from .server import *
-from .httpcodes import *
\ No newline at end of file
+import importlib
+
+"""
+Backend package. Submodules are imported on first attribute access (PEP 562), so
+`import Backend` and `from Backend.pool import ...` stay cheap, and no app, socket
+or database client exists until CreateApiApp(), GetApiApp() or the server's Main()
+builds one.
+"""
+
+# Submodules searched, in order, for names not listed in _EXPORTS
+_SUBMODULES = ('app', 'api', 'database', 'server', 'httpcodes')
+
+_EXPORTS = {
+    'CreateApp': 'app',
+    'StorePrincipal': 'app',
+    'InvalidatePrincipal': 'app',
+    'RevokePrincipals': 'app',
+    'PreloadUser': 'app',
+    'CreateApiApp': 'api',
+    'GetApiApp': 'api',
+    'GetAsgiApp': 'api',
+    'ServerRequest': 'api',
+    'DatabaseRequest': 'api',
+    'Database': 'database',
+    'FirestoreDB': 'database',
+    'GetDatabase': 'server',
+    'MasterAgent': 'server',
+    'ProcessCommand': 'server',
+    'OpStatus': 'server',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(f'{__name__}.{_EXPORTS[name]}')
+        return getattr(module, name)
+    if name.startswith('http_'):
+        return getattr(importlib.import_module(f'{__name__}.httpcodes'), name)
+    if not name.startswith('_'):
+        for submodule in _SUBMODULES:
+            module = importlib.import_module(f'{__name__}.{submodule}')
+            if hasattr(module, name):
+                return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
\ No newline at end of file
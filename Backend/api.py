@@ -12,36 +12,36 @@ import time
 from time import sleep
 from functools import wraps
 from typing import Tuple, Dict, Any, Optional
-from contextlib import asynccontextmanager
-from flask import Flask, request, jsonify, current_app, session, abort, make_response
+from flask import Flask, Blueprint, request, jsonify, current_app, session, abort, make_response, g
 from flask_cors import CORS
 from flask_login import login_user, logout_user, login_required, current_user, LoginManager, UserMixin
 import zmq
 import zmq.asyncio
-import bcrypt
 import re
+from pydantic import ValidationError
 from httpcodes import *
 from Agents import AgentManager, Agent
 from Data import *
 from Backend.app import *
+from Backend.pool import ZMQClientPool, PoolExhausted
+from Backend.asgi import FlaskASGI, StreamBody, RequestBody
+from Backend.hashing import HashQueueFull
+from Backend.compression import Compress, MatchesETag
+from Backend.updater import ReleaseAsset
+from Backend.streaming import AsyncStream, EventStreamResponse, ServerSentEvent
+from Backend.jsonprovider import dumps, loads
+from Backend.metrics import Instrument, CollectApiMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from dotenv import load_dotenv
 from Logger import LoggerManager
+from Logger.tracing import span, start_span, activate, deactivate, inject, parse_traceparent
 import threading
 import secrets
 import inspect
+import math
+import hashlib
 import requests
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
-from email.utils import formatdate
-from email.header import Header
-from email.mime.base import MIMEBase
-from email.mime.image import MIMEImage
-import userpaths
 
 load_dotenv()
-documents_folder = userpaths.get_my_documents()
 
 
 # Collection name constants
@@ -59,116 +59,91 @@ logger = LoggerManager.get_logger(
 )
 
 
-class ZMQClientPool:
-    def __init__(self, max_connections: int = 10, server_url: str = "tcp://localhost:5001"):
-        self.max_connections = max_connections
-        self.server_url = server_url
-        self.pool = None
-        self.context = None
-        self._initialize_pool()
+# Routes and request hooks; CreateApiApp() registers them on an app
+bp = Blueprint('api', __name__)
 
-    def _initialize_pool(self):
-        """Initialize the connection pool with ZMQ sockets"""
-        self.context = zmq.asyncio.Context()
-        self.pool = asyncio.Queue(maxsize=self.max_connections)
-        
-        for _ in range(self.max_connections):
-            socket = self.context.socket(zmq.REQ)
-            socket.connect(self.server_url)
-            self.pool.put_nowait(socket)
-
-    @asynccontextmanager
-    async def get_connection(self):
-        """Get a connection from the pool with automatic reconnection"""
-        if self.pool is None or self.context is None:
-            self._initialize_pool()
-            
-        socket = await self.pool.get()
-        try:
-            if not socket.closed:
-                yield socket
-            else:
-                new_socket = self.context.socket(zmq.REQ)
-                new_socket.connect(self.server_url)
-                yield new_socket
-        finally:
-            if not socket.closed:
-                await self.pool.put(socket)
-
-    async def close(self):
-        """Close all connections in the pool"""
-        if self.pool is not None:
-            while not self.pool.empty():
-                socket = await self.pool.get()
-                if not socket.closed:
-                    socket.close()
-        if self.context is not None:
-            self.context.term()
-        self.pool = None
-        self.context = None
 
+# Endpoints that must keep answering when the worker is saturated
+# (status streams are long-lived and capped by their own stream_admission limit)
+ADMISSION_EXEMPT = {'api.ApiStatus', 'api.Metrics', 'api.AgentStatusStream'}
+
+LOOPBACK_ADDRESSES = {'127.0.0.1', '::1'}
 
-load_dotenv()
-app = CreateApp()
 
+@bp.before_app_request
+def StartTrace():
+    """Open the root span for this request, continuing an incoming traceparent if present"""
+    root = start_span(
+        f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+        'api',
+        parent=parse_traceparent(request.headers.get('traceparent')),
+        endpoint=request.endpoint
+    )
+    activate(root)
+    g.trace_span = root
 
-CORS(app, resources={
-    r"/*": {
-        "origins": ["http://localhost:3000"],
-        "methods": ["GET", "POST", "PUT", "DELETE"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": True
-    }
-})
 
+@bp.after_app_request
+def TraceHeader(response):
+    root = g.get('trace_span')
+    if root is not None:
+        root.set(status=response.status_code)
+        response.headers['X-Trace-Id'] = root.trace_id
+    return response
 
-context = zmq.Context()
-socket = context.socket(zmq.REQ)
-socket.connect("tcp://localhost:5001")
 
-_connection_pool_initialized = False
+@bp.teardown_app_request
+def FinishTrace(exception=None):
+    root = g.pop('trace_span', None)
+    if root is not None:
+        deactivate(root)
+        root.finish(exception)
 
-@app.before_request
-def initialize_connection_pool():
-    """Initialize the ZMQ connection pool when the first request is made"""
-    global _connection_pool_initialized
-    if not _connection_pool_initialized:
-        app.connection_pool = ZMQClientPool()
-        _connection_pool_initialized = True
 
+@bp.before_app_request
+def AdmitRequest():
+    """Reject with 503 before any work starts when too many requests are in flight"""
+    if request.endpoint in ADMISSION_EXEMPT:
+        return None
+    if not current_app.config['admission'].try_acquire():
+        return RetryAfter(http_503("Server is busy, please retry shortly."), 1)
+    g.admitted = True
+    return None
 
-@app.teardown_appcontext
-async def cleanup(exception=None):
-    """Cleanup resources when the application context is torn down"""
-    if hasattr(current_app, 'connection_pool'):
-        await current_app.connection_pool.close()
+
+@bp.teardown_app_request
+def ReleaseAdmission(exception=None):
+    if g.pop('admitted', False):
+        current_app.config['admission'].release()
 
 
-@app.login_manager.unauthorized_handler
 def unauthorized():
     return jsonify({"message": "You must be logged in to access this resource."}), 401
 # ------------------------------------------------------------------------------------------------------------- #
 # --------------------------------------------- Request Functions --------------------------------------------- #
 async def ServerRequest(command: str = None, params: dict = None) -> Tuple[Dict[str, Any], int]:
     try:
-        command_obj = {
-            'command': command,
-            'params': params if params is not None else {}
-        }
-        
-        logger.debug(f"Sending server request: {command}", extra={'command': command, 'params': params})
-        
-        async with current_app.connection_pool.get_connection() as socket:
-            await socket.send_json(command_obj)
-            backend_response = await socket.recv_json()
+        with span('server_request', 'api', command=command) as current:
+            command_obj = {
+                'command': command,
+                'params': params if params is not None else {},
+                'trace': inject()
+            }
+
+            logger.debug(f"Sending server request: {command}", extra={'command': command, 'params': params})
+
+            backend_response = await current_app.connection_pool.request(command_obj)
+            current.set(status=backend_response.get('status_code'))
         
         logger.debug(f"Received server response: {backend_response}", extra={'response': backend_response})
+        if backend_response.get('version'):
+            g.backend_version = backend_response['version']
         return jsonify(backend_response["data"]), backend_response.get("status_code", 200)
+    except PoolExhausted as e:
+        logger.warning(f"Shedding server request: {str(e)}", extra={'command': command})
+        return RetryAfter(http_503("Server is busy, please retry shortly."), e.retry_after)
     except Exception as e:
         logger.error(f"Server request failed: {str(e)}", extra={'error': str(e), 'command': command})
-        # If we get an event loop error, reinitialize the pool
-        if "bound to a different event loop" in str(e):
-            current_app.connection_pool._initialize_pool()
         return jsonify({"error": str(e)}), 500
 
 
@@ -186,12 +161,28 @@ async def DatabaseRequest(collection_name: str = None, data: dict = None, doc_id
             'document_data': data,
             'document_id': doc_id
         }
-        return await ServerRequest(command, params)
+        result = await ServerRequest(command, params)
+        # Changed or deleted users must not keep authenticating from a cached session principal
+        if collection_name == USERS and doc_id and command in ('update', 'delete') and result[1] < 400:
+            InvalidatePrincipal(doc_id)
+        return result
     except Exception as e:
         logger.error(f"Database request failed: {str(e)}", extra={'error': str(e)})
         return jsonify({"error": str(e)}), 500
 
 
+def _ValidateRequest(model_class):
+    """Validate the JSON body into request.validated_data; returns an error response on failure"""
+    try:
+        request.validated_data = model_class.model_validate(request.get_json()).to_dict()
+    except ValidationError as e:
+        message = model_class.error_message(e)
+        if model_class.is_malformed(e):
+            return http_400(f"Validation Error: {message}")
+        return http_422(f"Data Error: {message}")
+    return None
+
+
 def ValidateModel(model_class):
     def decorator(func):
         if inspect.iscoroutinefunction(func):
@@ -199,14 +190,9 @@ def ValidateModel(model_class):
             async def async_wrapper(*args, **kwargs):
                 if request.method == 'GET':
                     return await func(*args, **kwargs)
-                data = request.get_json()
-                try:
-                    model_instance = model_class(**data)
-                    request.validated_data = model_instance.to_dict()
-                except TypeError as e:
-                    return http_400(f"Validation Error: {str(e)}")
-                except ValueError as e:
-                    return http_422(f"Data Error: {str(e)}")
+                error = _ValidateRequest(model_class)
+                if error is not None:
+                    return error
                 return await func(*args, **kwargs)
             return async_wrapper
         else:
@@ -214,23 +200,136 @@ def ValidateModel(model_class):
             def sync_wrapper(*args, **kwargs):
                 if request.method == 'GET':
                     return func(*args, **kwargs)
-                data = request.get_json()
-                try:
-                    model_instance = model_class(**data)
-                    request.validated_data = model_instance.to_dict()
-                except TypeError as e:
-                    return http_400(f"Validation Error: {str(e)}")
-                except ValueError as e:
-                    return http_422(f"Data Error: {str(e)}")
+                error = _ValidateRequest(model_class)
+                if error is not None:
+                    return error
                 return func(*args, **kwargs)
             return sync_wrapper
     return decorator
 
 
+def RetryAfter(result: Tuple[Any, int], seconds: float) -> Tuple[Any, int]:
+    """Attach a Retry-After header (whole seconds) to an http_* response tuple"""
+    response, status = result
+    response.headers['Retry-After'] = str(max(1, math.ceil(seconds)))
+    return response, status
+
+
+def _RateLimitSubject(scope: str) -> Optional[str]:
+    if scope == 'ip':
+        return request.remote_addr or 'unknown'
+    if scope == 'user':
+        if current_user.is_authenticated:
+            return current_user.get_id()
+        data = request.get_json(silent=True) or {}
+        return data.get('username') or data.get('email')
+    if scope == 'route':
+        return 'all'
+    raise ValueError(f"Unknown rate limit scope: {scope}")
+
+
+def RateLimit(*scopes: str, rate: float, burst: int):
+    """
+    Decorator applying a token bucket per scope ('ip', 'user' or 'route') to an endpoint.
+    `rate` is requests per second, `burst` the bucket size. Returns 429 with Retry-After
+    when any bucket is empty.
+    """
+    def buckets():
+        for scope in scopes:
+            subject = _RateLimitSubject(scope)
+            if subject is not None:
+                yield scope, f"{request.endpoint}:{scope}:{subject}"
+
+    def too_many(scope: str, retry_after: float) -> Tuple[Any, int]:
+        logger.warning(f"Rate limit hit on {request.endpoint} ({scope})", extra={'scope': scope})
+        return RetryAfter(http_429("Too many requests, please slow down."), retry_after)
+
+    def check() -> Optional[Tuple[Any, int]]:
+        limiter = current_app.config['rate_limiter']
+        for scope, key in buckets():
+            allowed, retry_after = limiter.consume(key, rate, burst)
+            if not allowed:
+                return too_many(scope, retry_after)
+        return None
+
+    async def check_async() -> Optional[Tuple[Any, int]]:
+        # The shared SQLite buckets can wait on other workers' locks; keep that off the loop
+        limiter = current_app.config['rate_limiter']
+        for scope, key in buckets():
+            allowed, retry_after = await limiter.consume_async(key, rate, burst)
+            if not allowed:
+                return too_many(scope, retry_after)
+        return None
+
+    def decorator(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            limited = await check_async()
+            if limited:
+                return limited
+            return await func(*args, **kwargs)
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            limited = check()
+            if limited:
+                return limited
+            return func(*args, **kwargs)
+        if asyncio.iscoroutinefunction(func):
+            return async_wrapper
+        else:
+            return sync_wrapper
+    return decorator
+
+
+def ConditionalResponse(max_age: int = 0):
+    """
+    Decorator adding a strong ETag and Cache-Control to successful GET responses and
+    answering 304 Not Modified when the client's If-None-Match matches (including the
+    encoding-suffixed ETags sent with compressed responses). The ETag is derived from
+    the backend version tag (scoped to the path and the logged-in user) when the server
+    supplied one, otherwise from the response body. With max_age=0 clients must
+    revalidate on every use.
+    """
+    def finalize(rv):
+        response = make_response(rv)
+        version = g.pop('backend_version', None)
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.is_streamed:
+            return response
+        if version:
+            user_id = getattr(current_user, 'id', None) or ''
+            etag = hashlib.sha256(f"{request.path}|{user_id}|{version}".encode()).hexdigest()[:32]
+        else:
+            etag = hashlib.sha256(response.get_data()).hexdigest()[:32]
+        response.set_etag(etag)
+        response.cache_control.private = True
+        if max_age:
+            response.cache_control.max_age = max_age
+        else:
+            response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        if MatchesETag(request.if_none_match, etag):
+            not_modified = current_app.response_class(status=304)
+            for header in ('ETag', 'Cache-Control', 'Vary'):
+                not_modified.headers[header] = response.headers[header]
+            return not_modified
+        return response
+
+    def decorator(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return finalize(await func(*args, **kwargs))
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            return finalize(func(*args, **kwargs))
+        if asyncio.iscoroutinefunction(func):
+            return async_wrapper
+        else:
+            return sync_wrapper
+    return decorator
+
+
 def ValidatePassword(password: str) -> bool:
-    # Minimum 8 characters, at least one uppercase, one lowercase, one digit, one special character
-    pattern = r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&#^()[\]{}<>.,;:|~`_+=-]).{8,}$'
-    return bool(re.match(pattern, password))
+    return bool(PASSWORD_PATTERN.match(password))
 
 
 def RoleRequired(*roles: str):
@@ -285,37 +384,76 @@ def BlockAgents(func):
         return sync_wrapper
 
 
-async def SendValidationEmail(email: str, validation_code: str) -> Tuple[Dict[str, Any], int]:
+def SendValidationEmail(email: str, validation_code: str) -> Tuple[Dict[str, Any], int]:
+    """Queue the validation email; delivery happens in the outbox's background sender"""
     try:
-        msg = MIMEMultipart()
-        msg['From'] = os.getenv('EMAIL_SENDER')
-        msg['To'] = email
-        msg['Subject'] = "Apexea AI - Account Validation"
-        msg.attach(MIMEText(f"Please validate your account with the code: {validation_code}"))
-
-        with smtplib.SMTP(os.getenv('EMAIL_SERVER'), os.getenv('EMAIL_PORT')) as server:
-            server.starttls()
-            server.login(os.getenv('EMAIL_SENDER'), os.getenv('EMAIL_PASSWORD'))
-            server.send_message(msg)
-        return http_200("Validation email sent successfully.")
+        current_app.config['outbox'].enqueue(
+            email,
+            "Apexea AI - Account Validation",
+            f"Please validate your account with the code: {validation_code}"
+        )
+        return http_202("Validation email queued.")
     except Exception as e:
-        logger.error(f"Failed to send validation email: {str(e)}", extra={'error': str(e)})
-        return http_500(f"Failed to send validation email: {str(e)}")
+        logger.error(f"Failed to queue validation email: {str(e)}", extra={'error': str(e)})
+        return http_500(f"Failed to queue validation email: {str(e)}")
 # ------------------------------------------------------------------------------------------------------------- #
 # ---------------------------------------------- Route Functions ---------------------------------------------- #
-@app.route('/api/status/server', methods=['GET'])
+@bp.route('/api/status/server', methods=['GET'])
 @login_required
+@ConditionalResponse(max_age=5)
 async def ServerStatus() -> Tuple[Dict[str, Any], int]:
     return await ServerRequest('status')
 
 
-@app.route('/api/status/api', methods=['GET'])
+@bp.route('/api/status/api', methods=['GET'])
 @login_required
 async def ApiStatus() -> Tuple[Dict[str, Any], int]:
     return http_200('API is Online!')
 
 
-@app.route('/api/user/register', methods=['POST'])
+@bp.route('/metrics', methods=['GET'])
+async def Metrics():
+    """
+    Prometheus scrape target. Requires the METRICS_TOKEN bearer token; without a
+    configured token only direct (not proxied) loopback clients are answered.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        if not secrets.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return http_401("Invalid metrics token")
+    elif request.remote_addr not in LOOPBACK_ADDRESSES or 'X-Forwarded-For' in request.headers:
+        return http_403("Set METRICS_TOKEN to scrape metrics from other hosts")
+    try:
+        reply = await asyncio.wait_for(
+            current_app.connection_pool.request({'command': 'metrics', 'params': {}, 'trace': inject()}),
+            current_app.config['METRICS_SERVER_TIMEOUT']
+        )
+        server = reply.get('data') if reply.get('status_code') == 200 else None
+    except Exception as e:
+        logger.warning(f"Server metrics scrape failed: {str(e)}", extra={'error': str(e)})
+        server = None
+    return current_app.response_class(CollectApiMetrics(current_app, server), mimetype=METRICS_CONTENT_TYPE)
+
+
+def _FindRegistrationConflict(db, username: str, email: str) -> Optional[str]:
+    """'username' or 'email' if either is already taken, else None. Blocking."""
+    # First, use the query method (more database-agnostic)
+    if db.query(USERS, {'username': username}, limit=1):
+        return 'username'
+    if db.query(USERS, {'email': email}, limit=1):
+        return 'email'
+    # If the query method doesn't find anything but we still need to be sure,
+    # try getting all users and checking manually (fallback)
+    for _, user_data in db.get_all(USERS):
+        if user_data.get('username') == username:
+            return 'username'
+        if user_data.get('email') == email:
+            return 'email'
+    return None
+
+
+@bp.route('/api/user/register', methods=['POST'])
+@RateLimit('ip', rate=5 / 60, burst=5)
 @BlockAgents
 async def Register() -> Tuple[Dict[str, Any], int]:
     data = request.get_json()
@@ -331,32 +469,19 @@ async def Register() -> Tuple[Dict[str, Any], int]:
 
     # Check if user with same username or email already exists
     try:
-        # First, use the query method (more database-agnostic)
-        existing_users_by_username = current_app.db.query(USERS, {'username': username}, limit=1)
-        existing_users_by_email = current_app.db.query(USERS, {'email': email}, limit=1)
-        
-        if existing_users_by_username:
+        # Database calls block, so they run in a thread rather than on the event loop
+        conflict = await asyncio.to_thread(_FindRegistrationConflict, current_app.config['db'], username, email)
+        if conflict == 'username':
             return http_409(f"Username '{username}' is already taken. Please choose another one.")
-            
-        if existing_users_by_email:
+        if conflict == 'email':
             return http_409(f"Email '{email}' is already registered. Please use a different email.")
-            
-        # If the query method doesn't find anything but we still need to be sure,
-        # try getting all users and checking manually (fallback)
-        if not existing_users_by_username and not existing_users_by_email:
-            all_users = current_app.db.get_all(USERS)
-            for _, user_data in all_users:
-                if user_data.get('username') == username:
-                    return http_409(f"Username '{username}' is already taken. Please choose another one.")
-                if user_data.get('email') == email:
-                    return http_409(f"Email '{email}' is already registered. Please use a different email.")
     except Exception as e:
         logger.error(f"Error checking for existing users: {str(e)}", extra={'error': str(e)})
         return http_500(f"Registration failed: {str(e)}")
 
     # Proceed with user creation
     try:
-        hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        hashed_pw = await current_app.config['hasher'].hash(password)
         validation_code = secrets.token_urlsafe(16)
 
         user_data = {
@@ -381,18 +506,20 @@ async def Register() -> Tuple[Dict[str, Any], int]:
             
         logger.info(f"User registered: {username}")
         
-        try:
-            await SendValidationEmail(email, validation_code)
-            return http_201("User registered successfully. Please validate your account with the code sent to your email.")
-        except Exception as email_error:
-            logger.warning(f"User registered but email failed to send: {str(email_error)}")
+        _, email_status = SendValidationEmail(email, validation_code)
+        if email_status >= 400:
+            logger.warning(f"User registered but validation email could not be queued: {username}")
             return http_201("User registered successfully but validation email failed to send.")
+        return http_201("User registered successfully. Please validate your account with the code sent to your email.")
+    except HashQueueFull as e:
+        return http_503(str(e))
     except Exception as e:
         logger.error(f"User registration failed: {str(e)}", extra={'error': str(e)})
         return http_500(f"Registration failed: {str(e)}")
 
 
-@app.route('/api/user/validate', methods=['POST'])
+@bp.route('/api/user/validate', methods=['POST'])
+@RateLimit('ip', 'user', rate=10 / 60, burst=10)
 @BlockAgents
 async def ValidateUser() -> Tuple[Dict[str, Any], int]:
     data = request.get_json()
@@ -404,7 +531,7 @@ async def ValidateUser() -> Tuple[Dict[str, Any], int]:
 
     # First try the query method
     try:
-        users = current_app.db.query(USERS, {'email': email}, limit=1)
+        users = await asyncio.to_thread(current_app.config['db'].query, USERS, {'email': email}, limit=1)
         
         if not users:
             return http_404("User not found.")
@@ -436,6 +563,7 @@ async def ValidateUser() -> Tuple[Dict[str, Any], int]:
         if isinstance(result, tuple) and len(result) >= 2 and result[1] >= 400:
             return result
             
+        InvalidatePrincipal(user_id)
         logger.info(f"User validated: {user_id}", extra={'user_id': user_id})
         return http_200("User validated successfully.")
     except Exception as e:
@@ -443,7 +571,9 @@ async def ValidateUser() -> Tuple[Dict[str, Any], int]:
         return http_500(f"Validation failed: {str(e)}")
 
 
-@app.route('/api/user/login', methods=['POST'])
+@bp.route('/api/user/login', methods=['POST'])
+@RateLimit('ip', rate=10 / 60, burst=10)
+@RateLimit('user', rate=5 / 60, burst=5)
 @BlockAgents
 async def Login() -> Tuple[Dict[str, Any], int]:
     data = request.get_json()
@@ -453,7 +583,10 @@ async def Login() -> Tuple[Dict[str, Any], int]:
     if not username or not password:
         return http_401("Username and password required.")
 
-    user_obj = app.User.authenticate(username, password)
+    try:
+        user_obj = await current_app.config['User'].authenticate(username, password)
+    except HashQueueFull as e:
+        return http_503(str(e))
     if not user_obj:
         return http_401("Invalid credentials.")
 
@@ -461,25 +594,28 @@ async def Login() -> Tuple[Dict[str, Any], int]:
         return http_401("Account not validated. Please validate your account.")
 
     login_user(user_obj)
+    StorePrincipal(user_obj)
     logger.info(f"User logged in: {username}", extra={'user_id': user_obj.id})
     return http_200("Login successful")
 
 
-@app.route('/api/user/logout', methods=['POST'])
+@bp.route('/api/user/logout', methods=['POST'])
 @BlockAgents
 @login_required
 async def Logout() -> Tuple[Dict[str, Any], int]:
     try:
         logout_user()
+        session.pop(PRINCIPAL_KEY, None)
         return http_200("Successfully logged out")
     except Exception as e:
         logger.error(f"Logout failed: {str(e)}", extra={'error': str(e)})
         return http_500(f"Logout failed: {str(e)}")
 
 
-@app.route('/api/user/profile', methods=['GET'])
+@bp.route('/api/user/profile', methods=['GET'])
 @BlockAgents
 @login_required
+@ConditionalResponse()
 async def FetchProfile():
     try:
         current_user_id = current_user.get_id()
@@ -490,7 +626,7 @@ async def FetchProfile():
         return http_500(f"Fetching profile failed: {str(e)}")
 
 
-@app.route('/api/user/update', methods=['PUT'])
+@bp.route('/api/user/update', methods=['PUT'])
 @BlockAgents
 @login_required
 @ValidateModel(UserProfile)
@@ -500,25 +636,30 @@ async def UpdateProfile():
         data = request.validated_data
 
         if 'password' in data:
-            data['password'] = bcrypt.hashpw(data['password'].encode(), bcrypt.gensalt()).decode()
+            data['password'] = await current_app.config['hasher'].hash(data['password'])
         
         logger.info(f"Updating profile for user: {current_user_id}", extra={'user_id': current_user_id})
         return await DatabaseRequest(collection_name=USERS, data=data, doc_id=current_user_id)
+    except HashQueueFull as e:
+        return http_503(str(e))
     except Exception as e:
         logger.error(f"Update profile failed: {str(e)}", extra={'error': str(e)})
         return http_500(f"Update profile failed: {str(e)}")
 
 
-@app.route('/api/user/delete', methods=['DELETE'])
+@bp.route('/api/user/delete', methods=['DELETE'])
 @BlockAgents
 @login_required
 async def DeleteUser() -> Tuple[Dict[str, Any], int]:
     current_user_id = current_user.get_id()
     logger.info(f"Deleting user: {current_user_id}", extra={'user_id': current_user_id})
-    return await DatabaseRequest(collection_name=USERS, data=None, doc_id=current_user_id)
+    result = await DatabaseRequest(collection_name=USERS, data=None, doc_id=current_user_id)
+    if result[1] < 400:
+        logout_user()
+    return result
 
 
-@app.route('/api/user/delete_other', methods=['POST'])
+@bp.route('/api/user/delete_other', methods=['POST'])
 @BlockAgents
 @login_required
 @RoleRequired('Admin')
@@ -529,15 +670,17 @@ async def DeleteOtherUser() -> Tuple[Dict[str, Any], int]:
     return await DatabaseRequest(collection_name=USERS, data=None, doc_id=user_id)
 
 
-@app.route('/api/user/get_role', methods=['GET'])
+@bp.route('/api/user/get_role', methods=['GET'])
 @login_required
+@ConditionalResponse()
 async def GetRoles():
     return http_200(current_user.role)
 # ------------------------------------------------------------------------------------------------------------- #
 # --------------------------------------------- Agent Management ---------------------------------------------- #
-@app.route('/api/agents', methods=['POST', 'GET', 'DELETE'])
+@bp.route('/api/agents', methods=['POST', 'GET', 'DELETE'])
 @login_required
 @RoleRequired('Admin')
+@ConditionalResponse()
 async def AgentManagement():
     try:
         if request.method == 'POST':
@@ -553,13 +696,16 @@ async def AgentManagement():
             return await ServerRequest(command='get_agents')
 
         elif request.method == 'DELETE':
-            # JSON example
+            # JSON example; {"all": true} stops every agent concurrently
             """
             {
                 "agent_id": 1
             }
             """
-            agent_id = request.get_json().get('agent_id')
+            data = request.get_json()
+            if data.get('all'):
+                return await ServerRequest(command='stop_agents', params={'timeout': data.get('timeout', 5.0)})
+            agent_id = data.get('agent_id')
             if not agent_id:
                 return http_400("Missing agent_id parameter")
             
@@ -567,73 +713,369 @@ async def AgentManagement():
     except Exception as e:
         logger.error(f"Agent management failed: {str(e)}", extra={'error': str(e)})
         return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/api/agents/broadcast', methods=['POST'])
+@login_required
+@RoleRequired('Admin')
+async def AgentBroadcast():
+    """
+    Send one command to many agents at once and return each agent's reply or error.
+    {"command": "test", "agent_ids": [1, 2], "timeout": 5.0}; agent_ids defaults to
+    every live agent, timeout (seconds) applies to each agent separately.
+    """
+    data = request.get_json() or {}
+    if not data.get('command'):
+        return http_400("Missing command parameter")
+    params = {'command': data['command'], 'agent_ids': data.get('agent_ids'), 'timeout': data.get('timeout')}
+    return await ServerRequest(command='broadcast_agent_command', params=params)
+
+
+@bp.route('/api/agents/stream', methods=['GET'])
+@login_required
+@RoleRequired('Admin')
+async def AgentStatusStream():
+    """Server-Sent Events: a snapshot of every agent, then each status change as it happens"""
+    streams = current_app.config['stream_admission']
+    if not streams.try_acquire():
+        return RetryAfter(http_503("Too many open status streams, please retry shortly."), 5)
+    pool = current_app.connection_pool
+    stream_url = current_app.config['STATUS_STREAM_URL']
+    keepalive_ms = current_app.config['STATUS_STREAM_KEEPALIVE'] * 1000
+
+    async def events():
+        subscriber = pool.context.socket(zmq.SUB)
+        try:
+            subscriber.setsockopt(zmq.SUBSCRIBE, b'')
+            subscriber.connect(stream_url)
+            # Subscribed before the snapshot is taken, so no change can fall in between
+            try:
+                reply = await pool.request({'command': 'get_agents', 'params': {}, 'trace': inject()})
+            except PoolExhausted as e:
+                yield ServerSentEvent({'error': str(e), 'retry_after': e.retry_after}, event='error')
+                return
+            yield ServerSentEvent(reply.get('data', []), event='snapshot')
+            while True:
+                if not await subscriber.poll(keepalive_ms):
+                    yield ': keepalive\n\n'
+                    continue
+                _, payload = await subscriber.recv_multipart()
+                event = loads(payload)
+                yield ServerSentEvent(event, event='status', event_id=event.get('seq'))
+        finally:
+            subscriber.close(linger=0)
+
+    response = EventStreamResponse(events)
+    response.call_on_close(streams.release)
+    return response
+# ------------------------------------------------------------------------------------------------------------- #
+# ------------------------------------------------ Bulk Data -------------------------------------------------- #
+# Collections admins can move in and out as NDJSON
+BULK_COLLECTIONS = {USERS, COMPANY_DATA, CONSULTANTS, TENDERS}
+# Imported documents are validated against these schemas batch by batch before writing
+IMPORT_SCHEMAS = {USERS: UserRecord}
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def NDJSONLine(obj: Any) -> bytes:
+    return dumps(obj) + b'\n'
+
+
+def _ReplyError(reply: Dict[str, Any]) -> str:
+    data = reply.get('data')
+    if isinstance(data, dict) and data.get('error'):
+        return data['error']
+    return reply.get('error') or str(data)
+
+
+@bp.route('/api/admin/export/<collection>', methods=['GET'])
+@BlockAgents
+@login_required
+@RoleRequired('Admin')
+async def ExportCollection(collection):
+    """
+    Stream a collection as NDJSON, one {"id", "data"} object per line, read from the
+    backend a page at a time. The last line is an {"_export": {...}} summary; an export
+    without one with "complete": true was cut short.
+    """
+    if collection not in BULK_COLLECTIONS:
+        return http_404(f"Unknown collection: {collection}")
+    pool = current_app.connection_pool
+    page_size = current_app.config['EXPORT_PAGE_SIZE']
+    trace = inject()
+    logger.info(f"Exporting {collection}", extra={'collection': collection})
+
+    async def lines():
+        exported = 0
+        after = None
+        while True:
+            try:
+                reply = await pool.request({
+                    'command': 'read_page',
+                    'params': {'collection_name': collection, 'after': after, 'limit': page_size},
+                    'trace': trace
+                })
+            except PoolExhausted as e:
+                reply = {'status_code': 503, 'error': str(e)}
+            if reply.get('status_code') != 200:
+                logger.error(f"Export of {collection} failed after {exported} documents", extra={'collection': collection})
+                yield NDJSONLine({'_export': {'collection': collection, 'documents': exported, 'complete': False,
+                                              'error': _ReplyError(reply)}})
+                return
+            page = reply['data']
+            if page['documents']:
+                yield b''.join(NDJSONLine({'id': doc_id, 'data': data}) for doc_id, data in page['documents'])
+            exported += len(page['documents'])
+            after = page['next']
+            if not after:
+                break
+        logger.info(f"Exported {exported} documents from {collection}", extra={'collection': collection})
+        yield NDJSONLine({'_export': {'collection': collection, 'documents': exported, 'complete': True}})
+
+    response = current_app.response_class(AsyncStream(lines), mimetype=NDJSON_MIMETYPE)
+    response.headers['Content-Disposition'] = f'attachment; filename="{collection}.ndjson"'
+    return response
+
+
+async def _ImportBatch(pool: ZMQClientPool, collection: str, batch: list, merge: bool, trace) -> Tuple[int, Optional[str]]:
+    try:
+        reply = await pool.request({
+            'command': 'batch_write',
+            'params': {'collection_name': collection, 'documents': batch, 'merge': merge},
+            'trace': trace
+        })
+    except PoolExhausted as e:
+        return 0, str(e)
+    if reply.get('status_code') != 200:
+        return 0, _ReplyError(reply)
+    return reply['data']['written'], None
+
+
+@bp.route('/api/admin/import/<collection>', methods=['POST'])
+@BlockAgents
+@login_required
+@RoleRequired('Admin')
+@StreamBody
+async def ImportCollection(collection):
+    """
+    Ingest an NDJSON upload (the export format) into batched writes while it is read,
+    streaming NDJSON progress back as it goes (under ASGI, before the upload has finished): one line per batch, one per rejected input line,
+    and a final {"done": true, ...} summary. Documents of collections in IMPORT_SCHEMAS
+    are validated first and rejected per line. Pass ?merge=true to merge into existing
+    documents instead of replacing them.
+    """
+    if collection not in BULK_COLLECTIONS:
+        return http_404(f"Unknown collection: {collection}")
+    schema = IMPORT_SCHEMAS.get(collection)
+    pool = current_app.connection_pool
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    max_line = current_app.config['IMPORT_MAX_LINE_BYTES']
+    merge = request.args.get('merge', 'false').lower() == 'true'
+    # Imported users may carry new roles or credentials; their sessions must reload them
+    revalidate = current_app.config['PRINCIPAL_REVALIDATE_SECONDS'] if collection == USERS else None
+    body = RequestBody()
+    stream = request.stream if body is None else None
+    trace = inject()
+    logger.info(f"Importing into {collection}", extra={'collection': collection})
+
+    async def readline(limit: int) -> bytes:
+        if body is not None:
+            return await body.readline(limit)
+        # Under WSGI the generator runs on this request's own thread and loop
+        return stream.readline(limit)
+
+    async def progress():
+        written = failed = line_number = 0
+        batch, batch_lines = [], []
+        while True:
+            line = await readline(max_line + 1)
+            if line:
+                line_number += 1
+                if len(line) > max_line:
+                    # Discard the rest of the oversized line without holding it in memory
+                    while line and not line.endswith(b'\n'):
+                        line = await readline(max_line + 1)
+                    failed += 1
+                    yield NDJSONLine({'line': line_number, 'error': f"Line exceeds {max_line} bytes"})
+                    continue
+                text = line.strip()
+                if not text:
+                    continue
+                try:
+                    record = loads(text)
+                except ValueError as e:
+                    failed += 1
+                    yield NDJSONLine({'line': line_number, 'error': f"Invalid JSON: {str(e)}"})
+                    continue
+                if isinstance(record, dict) and '_export' in record:
+                    continue
+                if not isinstance(record, dict) or not isinstance(record.get('data'), dict):
+                    failed += 1
+                    yield NDJSONLine({'line': line_number, 'error': "Expected an object with a 'data' object"})
+                    continue
+                batch.append({'id': record.get('id'), 'data': record['data']})
+                batch_lines.append(line_number)
+                if len(batch) < batch_size:
+                    continue
+
+            # A full batch, or the end of the upload
+            if schema is not None and batch:
+                _, rejected = schema.validate_many(document['data'] for document in batch)
+                for index, message in rejected:
+                    failed += 1
+                    yield NDJSONLine({'line': batch_lines[index], 'error': f"Invalid document: {message}"})
+                skip = {index for index, _ in rejected}
+                batch = [document for index, document in enumerate(batch) if index not in skip]
+            if batch:
+                count, error = await _ImportBatch(pool, collection, batch, merge, trace)
+                written += count
+                if error:
+                    failed += len(batch)
+                    yield NDJSONLine({'lines': line_number, 'error': error})
+                else:
+                    if revalidate is not None:
+                        RevokePrincipals([document['id'] for document in batch if document['id']], revalidate)
+                    yield NDJSONLine({'lines': line_number, 'written': written})
+            batch, batch_lines = [], []
+            if not line:
+                break
+        logger.info(f"Imported {written} documents into {collection} ({failed} failed)", extra={'collection': collection})
+        yield NDJSONLine({'done': True, 'lines': line_number, 'written': written, 'failed': failed})
+
+    return current_app.response_class(AsyncStream(progress), mimetype=NDJSON_MIMETYPE)
 # ------------------------------------------------------------------------------------------------------------- #
 # -------------------------------------------- Update Application --------------------------------------------- #
 def GetLatestRelease():
-    url = None
-    response = requests.get(url)
+    url = current_app.config.get('UPDATE_RELEASE_URL')
+    if not url:
+        return None, None
+    response = requests.get(url, timeout=10)
     if response.status_code == 200:
         data = response.json()
         return data['tag_name'], data["assets"]
     return None, None
 
 
-@app.route('/api/update_app', methods=['GET'])
+@bp.route('/api/update_app', methods=['GET'])
 def GetUpdate():
-    # Create update directory in instance folder
-    update_dir = os.path.join(app.instance_path, 'updates')
-    os.makedirs(update_dir, exist_ok=True)
-    
-    # Version file path in update directory
-    version_path = os.path.join(update_dir, 'version.txt')
-    
-    # Create version file if it doesn't exist
-    if not os.path.exists(version_path):
-        with open(version_path, 'w') as file:
-            file.write('0.0.0')  # Initial version
-    
-    with open(version_path, 'r') as file:
-        current_version = file.read().strip()
-    
-    latest_version, assets = GetLatestRelease()
-    
-    if latest_version and latest_version != current_version and len(assets) >= 1:
-        # Find the main.py file in assets
-        main_asset = next((asset for asset in assets if asset['name'] == 'main.py'), None)
-        
-        if not main_asset:
-            return http_404("main.py not found in release assets")
-        
+    """Start downloading the latest release in the background and return a job handle"""
+    updater = current_app.config['updater']
+    job = updater.active()
+    if job is not None:
+        return http_202({'job': job.to_dict(), 'status_url': f"/api/update_app/{job.job_id}"})
+
+    try:
+        latest_version, assets = GetLatestRelease()
+    except requests.RequestException as e:
+        logger.error(f"Failed to check for updates: {str(e)}", extra={'error': str(e)})
+        return http_503(f"Failed to check for updates: {str(e)}")
+
+    if latest_version and latest_version != updater.current_version() and assets:
+        asset_name = current_app.config['UPDATE_ASSET']
         try:
-            # Download main.py
-            download_url = main_asset['browser_download_url']
-            file_path = os.path.join(update_dir, 'main.py')
-            
-            # Stream download to handle large files
-            with requests.get(download_url, stream=True) as response:
-                response.raise_for_status()
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:  # Filter out keep-alive chunks
-                            f.write(chunk)
-            
-            # Update version after successful download
-            with open(version_path, 'w') as file:
-                file.write(latest_version)
-            
-            return http_200({
-                "status": "success",
-                "version": latest_version,
-                "downloaded_file": "main.py",
-                "update_path": update_dir
-            })
-        except Exception as e:
-            logger.error(f"Failed to download main.py: {str(e)}", extra={'error': str(e)})
-            return http_500(f"Failed to download main.py: {str(e)}")
-            
+            asset, sha256 = ReleaseAsset(assets, asset_name)
+        except requests.RequestException as e:
+            return http_503(f"Failed to fetch the checksum for {asset_name}: {str(e)}")
+        if not asset:
+            return http_404(f"{asset_name} not found in release assets")
+
+        job = updater.start(latest_version, asset_name, asset['browser_download_url'], sha256)
+        logger.info(f"Started update {job.job_id} to {latest_version}", extra={'version': latest_version})
+        return http_202({'job': job.to_dict(), 'status_url': f"/api/update_app/{job.job_id}"})
+
     return http_404("Update not found.")
+
+
+@bp.route('/api/update_app/<job_id>', methods=['GET'])
+def GetUpdateStatus(job_id):
+    job = current_app.config['updater'].get(job_id)
+    if job is None:
+        return http_404(f"Update job {job_id} not found")
+    return http_200(job.to_dict())
 # ------------------------------------------------------------------------------------------------------------- #
 # -------------------------------------------- App Config & Startup -------------------------------- #
+def CreateApiApp(config=None, warm: bool = True) -> Flask:
+    """
+    Build the API app: configuration and components (CreateApp), middleware, routes
+    and the ZMQ client pool. Nothing here runs at import time.
+    """
+    app = CreateApp(config)
+    CORS(app, resources={
+        r"/*": {
+            "origins": ["http://localhost:3000"],
+            "methods": ["GET", "POST", "PUT", "DELETE"],
+            "allow_headers": ["Content-Type", "Authorization"],
+            "supports_credentials": True
+        }
+    })
+    Compress(app)
+    Instrument(app)
+    app.login_manager.unauthorized_handler(unauthorized)
+    app.register_blueprint(bp)
+
+    # One pool for the lifetime of the app; it keeps a sub-pool per event loop
+    # and closes itself at interpreter exit
+    app.connection_pool = ZMQClientPool(
+        min_size=app.config['ZMQ_POOL_MIN_SIZE'],
+        max_size=app.config['ZMQ_POOL_MAX_SIZE'],
+        server_url=app.config['ZMQ_SERVER_URL'],
+        request_timeout=app.config['ZMQ_REQUEST_TIMEOUT'],
+        acquire_timeout=app.config['ZMQ_POOL_ACQUIRE_TIMEOUT'],
+        max_waiters=app.config['ZMQ_POOL_MAX_WAITERS'],
+        retry_after=app.config['ZMQ_POOL_RETRY_AFTER']
+    )
+    if warm:
+        WarmDatabase(app)
+    return app
+
+
+def WarmDatabase(app: Flask):
+    """Open the database channel now rather than on the first request"""
+    start = time.perf_counter()
+    try:
+        app.config['db'].read_page(USERS, limit=1)
+        logger.info(f"Database warmed in {(time.perf_counter() - start) * 1000:.0f}ms")
+    except Exception as e:
+        logger.warning(f"Database warm-up failed: {str(e)}", extra={'error': str(e)})
+
+
+_app = None
+_asgi_app = None
+_app_lock = threading.Lock()
+
+
+def GetApiApp() -> Flask:
+    """The process-wide API app, created on first use"""
+    global _app
+    with _app_lock:
+        if _app is None:
+            _app = CreateApiApp()
+        return _app
+
+
+def GetAsgiApp() -> FlaskASGI:
+    """
+    Native ASGI entry point: all requests share the server's event loop and ZMQ
+    sub-pool, which is opened during lifespan startup.
+    """
+    global _asgi_app
+    app = GetApiApp()
+    with _app_lock:
+        if _asgi_app is None:
+            _asgi_app = FlaskASGI(app, on_startup=[app.connection_pool.warm], before_dispatch=[PreloadUser])
+        return _asgi_app
+
+
+def __getattr__(name: str):
+    # Keeps "Backend.api:app" and "Backend.api:asgi_app" working for servers without
+    # building the app as an import side effect
+    if name == 'app':
+        return GetApiApp()
+    if name == 'asgi_app':
+        return GetAsgiApp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == '__main__':
     import hypercorn.asyncio
     import hypercorn.config
@@ -642,4 +1084,6 @@ if __name__ == '__main__':
     config.bind = ["0.0.0.0:5000"]
     config.use_reloader = True
 
-    asyncio.run(hypercorn.asyncio.serve(app, config))
\ No newline at end of file
+    # API_SERVER_MODE=wsgi serves the plain Flask app (async views run per-request event loops)
+    serve_app = GetApiApp() if os.getenv('API_SERVER_MODE', 'asgi').lower() == 'wsgi' else GetAsgiApp()
+    asyncio.run(hypercorn.asyncio.serve(serve_app, config))
\ No newline at end of file
@@ -22,6 +22,13 @@ from flask import session
 import time
 from datetime import timedelta
 from Backend.database import Database
+from Backend.hashing import PasswordHasher
+from Backend.mailer import EmailOutbox
+from Backend.ratelimit import TokenBucketLimiter, AdmissionController
+from Backend.jsonprovider import FastJSONProvider
+from Backend.updater import UpdateManager
+import asyncio
+import threading
 from flask import current_app
 
 """
@@ -43,8 +50,82 @@ Example config.yaml:
 Note: SECRET_KEY must NOT be set in config.yaml. It will always be randomly generated at runtime.
 """
 
+# Signed-session snapshot of the logged-in user, so most requests need no user lookup
+PRINCIPAL_KEY = '_principal'
+_principal_revocations: dict[str, float] = {}
+_principal_lock = threading.Lock()
+
+
+def StorePrincipal(user) -> None:
+    """Cache the user's identity and role in the session"""
+    session[PRINCIPAL_KEY] = {
+        'id': user.get_id(),
+        'username': user.username,
+        'email': user.email,
+        'validated': user.validated,
+        'role': user.role,
+        'loaded_at': time.time()
+    }
+
+
+def InvalidatePrincipal(user_id) -> None:
+    """
+    Force the next request of every session belonging to `user_id` to reload the user.
+    Revocations are tracked per worker process; other workers pick the change up
+    within PRINCIPAL_REVALIDATE_SECONDS.
+    """
+    user_id = str(user_id)
+    RevokePrincipals([user_id], current_app.config['PRINCIPAL_REVALIDATE_SECONDS'])
+    snapshot = session.get(PRINCIPAL_KEY)
+    if snapshot and snapshot.get('id') == user_id:
+        session.pop(PRINCIPAL_KEY, None)
+
+
+def RevokePrincipals(user_ids, max_age: float) -> None:
+    """
+    Mark the cached principals of `user_ids` stale in this worker. Needs no request
+    context, so streamed responses can call it after the view has returned.
+    """
+    now = time.time()
+    with _principal_lock:
+        for user_id in user_ids:
+            _principal_revocations[str(user_id)] = now
+        for stale in [uid for uid, revoked in _principal_revocations.items() if now - revoked > max_age]:
+            del _principal_revocations[stale]
+
+
+async def PreloadUser() -> None:
+    """
+    Reload a stale or missing principal in a worker thread, so that current_user and
+    login_required find a fresh snapshot and never query the database on the event
+    loop. FlaskASGI awaits this before each view.
+    """
+    user_id = session.get('_user_id')
+    if user_id is None or _PrincipalIsFresh(session.get(PRINCIPAL_KEY), str(user_id)):
+        return None
+    user = await asyncio.to_thread(current_app.config['User'].get, user_id)
+    if user:
+        StorePrincipal(user)
+    else:
+        # The user is gone: end the login, as load_user would
+        session.pop('_user_id', None)
+        session.pop(PRINCIPAL_KEY, None)
+    return None
+
+
+def _PrincipalIsFresh(snapshot: dict, user_id: str) -> bool:
+    if not snapshot or snapshot.get('id') != user_id:
+        return False
+    loaded_at = snapshot.get('loaded_at', 0)
+    if time.time() - loaded_at >= current_app.config['PRINCIPAL_REVALIDATE_SECONDS']:
+        return False
+    with _principal_lock:
+        return loaded_at > _principal_revocations.get(user_id, 0)
+
+
 def CreateApp(config=None):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
     if config:
         app.config.from_object(config)
@@ -70,15 +151,72 @@ def CreateApp(config=None):
     app.config.setdefault("SESSION_COOKIE_HTTPONLY", True)
     app.config.setdefault("SESSION_COOKIE_SECURE", True)
     app.config.setdefault("SESSION_COOKIE_SAMESITE", "Strict")
+    app.config.setdefault("ZMQ_SERVER_URL", "tcp://localhost:5001")
+    app.config.setdefault("ZMQ_POOL_MIN_SIZE", 2)
+    app.config.setdefault("ZMQ_POOL_MAX_SIZE", 10)
+    app.config.setdefault("ZMQ_REQUEST_TIMEOUT", 30.0)  # seconds
+    app.config.setdefault("ZMQ_POOL_ACQUIRE_TIMEOUT", 5.0)  # seconds to wait for a free socket; None = no limit
+    app.config.setdefault("ZMQ_POOL_MAX_WAITERS", 100)  # per event loop; None = no limit
+    app.config.setdefault("ZMQ_POOL_RETRY_AFTER", 1)  # seconds, sent with the 503 when the pool sheds
+    app.config.setdefault("HASH_WORKERS", None)  # None = min(4, CPU count)
+    app.config.setdefault("HASH_QUEUE_LIMIT", 64)
+    app.config.setdefault("RATE_LIMIT_DB", os.path.join(app.instance_path, 'ratelimit.sqlite3'))  # None = per-process
+    app.config.setdefault("MAX_CONCURRENT_REQUESTS", 256)  # per worker process; the host allows this x workers
+    app.config.setdefault("PRINCIPAL_REVALIDATE_SECONDS", 300)
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)  # bytes
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.config.setdefault("METRICS_TOKEN", os.getenv('METRICS_TOKEN'))  # None = /metrics only for direct local clients
+    app.config.setdefault("METRICS_SERVER_TIMEOUT", 2.0)  # seconds
+    app.config.setdefault("STATUS_STREAM_URL", "tcp://localhost:5601")
+    app.config.setdefault("STATUS_STREAM_KEEPALIVE", 15.0)  # seconds between SSE keep-alive comments
+    app.config.setdefault("MAX_STATUS_STREAMS", 64)
+    app.config.setdefault("EXPORT_PAGE_SIZE", 500)  # documents per backend read
+    app.config.setdefault("IMPORT_BATCH_SIZE", 250)  # documents per backend write (Firestore max 500)
+    app.config.setdefault("IMPORT_MAX_LINE_BYTES", 1024 * 1024)
+    app.config.setdefault("ASGI_BODY_SPOOL_SIZE", 1024 * 1024)  # larger request bodies spill to disk
+    app.config.setdefault("UPDATE_RELEASE_URL", os.getenv('UPDATE_RELEASE_URL'))  # GitHub "latest release" API URL
+    app.config.setdefault("UPDATE_ASSET", "main.py")
+    app.config.setdefault("UPDATE_SEGMENTS", 4)
+    app.config.setdefault("UPDATE_PARALLEL_THRESHOLD", 8 * 1024 * 1024)  # bytes
 
     # Initialize database
     cred_path = f'{os.path.dirname(os.path.dirname(__file__))}/firebase.json'
     app.config['db'] = Database(db_type='firestore', config=cred_path)
 
+    # bcrypt runs in its own bounded process pool so it never blocks request threads
+    app.config['hasher'] = PasswordHasher(
+        max_workers=app.config['HASH_WORKERS'],
+        max_queue=app.config['HASH_QUEUE_LIMIT']
+    )
+
+    # Outgoing mail is queued in SQLite and delivered by a background sender
+    app.config['outbox'] = EmailOutbox(
+        path=os.path.join(app.instance_path, 'outbox.sqlite3'),
+        host=os.getenv('EMAIL_SERVER'),
+        port=int(os.getenv('EMAIL_PORT') or 587),
+        sender=os.getenv('EMAIL_SENDER'),
+        password=os.getenv('EMAIL_PASSWORD'),
+        use_tls=os.getenv('EMAIL_USE_TLS', 'true').lower() != 'false'
+    )
+    app.config['outbox'].start()
+
+    # Token buckets shared across workers, plus a per-worker in-flight request cap
+    app.config['rate_limiter'] = TokenBucketLimiter(app.config['RATE_LIMIT_DB'])
+    app.config['admission'] = AdmissionController(app.config['MAX_CONCURRENT_REQUESTS'])
+    # Event streams stay open, so they are capped separately from regular requests
+    app.config['stream_admission'] = AdmissionController(app.config['MAX_STATUS_STREAMS'])
+
+    # Release downloads run in the background and resume after interruptions
+    app.config['updater'] = UpdateManager(
+        update_dir=os.path.join(app.instance_path, 'updates'),
+        segments=app.config['UPDATE_SEGMENTS'],
+        parallel_threshold=app.config['UPDATE_PARALLEL_THRESHOLD']
+    )
+
     # --- Flask-Login Setup ---
     login_manager = LoginManager()
     login_manager.init_app(app)
-    login_manager.login_view = 'Login'  # type: ignore
+    login_manager.login_view = 'api.Login'  # type: ignore
 
     USERS = 'Users'
 
@@ -100,6 +238,16 @@ def CreateApp(config=None):
         def get_id(self) -> str:
             return str(self.id)
 
+        @classmethod
+        def from_principal(cls, snapshot: dict) -> "User":
+            return cls(
+                user_id=snapshot['id'],
+                username=snapshot.get('username'),
+                email=snapshot.get('email'),
+                validated=snapshot.get('validated', False),
+                role=snapshot.get('role', 'User')
+            )
+
         @classmethod
         def get(cls, user_id: str) -> Optional["User"]:           
             data = current_app.config['db'].get_by_id(USERS, user_id)
@@ -114,11 +262,13 @@ def CreateApp(config=None):
             return None
 
         @classmethod
-        def authenticate(cls, username: str, password: str) -> Optional["User"]:
-            result = current_app.config['db'].authenticate_user(USERS, username, password)
+        async def authenticate(cls, username: str, password: str) -> Optional["User"]:
+            result = await asyncio.to_thread(current_app.config['db'].find_user, USERS, username)
             
             if result:
                 user_id, user_data = result
+                if not await current_app.config['hasher'].verify(password, user_data.get('password', '')):
+                    return None
                 return cls(
                     user_id=user_id,
                     username=user_data.get('username'),
@@ -130,7 +280,15 @@ def CreateApp(config=None):
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.get(user_id)
+        snapshot = session.get(PRINCIPAL_KEY)
+        if _PrincipalIsFresh(snapshot, str(user_id)):
+            return User.from_principal(snapshot)
+        user = User.get(user_id)
+        if user:
+            StorePrincipal(user)
+        else:
+            session.pop(PRINCIPAL_KEY, None)
+        return user
 
     # Attach User class to app for import elsewhere
     app.config['User'] = User
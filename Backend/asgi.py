@@ -0,0 +1,290 @@
+import asyncio
+import contextvars
+import inspect
+import io
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from asgiref.wsgi import WsgiToAsgiInstance
+from flask import Flask, Response, request
+from flask.globals import request_ctx
+
+"""
+Native ASGI entry point for the Flask API.
+
+Flask runs every `async def` view through asgiref's async_to_sync, which starts a
+fresh event loop in a worker thread per request. FlaskASGI instead pushes the Flask
+request context inside the ASGI server's own event loop and awaits coroutine views
+directly, so every request shares one loop (and therefore one ZMQ sub-pool).
+Synchronous views are still run in a thread so they cannot block the loop.
+
+The same routes, error handlers, before/after request hooks and decorators
+(ValidateModel, RoleRequired, BlockAgents, login_required) are used unchanged.
+Request hooks must be synchronous functions and must not block. Work that would
+block, such as loading the logged-in user, goes in `before_dispatch`: coroutines
+awaited after the before_request hooks, which can run it in a thread.
+
+Request bodies are read into a spooled file before the view runs, except for views
+marked with @StreamBody: those get the body as it arrives through RequestBody(),
+and can start responding (e.g. with progress lines) before the upload finishes.
+
+Usage:
+  hypercorn "Backend.api:asgi_app"
+"""
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_in_asgi = contextvars.ContextVar('in_asgi', default=False)
+_DONE = object()
+BODY_ENVIRON_KEY = 'apexea.asgi_body'
+
+
+def StreamBody(func: Callable) -> Callable:
+    """Mark a view as reading its request body incrementally through RequestBody()"""
+    func.stream_body = True
+    return func
+
+
+def RequestBody() -> Optional["_RequestBody"]:
+    """The current request's incremental body under FlaskASGI (for @StreamBody views), else None"""
+    return request.environ.get(BODY_ENVIRON_KEY)
+
+
+class _RequestBody:
+    """
+    Request body read from ASGI receive() on demand. It owns receive(), so the
+    response's disconnect watcher goes through wait_disconnect() rather than taking
+    body messages from under the reader.
+    """
+
+    def __init__(self, receive: Receive):
+        self._receive = receive
+        self._buffer = bytearray()
+        self._more = True
+        self._finished = asyncio.Event()  # Body complete, or the client went away
+        self.disconnected = False
+
+    async def _fill(self) -> bool:
+        if not self._more:
+            return False
+        message = await self._receive()
+        if message['type'] == 'http.disconnect':
+            self.disconnected = True
+            self._more = False
+        else:
+            self._buffer += message.get('body', b'')
+            self._more = message.get('more_body', False)
+        if not self._more:
+            self._finished.set()
+        return True
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def read(self, size: int = -1) -> bytes:
+        """Up to `size` bytes (everything left when negative); b'' at the end"""
+        while (size < 0 or len(self._buffer) < size) and await self._fill():
+            pass
+        return self._take(len(self._buffer) if size < 0 else size)
+
+    async def readline(self, limit: int = -1) -> bytes:
+        """One line including its newline, cut at `limit` bytes; b'' at the end"""
+        start = 0
+        while True:
+            index = self._buffer.find(b'\n', start)
+            if index >= 0 and (limit < 0 or index < limit):
+                return self._take(index + 1)
+            if 0 <= limit <= len(self._buffer):
+                return self._take(limit)
+            start = len(self._buffer)
+            if not await self._fill():
+                return self._take(len(self._buffer))
+
+    async def spool(self, max_size: int) -> tempfile.SpooledTemporaryFile:
+        """Read the whole body; bodies beyond `max_size` go to a temporary file"""
+        body = tempfile.SpooledTemporaryFile(max_size=max_size)
+        while True:
+            if self._buffer:
+                body.write(self._take(len(self._buffer)))
+            if not await self._fill():
+                break
+        body.seek(0)
+        return body
+
+    async def wait_disconnect(self):
+        await self._finished.wait()
+        if self.disconnected:
+            return
+        while (await self._receive())['type'] != 'http.disconnect':
+            pass
+
+
+class FlaskASGI:
+    def __init__(self, app: Flask, on_startup: Optional[Iterable[Callable[[], Awaitable[Any]]]] = None,
+                 before_dispatch: Optional[Iterable[Callable[[], Awaitable[Any]]]] = None):
+        self.app = app
+        # Awaited on the server's loop during lifespan startup, e.g. to open connections
+        self.on_startup = list(on_startup or [])
+        # Awaited in the request context before each view; a non-None result is the response
+        self.before_dispatch = list(before_dispatch or [])
+        flask_ensure_sync = app.ensure_sync
+
+        def ensure_sync(func):
+            # Inside the ASGI loop coroutines are awaited by the caller instead of
+            # being wrapped in a throwaway event loop
+            if _in_asgi.get() and inspect.iscoroutinefunction(func):
+                return func
+            return flask_ensure_sync(func)
+
+        app.ensure_sync = ensure_sync
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive: Receive, send: Send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                for hook in self.on_startup:
+                    await hook()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _streams_body(self) -> bool:
+        rule = request_ctx.request.url_rule
+        view = self.app.view_functions.get(rule.endpoint) if rule is not None else None
+        return bool(getattr(view, 'stream_body', False))
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send):
+        body = _RequestBody(receive)
+        adapter = WsgiToAsgiInstance(None)
+        adapter.scope = scope  # Some asgiref releases read headers from self.scope
+        # The input stream is filled in once the route is known (nothing reads it before)
+        environ = adapter.build_environ(scope, io.BytesIO())
+        _in_asgi.set(True)
+        ctx = self.app.request_context(environ)
+        error = None
+        spooled = None
+        try:
+            try:
+                ctx.push()
+                if self._streams_body():
+                    environ[BODY_ENVIRON_KEY] = body
+                else:
+                    spooled = await body.spool(self.app.config.get('ASGI_BODY_SPOOL_SIZE', 1024 * 1024))
+                    environ['wsgi.input'] = spooled
+                response = await self._full_dispatch_request()
+            except Exception as e:
+                error = e
+                response = self.app.handle_exception(e)
+            await self._send_response(scope, response, send, body.wait_disconnect)
+        finally:
+            if error is not None and self.app.should_ignore_error(error):
+                error = None
+            ctx.pop(error)
+            if spooled is not None:
+                spooled.close()
+
+    async def _full_dispatch_request(self) -> Response:
+        """Mirror of Flask.full_dispatch_request that awaits async views on this loop"""
+        try:
+            rv = self.app.preprocess_request()
+            for hook in self.before_dispatch:
+                if rv is not None:
+                    break
+                rv = await hook()
+            if rv is None:
+                rv = await self._dispatch_request()
+        except Exception as e:
+            rv = self.app.handle_user_exception(e)
+        return self.app.finalize_request(rv)
+
+    async def _dispatch_request(self) -> Any:
+        req = request_ctx.request
+        if req.routing_exception is not None:
+            self.app.raise_routing_exception(req)
+        rule = req.url_rule
+        if getattr(rule, 'provide_automatic_options', False) and req.method == 'OPTIONS':
+            return self.app.make_default_options_response()
+
+        view = self.app.view_functions[rule.endpoint]
+        if inspect.iscoroutinefunction(inspect.unwrap(view)):
+            rv = view(**req.view_args)
+            if inspect.isawaitable(rv):
+                rv = await rv
+            return rv
+        return await asyncio.to_thread(self._call_sync, view, req.view_args)
+
+    @staticmethod
+    def _call_sync(view: Callable, view_args: Dict[str, Any]) -> Any:
+        _in_asgi.set(False)
+        return view(**view_args)
+
+    async def _send_async_body(self, body: Any, send: Send, wait_disconnect: Callable[[], Awaitable[None]]):
+        """Relay an async-iterable body until it ends or the client disconnects"""
+        iterator = body.__aiter__()
+
+        async def relay():
+            async for chunk in iterator:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        streaming = asyncio.ensure_future(relay())
+        # Long-lived streams (e.g. SSE) may sit idle, so a closed connection is only
+        # noticed through http.disconnect
+        watcher = asyncio.ensure_future(wait_disconnect())
+        try:
+            await asyncio.wait({streaming, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watcher.cancel()
+            if not streaming.done():
+                streaming.cancel()
+                try:
+                    await streaming
+                except asyncio.CancelledError:
+                    pass
+            if hasattr(iterator, 'aclose'):
+                await iterator.aclose()
+        if not streaming.cancelled():
+            streaming.result()
+
+    async def _send_response(self, scope: Scope, response: Response, send: Send,
+                             wait_disconnect: Callable[[], Awaitable[None]]):
+        headers = [
+            (key.lower().encode('latin-1'), value.encode('latin-1'))
+            for key, value in response.headers.items()
+        ]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        try:
+            if scope.get('method') == 'HEAD':
+                pass
+            elif hasattr(response.response, '__aiter__'):
+                await self._send_async_body(response.response, send, wait_disconnect)
+            elif response.is_streamed:
+                # Streaming generators may block, so pull each chunk in a thread
+                iterator = iter(response.iter_encoded())
+                while True:
+                    chunk = await asyncio.to_thread(next, iterator, _DONE)
+                    if chunk is _DONE:
+                        break
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            else:
+                await send({'type': 'http.response.body', 'body': response.get_data(), 'more_body': False})
+                return
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            response.close()
@@ -0,0 +1,192 @@
+import zlib
+from typing import Any, AsyncIterator, Iterator, Optional, Tuple
+
+from flask import Flask, Response, request
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+"""
+Negotiated response compression for the API.
+
+Compress(app) registers an after_request hook that compresses responses larger than
+COMPRESS_MIN_SIZE bytes with the best encoding the client accepts: zstd or brotli
+when those optional packages are installed, otherwise gzip. Streamed responses are
+compressed chunk by chunk with a sync flush after each chunk, so chunked and
+incremental bodies keep flowing. Strong ETags get an encoding suffix ("-gzip", ...)
+because the compressed representation is a different byte sequence; MatchesETag
+accepts either form when checking If-None-Match.
+"""
+
+ENCODING_SUFFIXES = ('-zstd', '-br', '-gzip')
+UNCOMPRESSIBLE_MIMETYPES = {'text/event-stream'}
+
+
+def AvailableEncodings() -> Tuple[str, ...]:
+    """Supported encodings in server preference order"""
+    encodings = []
+    if HAS_ZSTD:
+        encodings.append('zstd')
+    if HAS_BROTLI:
+        encodings.append('br')
+    encodings.append('gzip')
+    return tuple(encodings)
+
+
+def NegotiateEncoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred encoding the client accepts (q > 0), or None"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    for encoding in AvailableEncodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def MatchesETag(if_none_match, etag: str) -> bool:
+    """True when If-None-Match names `etag` in any of its encoded variants"""
+    if not if_none_match:
+        return False
+    return any(if_none_match.contains_weak(etag + suffix) for suffix in ('',) + ENCODING_SUFFIXES)
+
+
+class _Compressor:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'zstd':
+            self._obj = zstandard.ZstdCompressor(level=min(level, 19)).compressobj()
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=min(level, 11))
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything buffered so far without ending the stream"""
+        if self.encoding == 'zstd':
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == 'br':
+            return self._obj.flush()
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'zstd':
+            return self._obj.flush()
+        if self.encoding == 'br':
+            return self._obj.finish()
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+def CompressBytes(data: bytes, encoding: str, level: int = 6) -> bytes:
+    compressor = _Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+class _CompressedStream:
+    """Wraps a streamed body; iterates sync or async depending on the source"""
+
+    def __init__(self, source: Any, encoding: str, level: int):
+        self.source = source
+        self.encoding = encoding
+        self.level = level
+
+    @staticmethod
+    def _encode(chunk: Any) -> bytes:
+        return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        compressor = _Compressor(self.encoding, self.level)
+        try:
+            for chunk in self.source:
+                data = compressor.compress(self._encode(chunk)) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        finally:
+            if hasattr(self.source, 'close'):
+                self.source.close()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        compressor = _Compressor(self.encoding, self.level)
+        try:
+            async for chunk in self.source:
+                data = compressor.compress(self._encode(chunk)) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        finally:
+            # Runs when the server closes this generator (e.g. the client went away), so
+            # the source releases its sockets now rather than at garbage collection
+            await self.aclose()
+
+    def close(self):
+        if hasattr(self.source, 'close'):
+            self.source.close()
+
+    async def aclose(self):
+        if hasattr(self.source, 'aclose'):
+            await self.source.aclose()
+
+
+def Compress(app: Flask, min_size: Optional[int] = None, level: Optional[int] = None):
+    """Register negotiated compression on `app`"""
+    min_size = min_size if min_size is not None else app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = level if level is not None else app.config.get('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        if (
+            response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.direct_passthrough
+            or response.mimetype in UNCOMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = NegotiateEncoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            stream = _CompressedStream(response.response, encoding, level)
+            # Only keep the async-capable wrapper when the body itself is async iterable
+            response.response = stream if hasattr(response.response, '__aiter__') else iter(stream)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(CompressBytes(data, encoding, level))
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+    return app
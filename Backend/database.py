@@ -1,7 +1,9 @@
 import os
-from typing import Any, Dict, Optional, Union, List, Tuple
+from typing import Any, Callable, Dict, Optional, Union, List, Tuple
 import shutil
 
+from Logger.tracing import span
+
 class FirestoreDB:
     def __init__(self, config: Optional[Union[Dict[str, Any], str]] = None):
         import firebase_admin
@@ -49,6 +51,43 @@ class FirestoreDB:
         else:
             return None
 
+    def read_document_with_version(self, collection_name: str, document_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Read a document together with a version tag: its path and last update time. The
+        path is part of the tag because one batch write gives many documents the same
+        update time.
+        """
+        doc = self.db.collection(collection_name).document(document_id).get()
+        if not doc.exists:
+            return None, None
+        update_time = getattr(doc, 'update_time', None)
+        version = f"{collection_name}/{document_id}@{update_time.isoformat()}" if update_time is not None else None
+        return doc.to_dict(), version
+
+    def read_page(self, collection_name: str, after: Optional[str] = None,
+                  limit: int = 500) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[str]]:
+        """Read up to `limit` documents ordered by ID, starting after the `after` ID. Returns (documents, next cursor)."""
+        collection_ref = self.db.collection(collection_name)
+        query = collection_ref.order_by('__name__').limit(limit)
+        if after:
+            query = query.start_after({'__name__': collection_ref.document(after)})
+        documents = [(doc.id, doc.to_dict()) for doc in query.stream()]
+        next_cursor = documents[-1][0] if len(documents) == limit else None
+        return documents, next_cursor
+
+    def batch_write(self, collection_name: str, documents: List[Tuple[Optional[str], Dict[str, Any]]],
+                    merge: bool = False) -> List[str]:
+        """Write up to 500 documents in one atomic batch. Documents without an ID get a generated one."""
+        collection_ref = self.db.collection(collection_name)
+        batch = self.db.batch()
+        ids = []
+        for document_id, document_data in documents:
+            doc_ref = collection_ref.document(document_id) if document_id else collection_ref.document()
+            batch.set(doc_ref, document_data, merge=merge)
+            ids.append(doc_ref.id)
+        batch.commit()
+        return ids
+
     def update_document(self, collection_name: str, document_id: str, document_data: dict, merge: bool = True) -> bool:
         collection_ref = self.db.collection(collection_name)
         doc_ref = collection_ref.document(document_id)
@@ -112,25 +151,31 @@ class FirestoreDB:
         docs = collection_ref.stream()
         return [(doc.id, doc.to_dict()) for doc in docs]
         
-    def authenticate_user(self, collection_name: str, username: str, password: str) -> Optional[Tuple[str, Dict[str, Any]]]:
-        import bcrypt
-        
+    def find_user(self, collection_name: str, username: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Look up a user document by username"""
         # Try with query first
         users = self.query(collection_name, {'username': username}, limit=1)
-        
-        if users and len(users) > 0:
-            user_id, user_data = users[0]
-            if bcrypt.checkpw(password.encode(), user_data.get('password', '').encode()):
-                return user_id, user_data
+        if users:
+            return users[0]
                 
         # If query doesn't work, try manual search
-        if not users:
-            all_users = self.get_all(collection_name)
-            for user_id, user_data in all_users:
-                if user_data.get('username') == username:
-                    if bcrypt.checkpw(password.encode(), user_data.get('password', '').encode()):
-                        return user_id, user_data
-                        
+        for user_id, user_data in self.get_all(collection_name):
+            if user_data.get('username') == username:
+                return user_id, user_data
+        return None
+        
+    def authenticate_user(self, collection_name: str, username: str, password: str,
+                          verify: Optional[Callable[[str, str], bool]] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Find a user and check the password. Pass `verify` to run bcrypt off the calling thread."""
+        result = self.find_user(collection_name, username)
+        if result is None:
+            return None
+        user_id, user_data = result
+        if verify is None:
+            import bcrypt
+            verify = lambda pw, hashed: bcrypt.checkpw(pw.encode(), hashed.encode())
+        if verify(password, user_data.get('password', '')):
+            return user_id, user_data
         return None
 
 class Database:
@@ -145,32 +190,49 @@ class Database:
         else:
             raise NotImplementedError(f"Database type '{db_type}' is not supported yet.")
 
+    def _call(self, operation: str, *args, **kwargs):
+        # Timed as a span so slow Firestore calls stand out in request traces
+        with span(operation, 'database', db_type=self.db_type):
+            return getattr(self._db, operation)(*args, **kwargs)
+
     def create_document(self, *args, **kwargs):
-        return self._db.create_document(*args, **kwargs)
+        return self._call('create_document', *args, **kwargs)
 
     def read_document(self, *args, **kwargs):
-        return self._db.read_document(*args, **kwargs)
+        return self._call('read_document', *args, **kwargs)
+
+    def read_document_with_version(self, *args, **kwargs):
+        return self._call('read_document_with_version', *args, **kwargs)
+
+    def read_page(self, *args, **kwargs):
+        return self._call('read_page', *args, **kwargs)
+
+    def batch_write(self, *args, **kwargs):
+        return self._call('batch_write', *args, **kwargs)
 
     def update_document(self, *args, **kwargs):
-        return self._db.update_document(*args, **kwargs)
+        return self._call('update_document', *args, **kwargs)
 
     def delete_document(self, *args, **kwargs):
-        return self._db.delete_document(*args, **kwargs)
+        return self._call('delete_document', *args, **kwargs)
 
     def get_collection(self, *args, **kwargs):
-        return self._db.get_collection(*args, **kwargs)
+        return self._call('get_collection', *args, **kwargs)
         
     def get_by_id(self, *args, **kwargs):
-        return self._db.get_by_id(*args, **kwargs)
+        return self._call('get_by_id', *args, **kwargs)
         
     def query(self, *args, **kwargs):
-        return self._db.query(*args, **kwargs)
+        return self._call('query', *args, **kwargs)
         
     def get_all(self, *args, **kwargs):
-        return self._db.get_all(*args, **kwargs)
+        return self._call('get_all', *args, **kwargs)
+        
+    def find_user(self, *args, **kwargs):
+        return self._call('find_user', *args, **kwargs)
         
     def authenticate_user(self, *args, **kwargs):
-        return self._db.authenticate_user(*args, **kwargs)
+        return self._call('authenticate_user', *args, **kwargs)
 
     @classmethod
     def supported_types(cls):
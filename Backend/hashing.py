@@ -0,0 +1,145 @@
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import bcrypt
+
+
+class HashQueueFull(Exception):
+    """Raised when the password hashing queue is at its limit"""
+
+
+def _check_password(password: bytes, hashed: bytes) -> bool:
+    try:
+        return bcrypt.checkpw(password, hashed)
+    except ValueError:
+        # Malformed or missing stored hash
+        return False
+
+
+def _mp_context():
+    # The pool starts on the first hash, when the process already runs threads and ZMQ
+    # contexts, so workers must not be forked from it: they come from a fork server
+    # that has imported only this module (bcrypt), or are spawned where there is none
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a dedicated process pool.
+
+    At most `max_workers` jobs are handed to the pool at once; further jobs wait in a
+    local queue of at most `max_queue` entries, and anything beyond that is rejected
+    with HashQueueFull so a login burst turns into fast 503s instead of an unbounded
+    backlog. Because the queue is kept here rather than inside the executor, the time
+    each job spends waiting for a worker can be measured exactly.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: int = 64, rounds: int = 12):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.RLock()
+        self._waiting: Deque[Tuple[Callable, tuple, Future, float]] = deque()
+        self._running = 0
+        self._stats = {
+            'completed': 0,
+            'rejected': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+        atexit.register(self.shutdown)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+        return self._executor
+
+    def _submit(self, func: Callable, *args: Any) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._running >= self.max_workers and len(self._waiting) >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise HashQueueFull("Password hashing queue is full, try again later")
+            self._waiting.append((func, args, future, time.perf_counter()))
+            self._dispatch()
+        return future
+
+    def _dispatch(self):
+        # Caller holds self._lock
+        while self._waiting and self._running < self.max_workers:
+            func, args, future, enqueued = self._waiting.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            wait = time.perf_counter() - enqueued
+            self._stats['wait_total'] += wait
+            self._stats['wait_max'] = max(self._stats['wait_max'], wait)
+            self._running += 1
+            try:
+                inner = self._get_executor().submit(func, *args)
+            except Exception as e:
+                self._running -= 1
+                future.set_exception(e)
+                continue
+            inner.add_done_callback(lambda done, outer=future: self._finished(done, outer))
+
+    def _finished(self, inner: Future, outer: Future):
+        with self._lock:
+            self._running -= 1
+            self._stats['completed'] += 1
+            self._dispatch()
+        if inner.cancelled():
+            outer.cancel()
+        elif inner.exception() is not None:
+            outer.set_exception(inner.exception())
+        else:
+            outer.set_result(inner.result())
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with a fresh salt"""
+        salt = bcrypt.gensalt(self.rounds)
+        hashed = await asyncio.wrap_future(self._submit(bcrypt.hashpw, password.encode(), salt))
+        return hashed.decode()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored bcrypt hash"""
+        return await asyncio.wrap_future(self._submit(_check_password, password.encode(), (hashed or '').encode()))
+
+    def verify_sync(self, password: str, hashed: str) -> bool:
+        """Blocking variant of verify for synchronous callers"""
+        return self._submit(_check_password, password.encode(), (hashed or '').encode()).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, rejections and queue-wait figures (wait as a sum and count)"""
+        with self._lock:
+            stats = dict(self._stats)
+            queued = len(self._waiting)
+            running = self._running
+        started = stats['completed'] + running
+        return {
+            'workers': self.max_workers,
+            'running': running,
+            'queued': queued,
+            'max_queue': self.max_queue,
+            'completed': stats['completed'],
+            'rejected': stats['rejected'],
+            'queue_wait_seconds_sum': stats['wait_total'],
+            'queue_wait_seconds_count': started,
+            'queue_wait_max_ms': stats['wait_max'] * 1000,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,102 @@
+import base64
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+"""
+JSON encoding shared by the API and the ZeroMQ envelope.
+
+orjson is used when installed, with the standard library as a fallback. Both paths
+handle datetimes, dates, Decimals, UUIDs, enums, sets, bytes (base64), dataclasses,
+objects with to_dict(), and Firestore values: DatetimeWithNanoseconds (a datetime),
+GeoPoint ({"latitude", "longitude"}) and DocumentReference (its path).
+"""
+
+
+def _default(obj: Any) -> Any:
+    """Encode types neither encoder handles natively"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(obj)).decode('ascii')
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, 'latitude') and hasattr(obj, 'longitude'):
+        return {'latitude': obj.latitude, 'longitude': obj.longitude}
+    if hasattr(obj, 'path') and hasattr(obj, 'id') and hasattr(obj, 'parent'):
+        return obj.path
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(
+        obj,
+        default=_default,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=None if indent else (',', ':'),
+        ensure_ascii=False
+    ).encode('utf-8')
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps/loads above"""
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs.keys() - {'sort_keys', 'indent'}:
+            # Options orjson has no equivalent for (e.g. the session serializer's separators)
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys), indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            dumps(obj, sort_keys=self.sort_keys, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,324 @@
+import atexit
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from typing import Any, Dict, List, Optional, Tuple
+
+from Logger.logger import get_logger
+
+
+class EmailOutbox:
+    """
+    Persistent outbox for outgoing email.
+
+    enqueue() only writes the rendered message to a SQLite table, so request handlers
+    return immediately. A background thread drains the table in batches over a single
+    SMTP session, keeps that session open between batches until it has been idle for
+    `idle_timeout` seconds, and retries failed messages with exponential backoff until
+    `max_attempts` is reached. Messages survive process restarts. Errors outside SMTP
+    (e.g. the outbox file staying locked past `db_timeout`) are logged and the sender
+    backs off and carries on rather than exiting.
+
+    Every API worker runs a sender on the same file, so a batch is claimed before it
+    is sent: one IMMEDIATE transaction marks the rows 'sending' with a lease of
+    `lease_timeout` seconds. Rows are released on retry, and rows whose lease has
+    expired (their sender died) can be claimed again, so each message is sent by one
+    worker at a time.
+
+    TLS and login are optional so the sender can be pointed at a local SMTP stand-in
+    such as `python -m aiosmtpd -n -l localhost:8025`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        host: Optional[str],
+        port: int = 587,
+        sender: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        batch_size: int = 20,
+        idle_timeout: float = 30.0,
+        max_attempts: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+        timeout: float = 10.0,
+        lease_timeout: float = 300.0,
+        db_timeout: float = 30.0
+    ):
+        self.path = path
+        self.host = host
+        self.port = int(port)
+        self.sender = sender
+        self.password = password
+        self.use_tls = use_tls
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.lease_timeout = lease_timeout
+        self.db_timeout = db_timeout
+        self.logger = get_logger('mailer', log_to_console=True)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Workers contend for the write lock when claiming batches; wait for it rather
+        # than failing after SQLite's default 5 seconds
+        self._db = sqlite3.connect(path, timeout=db_timeout, check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        with self._db_lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS outbox ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'recipient TEXT NOT NULL, '
+                'message TEXT NOT NULL, '
+                'attempts INTEGER NOT NULL DEFAULT 0, '
+                'next_attempt REAL NOT NULL, '
+                'status TEXT NOT NULL DEFAULT \'pending\', '
+                'last_error TEXT, '
+                'lease_until REAL)'
+            )
+            columns = [row[1] for row in self._db.execute('PRAGMA table_info(outbox)')]
+            if 'lease_until' not in columns:
+                # Outbox files created before batches were claimed
+                self._db.execute('ALTER TABLE outbox ADD COLUMN lease_until REAL')
+            self._db.execute('CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)')
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._stats = {'sent': 0, 'retried': 0, 'failed': 0, 'connections': 0}
+        atexit.register(self.stop)
+
+    # ------------------------------------------------------------------ #
+    def enqueue(self, recipient: str, subject: str, body: str) -> int:
+        """Store a plain-text message for background delivery and return its outbox ID"""
+        msg = MIMEMultipart()
+        msg['From'] = self.sender or ''
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg['Date'] = formatdate(localtime=True)
+        msg['Message-ID'] = make_msgid()
+        msg.attach(MIMEText(body))
+        with self._db_lock:
+            cursor = self._db.execute(
+                'INSERT INTO outbox (recipient, message, next_attempt) VALUES (?, ?, ?)',
+                (recipient, msg.as_string(), time.time())
+            )
+        self.start()
+        self._wake.set()
+        return cursor.lastrowid
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not self.host:
+            self.logger.warning("EMAIL_SERVER is not configured; outbox messages will wait until it is")
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._disconnect()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until nothing is due for delivery. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._db_lock:
+                due = self._db.execute(
+                    "SELECT COUNT(*) FROM outbox WHERE (status = 'pending' AND next_attempt <= ?) "
+                    "OR status = 'sending'",
+                    (time.time(),)
+                ).fetchone()[0]
+            if not due:
+                return True
+            self._wake.set()
+            time.sleep(0.05)
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._db_lock:
+            rows = dict(self._db.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall())
+        return {
+            'pending': rows.get('pending', 0),
+            'sending': rows.get('sending', 0),
+            'dead': rows.get('failed', 0),
+            'connected': self._smtp is not None,
+            **self._stats
+        }
+
+    # ------------------------------------------------------------------ #
+    def _run(self):
+        errors = 0
+        while not self._stopping.is_set():
+            batch = []
+            try:
+                batch = self._due_batch()
+                if batch:
+                    self._send_batch(batch)
+                    errors = 0
+                    continue
+
+                if self._smtp is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+                    self._disconnect()
+                self._wake.wait(self._sleep_interval())
+                self._wake.clear()
+                errors = 0
+            except Exception as e:
+                errors += 1
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (errors - 1)))
+                self.logger.error(f"Outbox sender error, retrying in {delay:.1f}s: {str(e)}", extra={'error': str(e)})
+                try:
+                    # Hand back whatever this batch still holds instead of waiting out the lease
+                    self._release([row[0] for row in batch])
+                except Exception:
+                    pass
+                self._stopping.wait(delay)
+
+    def _due_batch(self) -> List[Tuple[int, str, str, int]]:
+        """Claim up to `batch_size` due messages for this sender"""
+        now = time.time()
+        with self._db_lock:
+            # IMMEDIATE takes the write lock up front, so no other worker can select
+            # the same rows between the SELECT and the UPDATE
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                batch = self._db.execute(
+                    "SELECT id, recipient, message, attempts FROM outbox "
+                    "WHERE (status = 'pending' AND next_attempt <= ?) "
+                    "OR (status = 'sending' AND lease_until <= ?) ORDER BY id LIMIT ?",
+                    (now, now, self.batch_size)
+                ).fetchall()
+                if batch:
+                    ids = [row[0] for row in batch]
+                    self._db.execute(
+                        f"UPDATE outbox SET status = 'sending', lease_until = ? "
+                        f"WHERE id IN ({','.join('?' * len(ids))})",
+                        (now + self.lease_timeout, *ids)
+                    )
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+        return batch
+
+    def _release(self, message_ids: List[int]):
+        """Return claimed messages to the queue without counting an attempt"""
+        if not message_ids:
+            return
+        with self._db_lock:
+            self._db.execute(
+                f"UPDATE outbox SET status = 'pending', lease_until = NULL "
+                f"WHERE status = 'sending' AND id IN ({','.join('?' * len(message_ids))})",
+                message_ids
+            )
+
+    def _sleep_interval(self) -> float:
+        with self._db_lock:
+            next_due = self._db.execute(
+                "SELECT MIN(CASE status WHEN 'sending' THEN lease_until ELSE next_attempt END) "
+                "FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()[0]
+        interval = self.idle_timeout
+        if next_due is not None:
+            interval = min(interval, max(next_due - time.time(), 0.0))
+        if self._smtp is not None:
+            interval = min(interval, max(self.idle_timeout - (time.monotonic() - self._last_used), 0.0))
+        return max(interval, 0.05)
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                self._disconnect()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.password:
+            smtp.login(self.sender, self.password)
+        self._smtp = smtp
+        self._stats['connections'] += 1
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+        self._smtp = None
+
+    def _send_batch(self, batch: List[Tuple[int, str, str, int]]):
+        try:
+            smtp = self._connect()
+        except Exception as e:
+            self.logger.warning(f"SMTP connection failed: {str(e)}", extra={'error': str(e)})
+            for message_id, _, _, attempts in batch:
+                self._retry(message_id, attempts, str(e))
+            return
+
+        for index, (message_id, recipient, message, attempts) in enumerate(batch):
+            try:
+                smtp.sendmail(self.sender, [recipient], message)
+                self._last_used = time.monotonic()
+                with self._db_lock:
+                    self._db.execute('DELETE FROM outbox WHERE id = ?', (message_id,))
+                self._stats['sent'] += 1
+            except smtplib.SMTPRecipientsRefused as e:
+                # Permanent rejection, retrying will not help
+                self._fail(message_id, str(e))
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                self._disconnect()
+                self._retry(message_id, attempts, str(e))
+                # The rest of the batch was not tried; let any sender pick it up now
+                self._release([row[0] for row in batch[index + 1:]])
+                return
+            except smtplib.SMTPException as e:
+                self._retry(message_id, attempts, str(e))
+
+    def _retry(self, message_id: int, attempts: int, error: str):
+        attempts += 1
+        if attempts >= self.max_attempts:
+            self._fail(message_id, error)
+            return
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        delay += random.uniform(0, delay * 0.1)
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE outbox SET status = 'pending', lease_until = NULL, attempts = ?, next_attempt = ?, "
+                "last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, error, message_id)
+            )
+        self._stats['retried'] += 1
+
+    def _fail(self, message_id: int, error: str):
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE outbox SET status = 'failed', lease_until = NULL, last_error = ? WHERE id = ?",
+                (error, message_id)
+            )
+        self._stats['failed'] += 1
+        self.logger.error(f"Giving up on outbox message {message_id}: {error}", extra={'error': error})
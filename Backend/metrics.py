@@ -0,0 +1,281 @@
+import os
+import time
+import weakref
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, Response, g, request
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+"""
+Prometheus text-format metrics for the API and the ZMQ server.
+
+Request counts and latencies are recorded into per-thread shards: only the owning
+thread (or event loop) writes a shard, so recording takes no lock, and a scrape sums
+the shards. A thread's shard is folded into a shared total when the thread exits, so
+thread-per-request servers do not accumulate shards. Component gauges (pool, hasher, admission, outbox) are read from each
+component's stats() at scrape time. Waits are exported as summaries (`_sum` and
+`_count` counters) rather than averages, so they can be aggregated across workers
+and rated over time. Everything is exported with the `apexea_` prefix.
+"""
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shard:
+    __slots__ = ('requests', 'latency')
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        # (route, method) -> [count per bucket..., +Inf count, sum]
+        self.latency: Dict[Tuple[str, str], List[float]] = {}
+
+    def add(self, other: "_Shard"):
+        # dict() copies are atomic, so a concurrent insert cannot break the iteration
+        for key, count in dict(other.requests).items():
+            self.requests[key] = self.requests.get(key, 0) + count
+        for key, series in dict(other.latency).items():
+            total = self.latency.setdefault(key, [0.0] * len(series))
+            for i, value in enumerate(list(series)):
+                total[i] += value
+
+
+class _ShardOwner:
+    """Held only by a thread's local storage; its collection marks the thread's exit"""
+    __slots__ = ('shard', '__weakref__')
+
+    def __init__(self, shard: _Shard):
+        self.shard = shard
+
+
+class RequestMetrics:
+    """Per-route request counter and latency histogram"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard()  # Totals of threads that have exited
+        self._shards_lock = threading.Lock()  # Taken when a thread's shard is created or retired
+
+    def _shard(self) -> _Shard:
+        owner = getattr(self._local, 'owner', None)
+        if owner is None:
+            owner = _ShardOwner(_Shard())
+            with self._shards_lock:
+                self._shards.append(owner.shard)
+            weakref.finalize(owner, self._retire, owner.shard)
+            self._local.owner = owner
+        return owner.shard
+
+    def _retire(self, shard: _Shard):
+        with self._shards_lock:
+            self._retired.add(shard)
+            self._shards.remove(shard)
+
+    def observe(self, route: str, method: str, status: int, seconds: float):
+        shard = self._shard()
+        key = (route, method, str(status))
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        series = shard.latency.get((route, method))
+        if series is None:
+            series = shard.latency[(route, method)] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, str, str], int], Dict[Tuple[str, str], List[float]]]:
+        """Totals across every thread's shard"""
+        total = _Shard()
+        # Under the lock, so a shard being retired is counted exactly once
+        with self._shards_lock:
+            total.add(self._retired)
+            for shard in self._shards:
+                total.add(shard)
+        return total.requests, total.latency
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: Optional[Dict[str, Any]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsWriter:
+    """Accumulates metric families in Prometheus text exposition format"""
+
+    def __init__(self, prefix: str = 'apexea_'):
+        self.prefix = prefix
+        # Samples are grouped per family, as the exposition format requires
+        self._families: Dict[str, List[str]] = {}
+
+    def _declare(self, name: str, kind: str, help_text: str) -> Tuple[str, List[str]]:
+        name = self.prefix + name
+        lines = self._families.get(name)
+        if lines is None:
+            lines = self._families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        return name, lines
+
+    def sample(self, name: str, kind: str, help_text: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        name, lines = self._declare(name, kind, help_text)
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def gauge(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        self.sample(name, 'gauge', help_text, value, labels)
+
+    def counter(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        self.sample(name, 'counter', help_text, value, labels)
+
+    def summary(self, name: str, help_text: str, total: float, count: float,
+                labels: Optional[Dict[str, Any]] = None):
+        """Summary without quantiles: a running sum and count"""
+        full, lines = self._declare(name, 'summary', help_text)
+        lines.append(f"{full}_sum{_labels(labels)} {_number(total)}")
+        lines.append(f"{full}_count{_labels(labels)} {int(count)}")
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...], series: List[float],
+                  labels: Optional[Dict[str, Any]] = None):
+        full, lines = self._declare(name, 'histogram', help_text)
+        labels = labels or {}
+        cumulative = 0
+        for bound, count in zip(buckets + (float('inf'),), series[:-1]):
+            cumulative += count
+            lines.append(f"{full}_bucket{_labels({**labels, 'le': _number(float(bound))})} {int(cumulative)}")
+        lines.append(f"{full}_sum{_labels(labels)} {_number(series[-1])}")
+        lines.append(f"{full}_count{_labels(labels)} {int(cumulative)}")
+
+    def stats(self, name: str, help_text: str, stats: Dict[str, Any], counters: Iterable[str] = (),
+              labels: Optional[Dict[str, Any]] = None):
+        """
+        Export a component's numeric stats() keys as gauges, or counters for keys in
+        `counters`. A "<x>_sum" and "<x>_count" pair is exported as the summary <x>.
+        """
+        summaries = {key[:-4] for key in stats if key.endswith('_sum') and f"{key[:-4]}_count" in stats}
+        for base in sorted(summaries):
+            self.summary(f"{name}_{base}", f"{help_text}: {base}", stats[f"{base}_sum"], stats[f"{base}_count"], labels)
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key.endswith(('_sum', '_count')) and key.rsplit('_', 1)[0] in summaries:
+                continue
+            if key in counters:
+                self.counter(f"{name}_{key}_total", f"{help_text}: {key}", value, labels)
+            else:
+                self.gauge(f"{name}_{key}", f"{help_text}: {key}", value, labels)
+
+    def render(self) -> str:
+        return '\n'.join(line for lines in self._families.values() for line in lines) + '\n'
+
+
+def ProcessStats() -> Dict[str, Any]:
+    """CPU seconds, resident memory, threads and open files of this process"""
+    if HAS_PSUTIL:
+        process = psutil.Process()
+        with process.oneshot():
+            cpu = process.cpu_times()
+            stats = {
+                'cpu_seconds': cpu.user + cpu.system,
+                'resident_memory_bytes': process.memory_info().rss,
+                'threads': process.num_threads(),
+                'start_time_seconds': process.create_time(),
+            }
+            if hasattr(process, 'num_fds'):
+                stats['open_fds'] = process.num_fds()
+        return stats
+    times = os.times()
+    return {'cpu_seconds': times.user + times.system, 'threads': threading.active_count()}
+
+
+def WriteProcessStats(writer: MetricsWriter, stats: Dict[str, Any], component: str):
+    labels = {'component': component}
+    if 'cpu_seconds' in stats:
+        writer.counter('process_cpu_seconds_total', 'User and system CPU time', stats['cpu_seconds'], labels)
+    for key in ('resident_memory_bytes', 'threads', 'open_fds', 'start_time_seconds'):
+        if key in stats:
+            writer.gauge(f"process_{key}", f"Process {key.replace('_', ' ')}", stats[key], labels)
+
+
+def Instrument(app: Flask, metrics: Optional[RequestMetrics] = None) -> RequestMetrics:
+    """Record a count and a latency observation for every request handled by `app`"""
+    metrics = metrics or RequestMetrics()
+    app.extensions['request_metrics'] = metrics
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def remember_status(response: Response) -> Response:
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exception=None):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        status = g.pop('metrics_status', 500 if exception is not None else 200)
+        # The URL rule, not the path, so the label set stays bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe(route, request.method, status, time.perf_counter() - start)
+
+    return metrics
+
+
+def WriteRequestMetrics(writer: MetricsWriter, metrics: RequestMetrics):
+    requests, latency = metrics.snapshot()
+    for (route, method, status), count in sorted(requests.items()):
+        writer.counter('http_requests_total', 'HTTP requests by route, method and status', count,
+                       {'route': route, 'method': method, 'status': status})
+    for (route, method), series in sorted(latency.items()):
+        writer.histogram('http_request_duration_seconds', 'HTTP request latency', metrics.buckets, series,
+                         {'route': route, 'method': method})
+
+
+def WriteServerMetrics(writer: MetricsWriter, server: Optional[Dict[str, Any]]):
+    """Export the ZMQ server's 'metrics' command result"""
+    writer.gauge('server_up', 'Whether the ZMQ server answered the metrics scrape', 1 if server else 0)
+    if not server:
+        return
+    for lane, stats in (server.get('lanes') or {}).items():
+        writer.stats('server_lane', 'Server dispatcher lane', stats, counters=('completed',), labels={'lane': lane})
+    WriteProcessStats(writer, server.get('process') or {}, 'server')
+
+
+def CollectApiMetrics(app: Flask, server: Optional[Dict[str, Any]] = None) -> str:
+    """Render request metrics, component stats, process stats and the server scrape"""
+    writer = MetricsWriter()
+    metrics = app.extensions.get('request_metrics')
+    if metrics is not None:
+        WriteRequestMetrics(writer, metrics)
+
+    pool = getattr(app, 'connection_pool', None)
+    if pool is not None:
+        writer.stats('zmq_pool', 'ZMQ client pool', pool.stats(), counters=('acquired', 'created', 'replaced', 'shed_timeout', 'shed_waiters'))
+    for key, name, counters in (
+        ('hasher', 'bcrypt', ('completed', 'rejected')),
+        ('admission', 'admission', ('admitted', 'rejected')),
+        ('outbox', 'email_outbox', ('sent', 'retried', 'failed', 'connections')),
+    ):
+        component = app.config.get(key)
+        if component is not None:
+            writer.stats(name, f"{name} stats", component.stats(), counters=counters)
+
+    WriteProcessStats(writer, ProcessStats(), 'api')
+    WriteServerMetrics(writer, server)
+    return writer.render()
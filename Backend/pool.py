@@ -0,0 +1,299 @@
+import asyncio
+import atexit
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+import zmq
+import zmq.asyncio
+
+from Backend.jsonprovider import dumps, loads
+from Logger.tracing import span
+
+
+class PoolExhausted(Exception):
+    """Raised when no socket can be acquired within the pool's wait limits"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _LoopPool:
+    """
+    Sockets owned by a single event loop. Only touched from that loop's thread.
+    Released sockets are handed straight to the oldest waiter, so waiters are served
+    in order and a new acquire() cannot take a socket a woken waiter was meant to get.
+    """
+
+    def __init__(self, owner: "ZMQClientPool", loop: asyncio.AbstractEventLoop):
+        self.owner = owner
+        # Weak, so the pool's WeakKeyDictionary entry can go once the loop is gone
+        self._loop = weakref.ref(loop)
+        self.idle: Deque[zmq.asyncio.Socket] = deque()
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.size = 0
+        self.in_use = 0
+        for _ in range(owner.min_size):
+            self.idle.append(self._create())
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop()
+
+    def _create(self) -> zmq.asyncio.Socket:
+        socket = self.owner.context.socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.connect(self.owner.server_url)
+        self.size += 1
+        self.owner._record('created')
+        return socket
+
+    def _discard(self, socket: zmq.asyncio.Socket):
+        self.size -= 1
+        self.owner._record('replaced')
+        if not socket.closed:
+            socket.close(linger=0)
+
+    @staticmethod
+    def _healthy(socket: zmq.asyncio.Socket) -> bool:
+        # A REQ socket that cannot send is stuck waiting for a reply that never came
+        if socket.closed:
+            return False
+        try:
+            return bool(socket.getsockopt(zmq.EVENTS) & zmq.POLLOUT)
+        except zmq.ZMQError:
+            return False
+
+    async def acquire(self) -> zmq.asyncio.Socket:
+        owner = self.owner
+        started = time.perf_counter()
+        while True:
+            while self.idle:
+                socket = self.idle.popleft()
+                if self._healthy(socket):
+                    return self._checkout(socket, started)
+                self._discard(socket)
+            if self.size < owner.max_size:
+                return self._checkout(self._create(), started)
+
+            # Shed instead of queueing without bound when every socket is busy
+            if owner.max_waiters is not None and len(self.waiters) >= owner.max_waiters:
+                owner._record('shed_waiters')
+                raise PoolExhausted(f"{len(self.waiters)} requests already waiting for a connection", owner.retry_after)
+            remaining = None
+            if owner.acquire_timeout is not None:
+                remaining = owner.acquire_timeout - (time.perf_counter() - started)
+                if remaining <= 0:
+                    owner._record('shed_timeout')
+                    raise PoolExhausted(f"No connection available within {owner.acquire_timeout}s", owner.retry_after)
+
+            waiter = self.loop.create_future()
+            self.waiters.append(waiter)
+            try:
+                socket = await asyncio.wait_for(waiter, remaining)
+            except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # Handed a socket just as we gave up: pass it to the next waiter
+                    self._hand_off(waiter.result())
+                if isinstance(e, asyncio.TimeoutError):
+                    owner._record('shed_timeout')
+                    raise PoolExhausted(f"No connection available within {owner.acquire_timeout}s", owner.retry_after) from None
+                raise
+            return self._checkout(socket, started)
+
+    def _checkout(self, socket: zmq.asyncio.Socket, started: float) -> zmq.asyncio.Socket:
+        self.in_use += 1
+        self.owner._record_acquire(time.perf_counter() - started)
+        return socket
+
+    def release(self, socket: zmq.asyncio.Socket, broken: bool = False):
+        self.in_use -= 1
+        if broken or not self._healthy(socket):
+            self._discard(socket)
+            if not self.waiters:
+                return
+            # Replace it now, so the slot goes to the oldest waiter and not a newcomer
+            socket = self._create()
+        self._hand_off(socket)
+
+    def _hand_off(self, socket: zmq.asyncio.Socket):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(socket)
+                return
+        self.idle.append(socket)
+
+    def close(self):
+        while self.idle:
+            socket = self.idle.popleft()
+            if not socket.closed:
+                try:
+                    socket.close(linger=0)
+                except Exception:
+                    pass
+        self.size = self.in_use
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.cancel()
+        self.waiters.clear()
+
+
+class ZMQClientPool:
+    """
+    REQ socket pool for talking to the ZeroMQ server.
+
+    zmq.asyncio sockets belong to the event loop that first uses them, so the pool
+    keeps one sub-pool per loop. Each sub-pool starts with `min_size` sockets and
+    grows on demand up to `max_size`. Sockets that are closed, errored or stuck in
+    the REQ receive state are discarded and replaced on the next acquire. The pool
+    lives for the whole process and is closed at interpreter exit.
+
+    When every socket is busy, at most `max_waiters` requests per loop wait, each for
+    at most `acquire_timeout` seconds; beyond that acquire raises PoolExhausted, whose
+    `retry_after` the API returns as a 503 Retry-After. None disables either limit.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 2,
+        max_size: int = 10,
+        server_url: str = "tcp://localhost:5001",
+        request_timeout: Optional[float] = 30.0,
+        acquire_timeout: Optional[float] = 5.0,
+        max_waiters: Optional[int] = 100,
+        retry_after: float = 1.0
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        if max_waiters is not None and max_waiters < 0:
+            raise ValueError("max_waiters must be None or >= 0")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.server_url = server_url
+        self.request_timeout = request_timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_waiters = max_waiters
+        self.retry_after = retry_after
+        self.context = zmq.asyncio.Context()
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopPool]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'acquired': 0,
+            'created': 0,
+            'replaced': 0,
+            'shed_timeout': 0,
+            'shed_waiters': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+        atexit.register(self.close)
+
+    def _record(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _record_acquire(self, wait: float):
+        with self._lock:
+            self._stats['acquired'] += 1
+            self._stats['wait_total'] += wait
+            if wait > self._stats['wait_max']:
+                self._stats['wait_max'] = wait
+
+    def _loop_pool(self) -> _LoopPool:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.get(loop)
+            if pool is not None:
+                return pool
+            # Drop sub-pools whose loops have finished so their sockets do not leak
+            for stale_loop in [l for l in self._pools.keys() if l.is_closed()]:
+                self._pools.pop(stale_loop).close()
+        pool = _LoopPool(self, loop)
+        with self._lock:
+            self._pools[loop] = pool
+        # Also close the sockets of a loop that is garbage collected without closing
+        weakref.finalize(loop, pool.close)
+        return pool
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """Borrow a socket for one request/reply exchange; raises PoolExhausted when shedding"""
+        pool = self._loop_pool()
+        with span('pool.acquire', 'api'):
+            socket = await pool.acquire()
+        broken = False
+        try:
+            yield socket
+        except BaseException:
+            # The REQ state machine is unknown after a failed exchange
+            broken = True
+            raise
+        finally:
+            pool.release(socket, broken=broken)
+
+    async def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a JSON payload and wait for the reply, honouring `request_timeout`"""
+        async with self.get_connection() as socket:
+            with span('zmq.roundtrip', 'api', command=payload.get('command')):
+                await socket.send(dumps(payload))
+                return loads(await asyncio.wait_for(socket.recv(), self.request_timeout))
+
+    async def warm(self, timeout: float = 5.0) -> bool:
+        """
+        Open this loop's sockets and complete one round trip, so the first request
+        pays no connection cost. Returns False when the server did not answer.
+        """
+        self._loop_pool()
+        try:
+            await asyncio.wait_for(self.request({'command': 'status', 'params': {}}), timeout)
+            return True
+        except Exception:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Acquire-wait and utilization figures across every loop's sub-pool"""
+        with self._lock:
+            pools = list(self._pools.values())
+            stats = dict(self._stats)
+        size = sum(pool.size for pool in pools)
+        in_use = sum(pool.in_use for pool in pools)
+        acquired = stats['acquired']
+        return {
+            'loops': len(pools),
+            'size': size,
+            'in_use': in_use,
+            'idle': sum(len(pool.idle) for pool in pools),
+            'waiting': sum(len(pool.waiters) for pool in pools),
+            'capacity': self.max_size * max(len(pools), 1),
+            'utilization': in_use / (self.max_size * max(len(pools), 1)),
+            'acquired': acquired,
+            'created': stats['created'],
+            'replaced': stats['replaced'],
+            'shed_timeout': stats['shed_timeout'],
+            'shed_waiters': stats['shed_waiters'],
+            'acquire_wait_seconds_sum': stats['wait_total'],
+            'acquire_wait_seconds_count': acquired,
+            'acquire_wait_max_ms': stats['wait_max'] * 1000,
+        }
+
+    def close(self):
+        """Close every socket and the context. Registered with atexit."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+        self.context.destroy(linger=0)
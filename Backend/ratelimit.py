@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by arbitrary strings (e.g. "Login:ip:10.0.0.1").
+
+    With a `path` the buckets live in a SQLite file so every worker process on the
+    host shares them; each consume() is a single short IMMEDIATE transaction. Without
+    a path an in-process dictionary is used.
+
+    The SQLite transaction can wait up to 5 s on another worker's lock, so code on
+    an event loop uses consume_async(), which runs it in a thread.
+    """
+
+    _CLEANUP_EVERY = 1000
+    _STALE_AFTER = 3600  # seconds
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memory: Dict[str, Tuple[float, float]] = {}
+        self._ops = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connection().execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+        return min(burst, tokens + max(now - updated, 0.0) * rate)
+
+    def consume(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens from the bucket. `rate` is tokens per second and `burst`
+        the bucket size. Returns (allowed, seconds until enough tokens are available).
+        """
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                tokens, updated = self._memory.get(key, (burst, now))
+                tokens = self._refill(tokens, updated, now, rate, burst)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                self._memory[key] = (tokens, now)
+        else:
+            connection = self._connection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens = self._refill(row[0], row[1], now, rate, burst) if row else burst
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                connection.execute(
+                    'INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                    (key, tokens, now)
+                )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        self._maybe_cleanup(now)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate if rate > 0 else float('inf')
+        return allowed, retry_after
+
+    async def consume_async(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """consume() for event loops: the SQLite-backed variant runs in a thread"""
+        if not self.path:
+            return self.consume(key, rate, burst, cost)
+        return await asyncio.to_thread(self.consume, key, rate, burst, cost)
+
+    def _maybe_cleanup(self, now: float):
+        with self._lock:
+            self._ops += 1
+            if self._ops % self._CLEANUP_EVERY:
+                return
+            if not self.path:
+                cutoff = now - self._STALE_AFTER
+                for key in [k for k, (_, updated) in self._memory.items() if updated < cutoff]:
+                    del self._memory[key]
+                return
+        self._connection().execute('DELETE FROM buckets WHERE updated < ?', (now - self._STALE_AFTER,))
+
+
+class AdmissionController:
+    """
+    Caps the number of requests being processed at once in this worker. The count
+    is per process, so with N API workers the host admits up to N x max_concurrent.
+    """
+
+    def __init__(self, max_concurrent: int = 256):
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._active = 0
+        self._admitted = 0
+        self._rejected = 0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._active >= self.max_concurrent:
+                self._rejected += 1
+                return False
+            self._active += 1
+            self._admitted += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'active': self._active,
+                'max_concurrent': self.max_concurrent,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+            }
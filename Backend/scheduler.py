@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Optional
+
+from Logger.tracing import Span, span, start_span
+
+
+class Priority(IntEnum):
+    CRITICAL = 0     # Health probes and cheap lookups
+    INTERACTIVE = 1  # Single-document writes and agent control
+    BULK = 2         # Collection scans and process spawns
+
+
+# Commands not listed here are scheduled as INTERACTIVE
+COMMAND_PRIORITIES = {
+    'status': Priority.CRITICAL,
+    'metrics': Priority.CRITICAL,
+    'get_agents': Priority.CRITICAL,
+    'create': Priority.INTERACTIVE,
+    'update': Priority.INTERACTIVE,
+    'delete': Priority.INTERACTIVE,
+    'stop_agent': Priority.INTERACTIVE,
+    'agent_command': Priority.INTERACTIVE,
+    'broadcast_agent_command': Priority.INTERACTIVE,
+    'stop_agents': Priority.INTERACTIVE,
+    'read': Priority.BULK,
+    'read_page': Priority.BULK,
+    'batch_write': Priority.BULK,
+    'start_agent': Priority.BULK,
+}
+
+
+@dataclass
+class LaneConfig:
+    weight: int
+    max_concurrency: int
+
+
+DEFAULT_LANES = {
+    Priority.CRITICAL: LaneConfig(weight=8, max_concurrency=4),
+    Priority.INTERACTIVE: LaneConfig(weight=4, max_concurrency=8),
+    Priority.BULK: LaneConfig(weight=1, max_concurrency=6),
+}
+
+
+@dataclass
+class _Job:
+    func: Callable
+    params: Any
+    future: asyncio.Future
+    queued: Span
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    # Context of the submitting task, so the active trace follows the job onto its lane
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+class _Lane:
+    def __init__(self, priority: Priority, config: LaneConfig):
+        self.priority = priority
+        self.weight = config.weight
+        self.max_concurrency = config.max_concurrency
+        self.queue: Deque[_Job] = deque()
+        self.active = 0
+        self.current_weight = 0
+        self.started = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def ready(self) -> bool:
+        return bool(self.queue) and self.active < self.max_concurrency
+
+
+class PriorityDispatcher:
+    """
+    Schedules server commands across priority lanes.
+
+    Each lane has its own queue and concurrency cap. Free worker slots are handed
+    out with smooth weighted round-robin, so heavy lanes still make progress while
+    lighter lanes are preferred. The worker pool is sized to the sum of all lane
+    caps, which means a saturated BULK lane can never occupy the threads that are
+    reserved for CRITICAL commands.
+    """
+
+    def __init__(self, lanes: Optional[Dict[Priority, LaneConfig]] = None):
+        lanes = lanes or DEFAULT_LANES
+        self.lanes = {priority: _Lane(priority, config) for priority, config in lanes.items()}
+        self.executor = ThreadPoolExecutor(
+            max_workers=sum(lane.max_concurrency for lane in self.lanes.values()),
+            thread_name_prefix='dispatch'
+        )
+
+    @staticmethod
+    def classify(command: str) -> Priority:
+        return COMMAND_PRIORITIES.get((command or '').lower(), Priority.INTERACTIVE)
+
+    async def submit(self, command: str, func: Callable, params: Any) -> Any:
+        """Queue a command handler on its lane and wait for the result"""
+        lane = self.lanes.get(self.classify(command)) or self.lanes[Priority.INTERACTIVE]
+        job = _Job(
+            func=func,
+            params=params,
+            future=asyncio.get_running_loop().create_future(),
+            queued=start_span('queue', 'server', lane=lane.priority.name.lower())
+        )
+        lane.queue.append(job)
+        self._pump()
+        return await job.future
+
+    def _next_lane(self) -> Optional[_Lane]:
+        ready = [lane for lane in self.lanes.values() if lane.ready()]
+        if not ready:
+            return None
+        total = 0
+        best = None
+        for lane in ready:
+            lane.current_weight += lane.weight
+            total += lane.weight
+            if best is None or lane.current_weight > best.current_weight:
+                best = lane
+        best.current_weight -= total
+        return best
+
+    def _pump(self):
+        while True:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            job = lane.queue.popleft()
+            job.queued.finish()
+            if job.future.cancelled():
+                continue
+            lane.active += 1
+            lane.started += 1
+            wait = time.perf_counter() - job.enqueued_at
+            lane.total_wait += wait
+            lane.max_wait = max(lane.max_wait, wait)
+            asyncio.get_running_loop().create_task(self._run(lane, job), context=job.context)
+
+    async def _run(self, lane: _Lane, job: _Job):
+        try:
+            with span('execute', 'server', lane=lane.priority.name.lower()):
+                if asyncio.iscoroutinefunction(job.func):
+                    result = await job.func(job.params)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(
+                        self.executor, contextvars.copy_context().run, job.func, job.params
+                    )
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            lane.active -= 1
+            lane.completed += 1
+            self._pump()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-lane queue depth, concurrency and queue wait figures (wait as a sum and count)"""
+        return {
+            lane.priority.name.lower(): {
+                'queued': len(lane.queue),
+                'active': lane.active,
+                'max_concurrency': lane.max_concurrency,
+                'weight': lane.weight,
+                'completed': lane.completed,
+                'wait_seconds_sum': lane.total_wait,
+                'wait_seconds_count': lane.started,
+                'max_wait_ms': lane.max_wait * 1000,
+            }
+            for lane in self.lanes.values()
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
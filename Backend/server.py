@@ -2,6 +2,7 @@ import os
 import sys
 import time
 import asyncio
+import threading
 import zmq.asyncio
 
 if sys.platform.startswith('win'):
@@ -12,8 +13,12 @@ root_dir = os.path.dirname(current_dir)
 sys.path.insert(0, root_dir)
 
 from Backend.database import Database
+from Backend.scheduler import PriorityDispatcher
+from Backend.metrics import ProcessStats
+from Backend.jsonprovider import dumps, loads
+from Logger.tracing import span
 from enum import IntEnum
-from Agents import *
+from Agents.agents import AgentManager, AgentType, AgentIdentity
 import zmq
 import json
 from dotenv import load_dotenv
@@ -22,7 +27,11 @@ from dotenv import load_dotenv
 load_dotenv()
 cred_file = os.path.join(root_dir, 'firebase.json')
 master_agent = None
-db = Database(db_type='firestore', config=cred_file)
+_db = None
+_db_lock = threading.Lock()
+dispatcher = PriorityDispatcher()
+PAGE_LIMIT = 1000  # Documents per read_page reply
+BATCH_LIMIT = 500  # Firestore's maximum writes per batch
 
 
 class OpStatus(IntEnum):
@@ -34,16 +43,37 @@ class OpStatus(IntEnum):
     INVALID_INPUT = 5
 
 
+def GetDatabase():
+    """The server's Database, created on first use (Main creates it at startup)"""
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = Database(db_type='firestore', config=cred_file)
+        return _db
+
+
+def WarmDatabase():
+    """Create the client and open its channel before the first request needs it"""
+    start = time.perf_counter()
+    try:
+        GetDatabase().read_page('Users', limit=1)
+        print(f'Database warmed in {(time.perf_counter() - start) * 1000:.0f}ms')
+    except Exception as e:
+        print(f'Database warm-up failed: {str(e)}')
+
+
 def MasterAgent():
     global master_agent
     if master_agent is None:
         master_agent = AgentManager()
         master_agent.start()
+        master_agent.StartCollector()
+        master_agent.StartPool(int(os.getenv('AGENT_WARM_POOL', '2')))
     return master_agent
 
 
 def GetCollection(collection_name):
-    collections = db.get_collection(collection_name)
+    collections = GetDatabase().get_collection(collection_name)
     if collections:
         return OpStatus.SUCCESS
     return OpStatus.DOCUMENT_NOT_FOUND
@@ -61,7 +91,7 @@ def CreateDocument(params):
         return "Error: Document data must be a dictionary."
 
     try:
-        doc_id = db.create_document(collection_name, document_data, document_name)
+        doc_id = GetDatabase().create_document(collection_name, document_data, document_name)
         return f"Success: Document added successfully with name: {doc_id}"
     except Exception as e:
         return f"Error: Error adding document: {str(e)}"
@@ -72,20 +102,59 @@ def ReadDocument(params):
     document_id = params.get('document_id')
     try:
         if not document_id or document_id.strip() == "":  # Multiple docs
-            docs = db.read_document(collection_name)
+            docs = GetDatabase().read_document(collection_name)
             return docs, 200
-        doc = db.read_document(collection_name.strip(), document_id.strip())
+        doc, version = GetDatabase().read_document_with_version(collection_name.strip(), document_id.strip())
         if doc:
-            return doc, 200
+            # The version lets the API build an ETag without hashing the body
+            return doc, 200, version
         else:
             return {"error": f"Document '{document_id}' does not exist"}, 404
     except Exception as e:
         return {"error": f"Error reading document(s): {str(e)}"}, 500
 
 
+def ReadPage(params):
+    """One page of a collection ordered by document ID, for streaming exports"""
+    collection_name = params.get('collection_name')
+    after = params.get('after')
+    try:
+        limit = min(max(int(params.get('limit', PAGE_LIMIT)), 1), PAGE_LIMIT)
+    except (TypeError, ValueError):
+        return {"error": "limit must be an integer"}, 400
+    if not collection_name:
+        return {"error": "collection_name is required"}, 400
+    try:
+        documents, next_cursor = GetDatabase().read_page(collection_name, after=after, limit=limit)
+        return {'documents': [[doc_id, data] for doc_id, data in documents], 'next': next_cursor}, 200
+    except Exception as e:
+        return {"error": f"Error reading page: {str(e)}"}, 500
+
+
+def BatchWrite(params):
+    """Write a batch of {'id', 'data'} documents atomically, for streaming imports"""
+    collection_name = params.get('collection_name')
+    documents = params.get('documents')
+    if not collection_name:
+        return {"error": "collection_name is required"}, 400
+    if not isinstance(documents, list) or not documents or len(documents) > BATCH_LIMIT:
+        return {"error": f"documents must be a list of 1 to {BATCH_LIMIT} items"}, 400
+    if not all(isinstance(doc, dict) and isinstance(doc.get('data'), dict) for doc in documents):
+        return {"error": "Each document must be an object with a 'data' dictionary"}, 400
+    try:
+        ids = GetDatabase().batch_write(
+            collection_name,
+            [(doc.get('id'), doc['data']) for doc in documents],
+            merge=bool(params.get('merge', False))
+        )
+        return {'written': len(ids), 'ids': ids}, 200
+    except Exception as e:
+        return {"error": f"Error writing batch: {str(e)}"}, 500
+
+
 def GetDocuments(collection_name):
     try:
-        docs = db.read_document(collection_name)
+        docs = GetDatabase().read_document(collection_name)
         if not docs:
             return 'Error: No documents found in the collection.'
         documents = [str(doc) for doc in docs.values()]
@@ -112,14 +181,14 @@ def UpdateDocument(params):
     try:
         # If add_section is True, add or update the specified section
         if add_section and section_key and isinstance(section_data, dict):
-            existing_data = db.read_document(collection_name, document_id) or {}
+            existing_data = GetDatabase().read_document(collection_name, document_id) or {}
             nested_data = existing_data.get(section_key, {})
             if isinstance(nested_data, dict):
                 nested_data.update(section_data)
             else:
                 nested_data = section_data
             document_data = {section_key: nested_data}
-        updated = db.update_document(collection_name, document_id, document_data, merge=merge)
+        updated = GetDatabase().update_document(collection_name, document_id, document_data, merge=merge)
         if updated:
             return f'Success: Document "{document_id}" updated successfully'
         else:
@@ -132,7 +201,7 @@ def DeleteDocument(params):
     collection_name = params.get('collection_name')
     document_id = params.get('document_id')
     try:
-        deleted = db.delete_document(collection_name, document_id)
+        deleted = GetDatabase().delete_document(collection_name, document_id)
         if deleted:
             return 'Success: Document deleted successfully.'
         else:
@@ -154,43 +223,28 @@ def StartAgent(params):
         if agent_type is None:
             return f"Invalid agent type: {agent_type_str}", 400
 
-        agent = manager.Create(agent_type=agent_type)
-        manager.Start(agent.agent_id)
-        
-        # Wait a short moment for the process to start and get its PID
-        time.sleep(0.1)
+        agent_id = manager.Create(agent_type=agent_type)
+        # Returns once the agent has connected to the control endpoint
+        ready = manager.Start(agent_id)
         
-        process = manager.processes.get(agent.agent_id)
+        process = manager.processes.get(agent_id)
         return {
-            'agent_id': agent.agent_id,
+            'agent_id': agent_id,
             'type': agent_type_str,
-            'status': manager.agents[agent.agent_id]['status'],
-            'port': COMMAND_PORT + agent.agent_id,
+            'status': manager.agents[agent_id]['status'],
+            'identity': AgentIdentity(agent_id).decode(),
             'pid': process.pid if process else None,
-            'alive': process.is_alive() if process else False
+            'alive': process.is_alive() if process else False,
+            'ready': ready,
+            'warm': manager.agents[agent_id].get('warm', False)
         }, 201
     except Exception as e:
         return f"Agent creation failed: {str(e)}", 500
 
 
 def GetAgents(params):
-    manager = MasterAgent()
-    agents = []
-    for agent_id, agent_info in manager.agents.items():
-        try:
-            process = manager.processes.get(agent_id)
-            agents.append({
-                'id': agent_id,
-                'type': agent_info['type'],
-                'alive': process.is_alive() if process else False,
-                'status': agent_info['status'],
-                'port': COMMAND_PORT + agent_id,
-                'pid': process.pid if process else None
-            })
-        except Exception as e:
-            # Skip agents that can't be accessed
-            continue
-    return agents, 200
+    # Read from the manager's status table; no agent is contacted
+    return MasterAgent().Snapshot(), 200
 
 
 def StopAgent(params):
@@ -203,6 +257,32 @@ def StopAgent(params):
         return f"Failed to stop agent: {str(e)}", 500
 
 
+def _AgentIds(params):
+    agent_ids = params.get('agent_ids')
+    return None if agent_ids is None else [int(agent_id) for agent_id in agent_ids]
+
+
+async def BroadcastAgentCommand(params):
+    """Send one command to many agents (all live agents by default) concurrently"""
+    command = (params or {}).get('command')
+    if not command:
+        return {'status': 'error', 'message': 'Missing required field: command'}, 400
+    try:
+        results = await MasterAgent().BroadcastCommand(command, _AgentIds(params), params.get('timeout'))
+        return {str(agent_id): result for agent_id, result in results.items()}, 200
+    except Exception as e:
+        return {'status': 'error', 'message': f'Error broadcasting command: {str(e)}'}, 500
+
+
+async def StopAgents(params):
+    params = params or {}
+    try:
+        results = await MasterAgent().StopAll(_AgentIds(params), params.get('timeout', 5.0))
+        return {str(agent_id): result for agent_id, result in results.items()}, 200
+    except Exception as e:
+        return f"Failed to stop agents: {str(e)}", 500
+
+
 def AgentCommand(params):
     if not params or 'agent_id' not in params or 'command' not in params:
             return {
@@ -221,15 +301,16 @@ def AgentCommand(params):
         }, 500
 
 
+def ServerMetrics(params):
+    """Dispatcher lane figures and process stats for the API's /metrics scrape"""
+    return {'lanes': dispatcher.stats(), 'process': ProcessStats()}, 200
+
+
 async def ProcessCommand(command, params):
-    """Process commands asynchronously"""
+    """Process commands asynchronously on their priority lane"""
     func = operations.get(command.lower())
     if func:
-        # If the function is async, await it
-        if asyncio.iscoroutinefunction(func):
-            return await func(params)
-        # Otherwise, run it in a thread pool to avoid blocking
-        return await asyncio.to_thread(func, params)
+        return await dispatcher.submit(command, func, params)
     else:
         return f'Error: Unknown command "{command}".'
 
@@ -237,68 +318,107 @@ async def ProcessCommand(command, params):
 operations = {
     'create': CreateDocument,
     'read': ReadDocument,
+    'read_page': ReadPage,
+    'batch_write': BatchWrite,
     'update': UpdateDocument,
     'delete': DeleteDocument,
     'status': lambda params: {'message': 'Server is online!'},
+    'metrics': ServerMetrics,
     'start_agent': StartAgent,
     'get_agents': GetAgents,
     'stop_agent': StopAgent,
-    'agent_command': AgentCommand
+    'stop_agents': StopAgents,
+    'agent_command': AgentCommand,
+    'broadcast_agent_command': BroadcastAgentCommand
 }
 
 
+async def HandleRequest(server, identity, message):
+    """Run a single request and route the reply back to the client that sent it"""
+    try:
+        command = message.get('command')
+        params = message.get('params', {})
+
+        # Process the command as a child of the API's span when a trace came with it
+        with span('handle', 'server', parent=message.get('trace'), command=command):
+            response = await ProcessCommand(command, params)
+        if isinstance(response, tuple) and len(response) == 3:
+            response_data = {
+                'data': response[0],
+                'status_code': response[1],
+                'version': response[2]
+            }
+        elif isinstance(response, tuple) and len(response) == 2:
+            response_data = {
+                'data': response[0],
+                'status_code': response[1]
+            }
+        else:
+            response_data = {
+                'data': response,
+                'status_code': 200
+            }
+    except (KeyError, AttributeError) as e:
+        response_data = {'error': f'Invalid request: {str(e)}'}
+    except Exception as e:
+        response_data = {'error': f'Server error: {str(e)}'}
+    await SendResponse(server, identity, response_data)
+
+
+async def SendResponse(server, identity, response_data):
+    try:
+        await server.send_multipart([identity, b'', dumps(response_data)])
+    except zmq.error.ZMQError as e:
+        print(f"Error sending response: {str(e)}")
+
+
 async def Main():
     context = zmq.asyncio.Context()
-    server = context.socket(zmq.REP)
+    # ROUTER lets many REQ clients have requests in flight at once, so cheap
+    # commands are not stuck behind a slow one at the socket level
+    server = context.socket(zmq.ROUTER)
+    await asyncio.to_thread(WarmDatabase)
     server.bind('tcp://0.0.0.0:5001')
     print('ZeroMQ server is running on port 5001...')
 
+    # Agents publish status to STATUS_ENDPOINT; the manager's collector keeps the state
+    # table behind get_agents and feeds the API's event stream
+    manager = MasterAgent()
+
+    pending = set()
     try:
         while True:
             try:
-                # Wait for a message
-                message = await server.recv_json()
-                command = message.get('command')
-                params = message.get('params', {})
-
-                if command == 'exit':
-                    await server.send_json({'status': 'shutdown'})
-                    break
-
-                # Process the command
-                response = await ProcessCommand(command, params)
-                if isinstance(response, tuple) and len(response) == 2:
-                    response_data = {
-                        'data': response[0],
-                        'status_code': response[1]
-                    }
-                else:
-                    response_data = {
-                        'data': response,
-                        'status_code': 200
-                    }
-                await server.send_json(response_data)
+                frames = await server.recv_multipart()
             except zmq.error.Again:
-                # This is a non-blocking recv timeout - just continue the loop
-                # Don't try to send a response as we haven't received a message
-                print("ZMQ receive timeout, continuing...")
                 await asyncio.sleep(0.1)
                 continue
-            except (json.JSONDecodeError, KeyError) as e:
-                # Only send an error response if we successfully received a message
-                try:
-                    await server.send_json({'error': f'Invalid request: {str(e)}'})
-                except zmq.error.ZMQError:
-                    print(f"Error sending response: {str(e)}")
-            except Exception as e:
-                # Only send an error response if we successfully received a message
-                try:
-                    await server.send_json({'error': f'Server error: {str(e)}'})
-                except zmq.error.ZMQError:
-                    print(f"Error in request processing: {str(e)}")
+
+            # REQ envelope: [identity, empty delimiter, payload]
+            if len(frames) < 3:
+                continue
+            identity, payload = frames[0], frames[-1]
+
+            try:
+                message = loads(payload)
+            except ValueError as e:
+                await SendResponse(server, identity, {'error': f'Invalid request: {str(e)}'})
+                continue
+
+            if isinstance(message, dict) and message.get('command') == 'exit':
+                await SendResponse(server, identity, {'status': 'shutdown'})
+                break
+
+            task = asyncio.create_task(HandleRequest(server, identity, message))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
     except KeyboardInterrupt:
         print("\nShutting down server...")
     finally:
+        for task in pending:
+            task.cancel()
+        dispatcher.shutdown()
+        manager.StopCollector()
         server.close()
         context.term()
 
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from flask import Response
+
+"""
+Long-lived streamed responses backed by async generators.
+
+AsyncStream wraps a factory returning an async generator. Under FlaskASGI the body
+is async-iterated on the server's loop, so an idle stream costs no thread. Under a
+WSGI server the same generator is driven on a private event loop in the request
+thread. Either way the generator is closed when the client goes away, so its
+`finally` blocks release sockets.
+"""
+
+SSE_MIMETYPE = 'text/event-stream'
+
+
+class AsyncStream:
+    def __init__(self, factory: Callable[[], AsyncIterator[Any]]):
+        self.factory = factory
+        self._iterator: Optional[AsyncIterator[Any]] = None
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        self._iterator = self.factory()
+        return self._iterator
+
+    def __iter__(self) -> Iterator[Any]:
+        loop = asyncio.new_event_loop()
+        iterator = self.factory()
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(iterator.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    async def aclose(self):
+        if self._iterator is not None and hasattr(self._iterator, 'aclose'):
+            await self._iterator.aclose()
+
+
+def ServerSentEvent(data: Any, event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """Format one SSE frame; `data` is JSON-encoded"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    for line in json.dumps(data, default=str).splitlines() or ['']:
+        lines.append(f"data: {line}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def EventStreamResponse(factory: Callable[[], AsyncIterator[str]]) -> Response:
+    """Response streaming SSE frames from an async generator factory"""
+    response = Response(AsyncStream(factory), mimetype=SSE_MIMETYPE)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from buffering events
+    return response
@@ -0,0 +1,315 @@
+import glob
+import hashlib
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from Logger.logger import get_logger
+
+"""
+Background download and installation of release assets.
+
+UpdateManager.start() returns an UpdateJob straight away and downloads in a
+background thread. Downloads go to "<name>.<release>.part" next to the target, where
+<release> is the start of the expected SHA-256 (or the version without one), and
+resume from there with HTTP Range requests after an interruption or a restart;
+partials of other releases are deleted rather than resumed. Assets of
+at least `parallel_threshold` bytes are fetched as `segments` concurrent ranges when
+the server advertises range support. The result is checked against its SHA-256 and
+only then moved over the target with os.replace, so a partial or corrupt file is
+never installed. The version file is written last, the same way.
+"""
+
+CHUNK_SIZE = 256 * 1024
+
+
+class UpdateError(Exception):
+    pass
+
+
+@dataclass
+class UpdateJob:
+    job_id: str
+    version: str
+    asset: str
+    url: str
+    sha256: Optional[str]
+    state: str = 'queued'  # queued, downloading, verifying, installing, done, failed
+    total: Optional[int] = None
+    downloaded: int = 0
+    resumed_from: int = 0
+    segments: int = 1
+    error: Optional[str] = None
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'version': self.version,
+            'asset': self.asset,
+            'state': self.state,
+            'downloaded': self.downloaded,
+            'total': self.total,
+            'progress': round(self.downloaded / self.total, 4) if self.total else None,
+            'resumed_from': self.resumed_from,
+            'segments': self.segments,
+            'error': self.error,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class UpdateManager:
+    def __init__(
+        self,
+        update_dir: str,
+        segments: int = 4,
+        parallel_threshold: int = 8 * 1024 * 1024,
+        retries: int = 3,
+        timeout: float = 30.0,
+        require_checksum: bool = True
+    ):
+        self.update_dir = update_dir
+        self.segments = max(1, segments)
+        self.parallel_threshold = parallel_threshold
+        self.retries = retries
+        self.timeout = timeout
+        self.require_checksum = require_checksum
+        self.logger = get_logger('updater', log_to_console=True)
+        self._jobs: Dict[str, UpdateJob] = {}
+        self._active: Optional[UpdateJob] = None
+        self._lock = threading.Lock()
+        os.makedirs(update_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------ #
+    @property
+    def version_path(self) -> str:
+        return os.path.join(self.update_dir, 'version.txt')
+
+    def current_version(self) -> str:
+        try:
+            with open(self.version_path, 'r') as file:
+                return file.read().strip() or '0.0.0'
+        except FileNotFoundError:
+            return '0.0.0'
+
+    def get(self, job_id: str) -> Optional[UpdateJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self) -> Optional[UpdateJob]:
+        with self._lock:
+            return self._active
+
+    def start(self, version: str, asset: str, url: str, sha256: Optional[str]) -> UpdateJob:
+        """Start downloading `asset`, or return the job already running"""
+        with self._lock:
+            if self._active is not None:
+                return self._active
+            job = UpdateJob(job_id=secrets.token_hex(8), version=version, asset=asset, url=url,
+                            sha256=sha256.lower() if sha256 else None)
+            self._jobs[job.job_id] = job
+            self._active = job
+        threading.Thread(target=self._run, args=(job,), name=f'update-{job.job_id}', daemon=True).start()
+        return job
+
+    # ------------------------------------------------------------------ #
+    def _run(self, job: UpdateJob):
+        target = os.path.join(self.update_dir, job.asset)
+        release = job.sha256[:16] if job.sha256 else re.sub(r'[^\w.-]', '_', job.version)
+        part = f"{target}.{release}.part"
+        try:
+            if job.sha256 is None and self.require_checksum:
+                raise UpdateError(f"No SHA-256 checksum published for {job.asset}")
+            self._remove_stale_partials(target, part)
+            job.state = 'downloading'
+            with requests.Session() as session:
+                total, ranges = self._probe(session, job.url)
+                job.total = total
+                if total and ranges and total >= self.parallel_threshold and self.segments > 1:
+                    self._download_segments(job, part, total)
+                else:
+                    self._download_single(session, job, part, total, ranges)
+
+            job.state = 'verifying'
+            if job.sha256 is not None:
+                digest = self._sha256(part)
+                if digest != job.sha256:
+                    os.remove(part)
+                    raise UpdateError(f"Checksum mismatch for {job.asset}: expected {job.sha256}, got {digest}")
+
+            job.state = 'installing'
+            os.replace(part, target)
+            self._write_version(job.version)
+            job.state = 'done'
+            self.logger.info(f"Installed {job.asset} {job.version}")
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+            self.logger.error(f"Update {job.job_id} failed: {str(e)}", extra={'error': str(e)})
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if self._active is job:
+                    self._active = None
+
+    def _remove_stale_partials(self, target: str, part: str):
+        """Delete partial downloads (and their segments) left by other releases"""
+        pattern = glob.escape(target) + '.*part*'
+        for path in glob.glob(pattern):
+            if path == part or path.startswith(part + '.'):
+                continue
+            try:
+                os.remove(path)
+                self.logger.info(f"Removed stale partial download {os.path.basename(path)}")
+            except OSError as e:
+                self.logger.warning(f"Could not remove {path}: {str(e)}", extra={'error': str(e)})
+
+    def _probe(self, session: requests.Session, url: str) -> Tuple[Optional[int], bool]:
+        """Asset size and whether the server honours byte ranges"""
+        response = session.head(url, allow_redirects=True, timeout=self.timeout)
+        response.raise_for_status()
+        length = response.headers.get('Content-Length')
+        total = int(length) if length and length.isdigit() else None
+        ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        return total, ranges
+
+    def _fetch(self, session: requests.Session, job: UpdateJob, url: str, path: str,
+               start: int, end: Optional[int]) -> None:
+        """
+        Append bytes [start + len(path), end] of `url` to `path`, resuming after errors.
+        `end` is inclusive; None means to the end of the resource.
+        """
+        attempt = 0
+        while True:
+            offset = start + (os.path.getsize(path) if os.path.exists(path) else 0)
+            if end is not None and offset > end:
+                return
+            headers = {}
+            if offset or end is not None:
+                headers['Range'] = f"bytes={offset}-{'' if end is None else end}"
+            try:
+                with session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                    if response.status_code == 416:
+                        return
+                    response.raise_for_status()
+                    mode = 'ab'
+                    if headers and response.status_code != 206:
+                        if start or end is not None:
+                            raise UpdateError("Server ignored the Range request")
+                        # Full body instead of the remainder: start the file over
+                        mode = 'wb'
+                        self._add_progress(job, -(offset - start))
+                    with open(path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if chunk:
+                                f.write(chunk)
+                                self._add_progress(job, len(chunk))
+                return
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise UpdateError(f"Download interrupted: {str(e)}") from e
+                self.logger.warning(f"Download interrupted, resuming (attempt {attempt}): {str(e)}")
+                time.sleep(min(2 ** attempt, 30))
+
+    def _fetch_segment(self, job: UpdateJob, path: str, first: int, last: int):
+        with requests.Session() as session:
+            self._fetch(session, job, job.url, path, first, last)
+
+    def _add_progress(self, job: UpdateJob, count: int):
+        with self._lock:
+            job.downloaded += count
+
+    def _download_single(self, session: requests.Session, job: UpdateJob, part: str,
+                         total: Optional[int], ranges: bool):
+        existing = os.path.getsize(part) if os.path.exists(part) else 0
+        if existing and (not ranges or (total is not None and existing > total)):
+            os.remove(part)
+            existing = 0
+        job.resumed_from = job.downloaded = existing
+        if total is None or existing < total:
+            self._fetch(session, job, job.url, part, 0, None)
+
+    def _download_segments(self, job: UpdateJob, part: str, total: int):
+        if os.path.exists(part) and os.path.getsize(part) == total:
+            # Assembled on a previous run; only verification is left
+            job.resumed_from = job.downloaded = total
+            return
+        size = -(-total // self.segments)
+        bounds = [(i, i * size, min(total, (i + 1) * size) - 1) for i in range(self.segments) if i * size < total]
+        paths = [f"{part}.{i}" for i, _, _ in bounds]
+        existing = 0
+        for path, (_, first, last) in zip(paths, bounds):
+            if os.path.exists(path):
+                if os.path.getsize(path) > last - first + 1:
+                    os.remove(path)
+                else:
+                    existing += os.path.getsize(path)
+        job.segments = len(bounds)
+        job.resumed_from = job.downloaded = existing
+
+        with ThreadPoolExecutor(max_workers=len(bounds), thread_name_prefix=f'update-{job.job_id}') as pool:
+            futures = [
+                pool.submit(self._fetch_segment, job, path, first, last)
+                for path, (_, first, last) in zip(paths, bounds)
+            ]
+            for future in futures:
+                future.result()
+
+        with open(part, 'wb') as out:
+            for path in paths:
+                with open(path, 'rb') as segment:
+                    while True:
+                        chunk = segment.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+        for path in paths:
+            os.remove(path)
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _write_version(self, version: str):
+        tmp = self.version_path + '.tmp'
+        with open(tmp, 'w') as file:
+            file.write(version)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.version_path)
+
+
+def ReleaseAsset(assets: List[Dict[str, Any]], name: str, session: Optional[requests.Session] = None,
+                 timeout: float = 30.0) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Find `name` among a GitHub-style release's assets and its SHA-256: the asset's
+    "digest" ("sha256:<hex>") when present, else the first token of a "<name>.sha256"
+    asset.
+    """
+    asset = next((a for a in assets if a.get('name') == name), None)
+    if asset is None:
+        return None, None
+    digest = asset.get('digest') or ''
+    if digest.startswith('sha256:'):
+        return asset, digest.split(':', 1)[1]
+    checksum = next((a for a in assets if a.get('name') == f"{name}.sha256"), None)
+    if checksum is None:
+        return asset, None
+    response = (session or requests).get(checksum['browser_download_url'], timeout=timeout)
+    response.raise_for_status()
+    parts = response.text.split()
+    return asset, parts[0] if parts else None
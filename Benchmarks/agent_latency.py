@@ -0,0 +1,89 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import tempfile
+import time
+
+from Agents.agents import Agent
+from Agents.commands import CommandChannels
+
+"""
+Round-trip latency of the `test` command against a live agent process.
+
+Starts an agent on a private control endpoint, sends `test` --count times through
+CommandChannels (the AgentManager's path) and reports latency percentiles. --legacy runs the previous main loop (poll up to 500 ms, then sleep
+1 s) for comparison; expect it to need a much smaller --count.
+
+Usage:
+  python Benchmarks/agent_latency.py --count 2000
+  python Benchmarks/agent_latency.py --legacy --count 10
+"""
+
+BENCH_AGENT_ID = 90
+
+
+class LegacyLoopAgent(Agent):
+    """Agent with the main loop as it was before the event-driven poller"""
+
+    def run(self):
+        self.running = True
+        if not self.initialize():
+            return
+        self._setup_sockets()
+        while self.running:
+            if dict(self.poller.poll(500)):
+                self._process_commands()
+            time.sleep(1)
+        self.close()
+
+
+def Percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Agent command round-trip latency')
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--legacy', action='store_true', help='Use the old poll-and-sleep loop')
+    parser.add_argument('--agent-id', type=int, default=BENCH_AGENT_ID)
+    parser.add_argument('--endpoint', help='Control endpoint, e.g. tcp://127.0.0.1:5590 (default: IPC)')
+    args = parser.parse_args()
+
+    endpoint = args.endpoint or (
+        "tcp://127.0.0.1:5590" if sys.platform.startswith('win')
+        else f"ipc://{os.path.join(tempfile.gettempdir(), 'apexea-agent-latency')}"
+    )
+    channels = CommandChannels(endpoint, timeout=10.0)
+    channels.start()
+    agent = (LegacyLoopAgent if args.legacy else Agent)(args.agent_id, endpoint)
+    agent.start()
+    try:
+        # The first exchange also waits for the agent to connect
+        channels.send_sync(args.agent_id, "test")
+
+        samples = []
+        for _ in range(args.count):
+            start = time.perf_counter()
+            channels.send_sync(args.agent_id, "test")
+            samples.append((time.perf_counter() - start) * 1000)
+
+        channels.send_sync(args.agent_id, "stop")
+    finally:
+        channels.close()
+        agent.join(5)
+        if agent.is_alive():
+            agent.terminate()
+
+    print(f"{'legacy' if args.legacy else 'event-driven'} loop, {args.count} round trips")
+    print(f"  p50 {Percentile(samples, 0.50):.3f} ms  p90 {Percentile(samples, 0.90):.3f} ms  "
+          f"p99 {Percentile(samples, 0.99):.3f} ms  max {max(samples):.3f} ms")
+
+
+if __name__ == '__main__':
+    Main()
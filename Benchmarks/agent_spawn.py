@@ -0,0 +1,94 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+
+from Agents.agents import AgentClass, AgentType
+from Agents.commands import CommandChannels
+from Agents.workers import WarmPool
+
+"""
+Time from starting an agent to its READY on the control endpoint.
+
+Cold starts a fresh spawned process per agent, as StartAgent did before the warm
+pool. Warm takes each agent from a WarmPool of --pool-size pre-imported workers,
+pausing --gap seconds between starts so the pool can refill (set --gap 0 to see
+what happens when it runs dry).
+
+Usage:
+  python Benchmarks/agent_spawn.py --count 10
+  python Benchmarks/agent_spawn.py --count 10 --pool-size 4 --gap 0
+"""
+
+BENCH_AGENT_ID = 100
+
+
+def Percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def Run(channels: CommandChannels, count: int, gap: float, pool: WarmPool = None):
+    samples, processes, warm = [], [], 0
+    for i in range(count):
+        agent_id = BENCH_AGENT_ID + i
+        start = time.perf_counter()
+        process = pool.assign(AgentType.WEB_CRAWLER, agent_id, channels.endpoint) if pool else None
+        if process is None:
+            process = AgentClass(AgentType.WEB_CRAWLER)(agent_id, channels.endpoint)
+            process.start()
+        else:
+            warm += 1
+        if not channels.wait_ready(agent_id, 30):
+            raise RuntimeError(f"Agent {agent_id} did not connect")
+        samples.append((time.perf_counter() - start) * 1000)
+        processes.append(process)
+        time.sleep(gap)
+    channels.broadcast_sync([BENCH_AGENT_ID + i for i in range(count)], "stop")
+    for agent_id, process in enumerate(processes, BENCH_AGENT_ID):
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+        channels.drop(agent_id)
+    return samples, warm
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Agent start-to-ready latency, cold vs warm pool')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--pool-size', type=int, default=2)
+    parser.add_argument('--gap', type=float, default=0.5, help='Seconds between starts')
+    parser.add_argument('--endpoint', help='Control endpoint, e.g. tcp://127.0.0.1:5591 (default: IPC)')
+    args = parser.parse_args()
+
+    multiprocessing.set_start_method('spawn', force=True)
+    endpoint = args.endpoint or (
+        "tcp://127.0.0.1:5591" if sys.platform.startswith('win')
+        else f"ipc://{os.path.join(tempfile.gettempdir(), 'apexea-agent-spawn')}"
+    )
+    channels = CommandChannels(endpoint, timeout=10.0)
+    channels.start()
+    pool = WarmPool(args.pool_size)
+    try:
+        pool.fill()
+        results = {'cold': Run(channels, args.count, args.gap)}
+        time.sleep(1)  # Let the pool's first workers finish importing
+        results['warm'] = Run(channels, args.count, args.gap, pool)
+    finally:
+        pool.close()
+        channels.close()
+
+    for name, (samples, warm) in results.items():
+        print(f"{name:>4}: {args.count} agents ({warm} from the pool)  p50 {Percentile(samples, 0.50):.1f} ms  "
+              f"p90 {Percentile(samples, 0.90):.1f} ms  max {max(samples):.1f} ms")
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,85 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import importlib
+import multiprocessing
+import time
+
+"""
+Spawn time and resident memory of an idle agent process.
+
+Each run starts a process with the 'spawn' start method (a fresh interpreter, as on
+Windows and macOS), imports the modules of a scenario and reports how long that took
+and the process's peak RSS. "lazy" is what an agent imports now; "eager" adds the
+modules the AI package and WebCrawler used to import up front, for comparison.
+
+Usage:
+  python Benchmarks/agent_startup.py --runs 5
+"""
+
+SCENARIOS = {
+    'lazy': ('Agents.webcrawler',),
+    'eager': ('Agents.webcrawler', 'AI.ai', 'AI.autobrowser', 'openai', 'pymupdf', 'requests', 'playwright.sync_api'),
+}
+
+
+def PeakRss() -> int:
+    """Peak resident set size of this process in bytes"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+
+
+def Child(modules, queue):
+    start = time.perf_counter()
+    missing = []
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            missing.append(module)
+    queue.put({'import_seconds': time.perf_counter() - start, 'rss': PeakRss(), 'missing': missing})
+
+
+def SpawnOnce(context, modules) -> dict:
+    queue = context.Queue()
+    start = time.perf_counter()
+    process = context.Process(target=Child, args=(modules, queue))
+    process.start()
+    result = queue.get()
+    result['spawn_seconds'] = time.perf_counter() - start
+    process.join()
+    return result
+
+
+def Median(runs, key: str) -> float:
+    return sorted(run[key] for run in runs)[len(runs) // 2]
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Spawn time and RSS of an idle agent process')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    for name in args.scenario or list(SCENARIOS):
+        runs = [SpawnOnce(context, SCENARIOS[name]) for _ in range(args.runs)]
+        print(f"{name}: spawn {Median(runs, 'spawn_seconds') * 1000:.0f} ms, "
+              f"imports {Median(runs, 'import_seconds') * 1000:.0f} ms, "
+              f"peak RSS {Median(runs, 'rss') / (1024 * 1024):.1f} MiB (median of {args.runs})")
+        if runs[0]['missing']:
+            print(f"  not installed, skipped: {', '.join(runs[0]['missing'])}")
+
+
+if __name__ == '__main__':
+    Main()
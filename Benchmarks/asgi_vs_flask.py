@@ -0,0 +1,116 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import Flask, jsonify
+from flask_login import LoginManager, UserMixin, login_required
+from Backend.asgi import FlaskASGI
+
+"""
+Requests per second of the same async route served by Flask (WSGI, one event loop per
+request via async_to_sync) and by FlaskASGI (one shared loop).
+
+The route is wrapped in login_required plus an async decorator, like the API routes,
+and awaits a short sleep to stand in for the ZMQ round trip to the server.
+
+Usage:
+  python Benchmarks/asgi_vs_flask.py --requests 5000 --concurrency 50 --latency-ms 2
+"""
+
+
+class BenchUser(UserMixin):
+    id = 'bench'
+    role = 'Admin'
+
+
+def BuildApp(latency: float) -> Flask:
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'bench'
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.request_loader(lambda request: BenchUser())
+
+    def Passthrough(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return await func(*args, **kwargs)
+        return async_wrapper
+
+    @app.route('/bench', methods=['GET'])
+    @login_required
+    @Passthrough
+    async def Bench():
+        await asyncio.sleep(latency)
+        return jsonify({'message': 'ok'}), 200
+
+    return app
+
+
+def RunFlask(app: Flask, requests: int, concurrency: int) -> float:
+    client = app.test_client()
+
+    def call(_):
+        response = client.get('/bench')
+        assert response.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def RunAsgi(asgi_app: FlaskASGI, requests: int, concurrency: int) -> float:
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/bench', 'raw_path': b'/bench',
+        'query_string': b'', 'root_path': '', 'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 5000),
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        status = {}
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+
+        async with semaphore:
+            await asgi_app(dict(scope), receive, send)
+        assert status['code'] == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Compare Flask and FlaskASGI throughput')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    flask_rps = RunFlask(BuildApp(latency), args.requests, args.concurrency)
+    asgi_rps = asyncio.run(RunAsgi(FlaskASGI(BuildApp(latency)), args.requests, args.concurrency))
+
+    print(f"Flask (WSGI, loop per request): {flask_rps:10.1f} req/s")
+    print(f"FlaskASGI (shared loop):        {asgi_rps:10.1f} req/s")
+    print(f"Speedup:                        {asgi_rps / flask_rps:10.2f}x")
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,93 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import json
+import random
+import secrets
+import string
+import time
+from datetime import datetime, timedelta
+
+from Backend.compression import AvailableEncodings, CompressBytes
+
+"""
+Compressed size and CPU cost per encoding for collection dumps shaped like the
+`Users` and `Tenders` reads returned through DatabaseRequest.
+
+Usage:
+  python Benchmarks/compression.py --users 5000 --tenders 2000
+"""
+
+WORDS = (
+    "upphandling tender contract municipality supply services delivery framework agreement "
+    "consultant software maintenance construction healthcare transport education deadline "
+    "requirements evaluation price quality reference submission region"
+).split()
+
+
+def FakeUsers(count: int) -> dict:
+    return {
+        str(i): {
+            'username': f"user{i}",
+            'email': f"user{i}@example.com",
+            'password': '$2b$12$' + ''.join(random.choices(string.ascii_letters + string.digits + './', k=53)),
+            'validated': random.random() > 0.2,
+            'validation_code': None if random.random() > 0.2 else secrets.token_urlsafe(16),
+            'role': random.choice(['User', 'User', 'User', 'Admin']),
+        }
+        for i in range(count)
+    }
+
+
+def FakeTenders(count: int) -> dict:
+    start = datetime(2025, 1, 1)
+    return {
+        str(i): {
+            'title': ' '.join(random.choices(WORDS, k=8)).capitalize(),
+            'description': ' '.join(random.choices(WORDS, k=random.randint(80, 300))),
+            'buyer': f"Organisation {random.randint(1, 400)}",
+            'deadline': (start + timedelta(days=random.randint(0, 365))).isoformat(),
+            'url': f"https://tenders.example.com/notice/{random.randint(100000, 999999)}",
+            'estimated_value': random.randint(10_000, 50_000_000),
+            'cpv_codes': [f"{random.randint(10000000, 99999999)}" for _ in range(random.randint(1, 4))],
+        }
+        for i in range(count)
+    }
+
+
+def Measure(name: str, payload: bytes, encodings, levels, repeat: int):
+    print(f"\n{name}: {len(payload) / 1024:.1f} KiB uncompressed")
+    print(f"  {'encoding':<10}{'level':>6}{'size KiB':>12}{'ratio':>8}{'cpu ms':>10}{'MB/s':>9}")
+    for encoding in encodings:
+        for level in levels:
+            start = time.process_time()
+            for _ in range(repeat):
+                compressed = CompressBytes(payload, encoding, level)
+            cpu = (time.process_time() - start) / repeat
+            throughput = len(payload) / cpu / 1e6 if cpu else float('inf')
+            print(f"  {encoding:<10}{level:>6}{len(compressed) / 1024:>12.1f}"
+                  f"{len(payload) / len(compressed):>8.1f}{cpu * 1000:>10.2f}{throughput:>9.1f}")
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Compression size/CPU benchmark')
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--tenders', type=int, default=2000)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 6, 9])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    encodings = AvailableEncodings()
+    print(f"Encodings available: {', '.join(encodings)}")
+    Measure('Users', json.dumps(FakeUsers(args.users)).encode(), encodings, args.levels, args.repeat)
+    Measure('Tenders', json.dumps(FakeTenders(args.tenders)).encode(), encodings, args.levels, args.repeat)
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,91 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import json
+import subprocess
+
+"""
+Measures how long `import <module>` takes in a fresh interpreter, and which heavy
+dependencies the import drags in. Each module is imported --runs times in a new
+process; the median wall time is reported next to the top self-time entries from
+`python -X importtime`.
+
+Usage:
+  python Benchmarks/import_time.py --budget-ms 300
+  python Benchmarks/import_time.py Backend.api --runs 5 --top 15
+"""
+
+MODULES = ('Backend', 'Backend.app', 'Backend.api', 'Backend.server')
+HEAVY = ('firebase_admin', 'google.cloud.firestore', 'playwright', 'openai', 'zmq', 'flask')
+
+PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "heavy = [name for name in {heavy!r} if name in sys.modules]\n"
+    "print(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))\n"
+)
+
+
+def ImportOnce(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+        cwd=root_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else f"exit {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def ImportProfile(module: str, top: int) -> list:
+    """Top `top` modules by self time, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=root_dir, capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        entries.append((int(self_us), int(cumulative_us), name))
+    return sorted(entries, reverse=True)[:top]
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Cold import time of the Backend modules')
+    parser.add_argument('modules', nargs='*', default=list(MODULES))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=None, help='Exit non-zero if any median exceeds this')
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.modules:
+        try:
+            runs = [ImportOnce(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module}: import failed: {e}")
+            over_budget = True
+            continue
+        median = sorted(run['seconds'] for run in runs)[len(runs) // 2] * 1000
+        status = ''
+        if args.budget_ms is not None and median > args.budget_ms:
+            status = f"  OVER BUDGET ({args.budget_ms:.0f} ms)"
+            over_budget = True
+        print(f"{module}: {median:.1f} ms median of {args.runs}{status}")
+        print(f"  heavy modules loaded: {', '.join(runs[0]['heavy']) or 'none'}")
+        for self_us, cumulative_us, name in ImportProfile(module, args.top):
+            print(f"  {self_us / 1000:8.2f} ms self {cumulative_us / 1000:8.2f} ms total  {name}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,68 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from Backend.jsonprovider import HAS_ORJSON, _default, dumps, loads
+from Benchmarks.compression import FakeTenders, FakeUsers
+
+"""
+Encode/decode cost of the stdlib json module (as Flask's default provider calls it)
+against Backend.jsonprovider for payloads shaped like API and ZMQ traffic.
+
+Usage:
+  python Benchmarks/json_provider.py --repeat 200
+"""
+
+
+def Payloads(users: int, tenders: int) -> dict:
+    now = datetime.now(timezone.utc)
+    envelope = {'status': 'success', 'data': {'status': 'running', 'time': now}, 'code': 200}
+    tender_docs = FakeTenders(tenders)
+    for doc in tender_docs.values():
+        doc['fetched_at'] = now
+    return {
+        'envelope': envelope,
+        'users': {'status': 'success', 'data': FakeUsers(users), 'code': 200},
+        'tenders': {'status': 'success', 'data': tender_docs, 'code': 200},
+    }
+
+
+def Timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='JSON provider encode/decode benchmark')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--tenders', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"orjson available: {HAS_ORJSON}")
+    print(f"  {'payload':<10}{'KiB':>8}{'stdlib enc ms':>15}{'fast enc ms':>13}{'stdlib dec ms':>15}{'fast dec ms':>13}")
+    for name, payload in Payloads(args.users, args.tenders).items():
+        repeat = args.repeat * 100 if name == 'envelope' else args.repeat
+        encoded = json.dumps(payload, default=_default, sort_keys=True)
+        stdlib_enc = Timed(lambda: json.dumps(payload, default=_default, sort_keys=True), repeat)
+        fast_enc = Timed(lambda: dumps(payload, sort_keys=True), repeat)
+        stdlib_dec = Timed(lambda: json.loads(encoded), repeat)
+        fast_dec = Timed(lambda: loads(encoded.encode('utf-8')), repeat)
+        print(f"  {name:<10}{len(encoded) / 1024:>8.1f}{stdlib_enc * 1000:>15.3f}{fast_enc * 1000:>13.3f}"
+              f"{stdlib_dec * 1000:>15.3f}{fast_dec * 1000:>13.3f}")
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,114 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import gc
+import random
+import re
+import string
+import time
+
+from Data.models import UserProfile, UserRecord, Fido2Credential
+
+"""
+Validations per second for the pydantic schemas in Data/models.py, next to the
+previous hand-written UserProfile constructor (re-evaluating its patterns on each
+call) as a baseline. Payloads are a mix of valid and invalid profiles.
+
+Usage:
+  python Benchmarks/model_validation.py --count 100000
+"""
+
+
+class LegacyUserProfile:
+    """UserProfile.__init__ as it was before the schema layer"""
+
+    def __init__(self, username=None, email=None, password=None):
+        if all(field is None for field in [username, email, password]):
+            raise ValueError("At least one field (username, email, or password) must be provided")
+        if username is not None:
+            if not isinstance(username, str):
+                raise ValueError("Username must be a string")
+            if len(username) < 3:
+                raise ValueError("Username must be at least 3 characters long")
+            if not username.isalnum():
+                raise ValueError("Username must contain only alphanumeric characters")
+        if email is not None:
+            if not isinstance(email, str):
+                raise ValueError("Email must be a string")
+            if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
+                raise ValueError("Invalid email format")
+        if password is not None:
+            if not isinstance(password, str):
+                raise ValueError("Password must be a string")
+            if not re.match(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&#^()[\]{}<>.,;:|~`_+=-]).{8,}$', password):
+                raise ValueError("Password must be at least 8 characters and include uppercase, lowercase, number, and symbol")
+        self.username, self.email, self.password = username, email, password
+
+
+def FakeProfiles(count: int, invalid_ratio: float, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(count):
+        name = ''.join(rng.choices(string.ascii_lowercase, k=8)) + str(i)
+        profile = {'username': name, 'email': f"{name}@example.com", 'password': f"Pw{i}!{name}"}
+        if rng.random() < invalid_ratio:
+            profile[rng.choice(['username', 'email', 'password'])] = 'x_'
+        profiles.append(profile)
+    return profiles
+
+
+def Rate(label: str, count: int, run):
+    gc.collect()
+    start = time.perf_counter()
+    valid = run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {count / elapsed:>12,.0f} /s  ({valid} valid)")
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Schema validation throughput')
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--invalid', type=float, default=0.1, help='Share of invalid payloads')
+    args = parser.parse_args()
+
+    profiles = FakeProfiles(args.count, args.invalid)
+
+    # Each variant keeps what it validated, as a bulk import would
+    def legacy():
+        valid = []
+        for profile in profiles:
+            try:
+                valid.append(LegacyUserProfile(**profile))
+            except ValueError:
+                pass
+        return len(valid)
+
+    def per_request():
+        valid = []
+        for profile in profiles:
+            try:
+                valid.append(UserProfile.model_validate(profile))
+            except ValueError:
+                pass
+        return len(valid)
+
+    records = [{**profile, 'password': '$2b$12$' + 'a' * 53, 'role': 'User'} for profile in profiles]
+    credentials = [
+        {'credential_id': f"Y3JlZC{i}", 'public_key': 'cHVibGljLWtleQ', 'sign_count': i, 'transports': ['usb']}
+        for i in range(args.count)
+    ]
+
+    Rate('legacy UserProfile(**data)', args.count, legacy)
+    Rate('UserProfile.model_validate', args.count, per_request)
+    Rate('UserProfile.validate_many', args.count, lambda: len(UserProfile.validate_many(profiles)[0]))
+    Rate('UserRecord.validate_many', args.count, lambda: len(UserRecord.validate_many(records)[0]))
+    Rate('Fido2Credential.validate_many', args.count, lambda: len(Fido2Credential.validate_many(credentials)[0]))
+
+
+if __name__ == '__main__':
+    Main()
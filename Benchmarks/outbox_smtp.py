@@ -0,0 +1,134 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import collections
+import multiprocessing
+import socketserver
+import tempfile
+import threading
+import time
+
+from Backend.mailer import EmailOutbox
+
+"""
+Runs several EmailOutbox senders (one per simulated API worker process) on one
+outbox file against a local SMTP stand-in, and checks that every queued message is
+delivered exactly once. --drop-every makes the stand-in hang up on every Nth
+message, so the retry and claim-release paths run too.
+
+Usage:
+  python Benchmarks/outbox_smtp.py --workers 4 --messages 200
+  python Benchmarks/outbox_smtp.py --workers 4 --messages 200 --drop-every 17
+"""
+
+
+def SmtpStandIn(drop_every: int = 0) -> socketserver.ThreadingTCPServer:
+    """Minimal SMTP server that records the Message-ID of each accepted message"""
+    received = collections.Counter()
+    lock = threading.Lock()
+    counter = {'messages': 0}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, line: str):
+            self.wfile.write(f"{line}\r\n".encode())
+
+        def handle(self):
+            self.reply("220 stand-in ready")
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                verb = line.decode(errors='replace').strip().split(' ', 1)[0].upper()
+                if verb in ('EHLO', 'HELO'):
+                    self.reply("250 stand-in")
+                elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                    self.reply("250 OK")
+                elif verb == 'DATA':
+                    self.reply("354 End data with <CR><LF>.<CR><LF>")
+                    message_id = None
+                    for data in iter(self.rfile.readline, b''):
+                        if data == b'.\r\n':
+                            break
+                        if data.lower().startswith(b'message-id:'):
+                            message_id = data.split(b':', 1)[1].strip().decode()
+                    with lock:
+                        counter['messages'] += 1
+                        drop = drop_every and counter['messages'] % drop_every == 0
+                        if not drop:
+                            received[message_id] += 1
+                    if drop:
+                        return  # Hang up before acknowledging
+                    self.reply("250 OK queued")
+                elif verb == 'QUIT':
+                    self.reply("221 Bye")
+                    return
+                else:
+                    self.reply("502 Not implemented")
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.received = received
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def Outbox(path: str, port: int) -> EmailOutbox:
+    return EmailOutbox(path, host='127.0.0.1', port=port, sender='bench@localhost', use_tls=False,
+                       batch_size=10, backoff_base=0.05, backoff_max=0.2, max_attempts=10)
+
+
+def Worker(path: str, port: int, stop):
+    outbox = Outbox(path, port)
+    outbox.start()
+    stop.wait()
+    outbox.stop()
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='EmailOutbox delivery check against a local SMTP stand-in')
+    parser.add_argument('--workers', type=int, default=4, help='Sender processes sharing the outbox')
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--drop-every', type=int, default=0, help='Hang up on every Nth message (0 = never)')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    server = SmtpStandIn(args.drop_every)
+    port = server.server_address[1]
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'outbox.sqlite3')
+        outbox = Outbox(path, port)  # This process is a sender too
+        stop = context.Event()
+        workers = [context.Process(target=Worker, args=(path, port, stop)) for _ in range(args.workers - 1)]
+        for worker in workers:
+            worker.start()
+
+        start = time.perf_counter()
+        for i in range(args.messages):
+            outbox.enqueue(f"user{i}@localhost", f"Message {i}", "Outbox delivery check")
+        while sum(server.received.values()) < args.messages and time.perf_counter() - start < args.timeout:
+            time.sleep(0.05)
+        outbox.flush(max(0.0, args.timeout - (time.perf_counter() - start)))
+        elapsed = time.perf_counter() - start
+        stats = outbox.stats()
+
+        stop.set()
+        for worker in workers:
+            worker.join(10)
+        outbox.stop()
+    server.shutdown()
+
+    duplicates = sum(count - 1 for count in server.received.values() if count > 1)
+    print(f"{args.workers} sender(s), {args.messages} messages in {elapsed:.2f}s")
+    print(f"  delivered {len(server.received)}  duplicates {duplicates}  "
+          f"still queued {stats['pending'] + stats.get('sending', 0)}  dead {stats['dead']}")
+    print(f"  exactly once: {len(server.received) == args.messages and duplicates == 0}")
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,104 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+import argparse
+import hashlib
+import http.server
+import re
+import tempfile
+import threading
+import time
+
+from Backend.updater import UpdateManager
+
+"""
+Runs UpdateManager against a local HTTP server that supports byte ranges and drops
+the connection part-way through the first `--drops` responses, then checks that
+the installed file matches the served asset.
+
+Usage:
+  python Benchmarks/updater_resume.py --size-mb 64 --segments 4 --drops 2
+"""
+
+
+def RangeServer(data: bytes, drops: int) -> http.server.ThreadingHTTPServer:
+    remaining = {'drops': drops}
+    lock = threading.Lock()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _headers(self, code: int, length: int, extra=None):
+            self.send_response(code)
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            for key, value in (extra or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+
+        def do_HEAD(self):
+            self._headers(200, len(data))
+
+        def do_GET(self):
+            start, end, code, extra = 0, len(data) - 1, 200, {}
+            match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+            if match:
+                start = int(match[1])
+                end = int(match[2]) if match[2] else len(data) - 1
+                if start >= len(data):
+                    self._headers(416, 0)
+                    return
+                code, extra = 206, {'Content-Range': f"bytes {start}-{end}/{len(data)}"}
+            body = data[start:end + 1]
+            self._headers(code, len(body), extra)
+            with lock:
+                drop = remaining['drops'] > 0 and len(body) > 1024
+                if drop:
+                    remaining['drops'] -= 1
+            if drop:
+                self.wfile.write(body[:len(body) // 3])
+                self.wfile.flush()
+                self.connection.close()
+                return
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def Main():
+    parser = argparse.ArgumentParser(description='Resumable updater check against a local server')
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--drops', type=int, default=2)
+    args = parser.parse_args()
+
+    data = os.urandom(args.size_mb * 1024 * 1024)
+    server = RangeServer(data, args.drops)
+    url = f"http://127.0.0.1:{server.server_address[1]}/main.py"
+
+    with tempfile.TemporaryDirectory() as update_dir:
+        manager = UpdateManager(update_dir, segments=args.segments, parallel_threshold=1)
+        start = time.perf_counter()
+        job = manager.start('9.9.9', 'main.py', url, hashlib.sha256(data).hexdigest())
+        while job.state not in ('done', 'failed'):
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+
+        print(f"state: {job.state}  error: {job.error}")
+        print(f"{args.size_mb} MiB in {elapsed:.2f}s ({args.size_mb / elapsed:.1f} MiB/s), "
+              f"{job.segments} segment(s), {args.drops} dropped connection(s)")
+        if job.state == 'done':
+            with open(os.path.join(update_dir, 'main.py'), 'rb') as f:
+                print(f"installed file matches: {f.read() == data}  version: {manager.current_version()}")
+
+
+if __name__ == '__main__':
+    Main()
@@ -1,81 +1,132 @@
 import random
-from typing import List, Optional
+from typing import Any, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta, date
 import os
 import re
-from dataclasses import dataclass, asdict
+from pydantic import BaseModel, ConfigDict, Field, StrictStr, ValidationError, field_validator, model_validator
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(current_dir)
 
+# Compiled once at import; shared by the schemas below and Backend.api.ValidatePassword
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Minimum 8 characters, at least one uppercase, one lowercase, one digit, one special character
+PASSWORD_PATTERN = re.compile(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&#^()[\]{}<>.,;:|~`_+=-]).{8,}$')
+PASSWORD_RULES = "Password must be at least 8 characters and include uppercase, lowercase, number, and symbol"
+BASE64URL_PATTERN = r'^[A-Za-z0-9_-]+={0,2}$'
 
-class UserProfile:
-    def __init__(
-        self,
-        username: Optional[str] = None,
-        email: Optional[str] = None,
-        password: Optional[str] = None
-    ):
-        # Validate that at least one field is provided
-        if all(field is None for field in [username, email, password]):
+
+def _check_username(username: Optional[str]) -> Optional[str]:
+    if username is not None:
+        if len(username) < 3:
+            raise ValueError("Username must be at least 3 characters long")
+        if not username.isalnum():
+            raise ValueError("Username must contain only alphanumeric characters")
+    return username
+
+
+def _check_email(email: Optional[str]) -> Optional[str]:
+    if email is not None and not EMAIL_PATTERN.match(email):
+        raise ValueError("Invalid email format")
+    return email
+
+
+class Schema(BaseModel):
+    """
+    Base for the validated models. Pydantic builds each model's validator once, when
+    the class is defined; validating a payload then runs no per-call setup.
+    """
+    model_config = ConfigDict(extra='forbid')
+
+    def to_dict(self) -> dict:
+        return self.model_dump()
+
+    @staticmethod
+    def error_message(error: ValidationError) -> str:
+        """One line per failed field, using the validator's own message where there is one"""
+        messages = []
+        for item in error.errors():
+            cause = (item.get('ctx') or {}).get('error')
+            text = str(cause) if isinstance(cause, Exception) else item['msg']
+            field = '.'.join(str(part) for part in item['loc'])
+            messages.append(f"{field}: {text}" if field else text)
+        return '; '.join(messages)
+
+    @staticmethod
+    def is_malformed(error: ValidationError) -> bool:
+        """Whether the payload has the wrong shape (unknown fields, not an object) rather than bad values"""
+        return any(item['type'] in ('extra_forbidden', 'model_type', 'model_attributes_type') for item in error.errors())
+
+    @classmethod
+    def validate_many(cls, items: Iterable[Any]) -> Tuple[List['Schema'], List[Tuple[int, str]]]:
+        """
+        Validate a batch, e.g. the records of a bulk import, without stopping at the
+        first failure. Returns the valid models and (index, message) per rejected item.
+        """
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                valid.append(cls.model_validate(item))
+            except ValidationError as e:
+                errors.append((index, cls.error_message(e)))
+        return valid, errors
+
+
+class UserProfile(Schema):
+    """Fields a user may change on their own profile; at least one must be present"""
+    username: Optional[StrictStr] = None
+    email: Optional[StrictStr] = None
+    password: Optional[StrictStr] = None
+
+    _check_username = field_validator('username')(_check_username)
+    _check_email = field_validator('email')(_check_email)
+
+    @field_validator('password')
+    @classmethod
+    def _check_password(cls, password: Optional[str]) -> Optional[str]:
+        if password is not None and not PASSWORD_PATTERN.match(password):
+            raise ValueError(PASSWORD_RULES)
+        return password
+
+    @model_validator(mode='after')
+    def _check_any(self) -> 'UserProfile':
+        if self.username is None and self.email is None and self.password is None:
             raise ValueError("At least one field (username, email, or password) must be provided")
+        return self
 
-        # Validate username if provided
-        if username is not None:
-            if not isinstance(username, str):
-                raise ValueError("Username must be a string")
-            if len(username) < 3:
-                raise ValueError("Username must be at least 3 characters long")
-            if not username.isalnum():
-                raise ValueError("Username must contain only alphanumeric characters")
-
-        # Validate email if provided
-        if email is not None:
-            if not isinstance(email, str):
-                raise ValueError("Email must be a string")
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, email):
-                raise ValueError("Invalid email format")
-
-        # Validate password if provided
-        if password is not None:
-            if not isinstance(password, str):
-                raise ValueError("Password must be a string")
-            # Minimum 8 characters, at least one uppercase, one lowercase, one digit, one special character
-            password_pattern = r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&#^()[\]{}<>.,;:|~`_+=-]).{8,}$'
-            if not re.match(password_pattern, password):
-                raise ValueError("Password must be at least 8 characters and include uppercase, lowercase, number, and symbol")
-
-        self.username = username
-        self.email = email
-        self.password = password
-        self.validated = False
+    @property
+    def validated(self) -> bool:
+        # Changing the profile goes through validation again
+        return False
 
     def to_dict(self) -> dict:
         """Convert the profile to a dictionary, excluding None values"""
-        return {
-            k: v for k, v in {
-                'username': self.username,
-                'email': self.email,
-                'password': self.password,
-                'validated': self.validated,
-            }.items() if v is not None
-        }
+        return {**self.model_dump(exclude_none=True), 'validated': self.validated}
 
     def __str__(self) -> str:
         return f"UserProfile(username={self.username}, email={self.email}, validated={self.validated})"
 
 
-@dataclass
-class Fido2Credential:
-    credential_id: str  # base64url-encoded
-    public_key: str     # base64url-encoded
-    sign_count: int
+class UserRecord(Schema):
+    """A stored user document, as exported and imported in bulk; the password is a hash"""
+    model_config = ConfigDict(extra='allow')
+
+    username: StrictStr
+    email: StrictStr
+    password: StrictStr
+    validated: bool = False
+    validation_code: Optional[StrictStr] = None
+
+    _check_username = field_validator('username')(_check_username)
+    _check_email = field_validator('email')(_check_email)
+
+
+class Fido2Credential(Schema):
+    credential_id: str = Field(pattern=BASE64URL_PATTERN)  # base64url-encoded
+    public_key: str = Field(pattern=BASE64URL_PATTERN)     # base64url-encoded
+    sign_count: int = Field(ge=0)
     transports: Optional[List[str]] = None
     user_handle: Optional[str] = None
     rp_id: Optional[str] = None
     # Add any other fields as needed
-
-    def to_dict(self) -> dict:
-        return asdict(self)
@@ -0,0 +1,276 @@
+import os
+import sys
+import json
+import glob
+import time
+import atexit
+import logging
+import secrets
+import argparse
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.insert(0, root_dir)
+
+from Logger.logger import LoggerManager
+
+"""
+Lightweight request tracing.
+
+A trace is a tree of timed spans sharing one trace ID. The API opens a root span per
+request; the trace and parent span IDs travel to the ZMQ server in the request
+envelope ("trace") and on to agents as an extra command frame, so every hop can record
+child spans of the same trace. Finished spans are written as structured records to a
+rotating log per process (logs/tracing/tracing-<pid>.log), since the API, the server
+and every agent record spans and rotation is not safe across processes. When
+TRACE_FILE is set they are also appended, unrotated, to that JSON-lines file.
+Recording a span only queues it; a listener thread per process does the file writes,
+so finishing a span never blocks the request (or the ASGI event loop) on disk I/O.
+TRACING_ENABLED=0 keeps IDs flowing but stops recording.
+
+View a trace (the viewer merges every process's file in a directory):
+  python Logger/tracing.py logs/tracing --trace <trace_id>
+"""
+
+TRACE_ENABLED = os.getenv('TRACING_ENABLED', '1').lower() not in ('0', 'false', 'no')
+TRACE_FILE = os.getenv('TRACE_FILE')
+TRACE_DIR = os.path.join('logs', 'tracing')
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+_logger = None
+_logger_pid = None
+
+
+class _SpanLineFormatter(logging.Formatter):
+    """The span record alone, as one JSON line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.extra, default=str)
+
+
+def _span_logger(pid: int) -> logging.Logger:
+    """This process's span logger: a queue in front of a listener that owns the files"""
+    logger = LoggerManager.get_logger(f'tracing-{pid}', filename=os.path.join(TRACE_DIR, f'tracing-{pid}.log'))
+    handlers = list(logger.handlers)
+    if TRACE_FILE:
+        trace_file = logging.FileHandler(TRACE_FILE, encoding='utf-8')
+        trace_file.setFormatter(_SpanLineFormatter())
+        handlers.append(trace_file)
+    queue = SimpleQueue()
+    logger.handlers = [QueueHandler(queue)]
+    logger.propagate = False
+    listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Drains the queue at exit
+    return logger
+
+
+def _new_id(nbytes: int) -> str:
+    return secrets.token_hex(nbytes)
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'component', 'attributes',
+                 'start', 'duration_ms', 'error', '_t0', '_previous')
+
+    def __init__(self, name: str, component: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.component = component
+        self.attributes = attributes or {}
+        self.start = time.time()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._t0 = time.perf_counter()
+        self._previous = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Stop the clock and record the span. Finishing twice is a no-op."""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = (time.perf_counter() - self._t0) * 1000
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        _record(self)
+
+    def context(self) -> Dict[str, str]:
+        """Propagation carrier for the next hop"""
+        return {'trace_id': self.trace_id, 'span_id': self.span_id}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'span': self.name,
+            'component': self.component,
+            'start': self.start,
+            'duration_ms': round(self.duration_ms or 0.0, 3),
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+
+def _record(span: Span):
+    global _logger, _logger_pid
+    if not TRACE_ENABLED:
+        return
+    if _logger is None or _logger_pid != os.getpid():
+        # One file per process, including processes forked after the first span
+        _logger_pid = os.getpid()
+        _logger = _span_logger(_logger_pid)
+    _logger.info(f"{span.component} {span.name} {span.duration_ms:.2f}ms", extra={'extra': span.to_dict()})
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def inject() -> Optional[Dict[str, str]]:
+    """Carrier for the active span, or None outside a trace"""
+    span = _current_span.get()
+    return span.context() if span is not None else None
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Dict[str, str]]:
+    """Parse a W3C traceparent header into a carrier"""
+    parts = (header or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return {'trace_id': parts[1], 'span_id': parts[2]}
+
+
+def start_span(name: str, component: str, parent: Optional[Dict[str, str]] = None, **attributes: Any) -> Span:
+    """
+    Create a span without making it active. The parent is the given carrier, else
+    the active span, else the span starts a new trace.
+    """
+    if parent and parent.get('trace_id'):
+        return Span(name, component, parent['trace_id'], parent.get('span_id'), attributes)
+    active = _current_span.get()
+    if active is not None:
+        return Span(name, component, active.trace_id, active.span_id, attributes)
+    return Span(name, component, _new_id(16), None, attributes)
+
+
+def activate(span: Span):
+    """Make `span` the active span in this context until deactivate()"""
+    span._previous = _current_span.get()
+    _current_span.set(span)
+
+
+def deactivate(span: Span):
+    _current_span.set(span._previous)
+
+
+@contextmanager
+def span(name: str, component: str, parent: Optional[Dict[str, str]] = None, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as an active span"""
+    current = start_span(name, component, parent, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+# ------------------------------------------------------------------------------------------------------------- #
+# ------------------------------------------------ Trace viewer ------------------------------------------------ #
+def load_spans(path: str, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read span records from a TRACE_FILE, a structured tracing log, or a directory of
+    per-process tracing logs (rotated backups included)
+    """
+    paths = sorted(glob.glob(os.path.join(path, 'tracing-*.log*'))) if os.path.isdir(path) else [path]
+    spans = []
+    for file_path in paths:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'span_id' not in record:
+                    continue
+                if trace_id and record.get('trace_id') != trace_id:
+                    continue
+                spans.append(record)
+    return spans
+
+
+def render_trace(spans: List[Dict[str, Any]], width: int = 40) -> str:
+    """Indented waterfall of one trace's spans"""
+    if not spans:
+        return '(no spans)'
+    by_id = {s['span_id']: s for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        parent = s.get('parent_id') if s.get('parent_id') in by_id else None
+        children.setdefault(parent, []).append(s)
+    for group in children.values():
+        group.sort(key=lambda s: s['start'])
+
+    origin = min(s['start'] for s in spans)
+    total = max(s['start'] - origin + s['duration_ms'] / 1000 for s in spans) or 1e-9
+    lines = [f"trace {spans[0]['trace_id']}  {total * 1000:.2f}ms"]
+
+    def walk(s: Dict[str, Any], depth: int):
+        offset = s['start'] - origin
+        begin = int(offset / total * width)
+        length = max(1, int(s['duration_ms'] / 1000 / total * width))
+        bar = ' ' * begin + '#' * min(length, width - begin)
+        label = f"{'  ' * depth}{s['component']}:{s['span']}"
+        error = f"  ! {s['error']}" if s.get('error') else ''
+        lines.append(f"  {label:<44}|{bar:<{width}}| {offset * 1000:8.2f} +{s['duration_ms']:.2f}ms{error}")
+        for child in children.get(s['span_id'], []):
+            walk(child, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show recorded traces as waterfalls')
+    parser.add_argument('path', nargs='?', default=TRACE_FILE or TRACE_DIR,
+                        help='TRACE_FILE, a tracing log, or a directory of per-process logs')
+    parser.add_argument('--trace', help='Trace ID to show (default: the slowest traces)')
+    parser.add_argument('--top', type=int, default=5, help='How many traces to show without --trace')
+    args = parser.parse_args()
+
+    spans = load_spans(args.path, args.trace)
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        traces.setdefault(s['trace_id'], []).append(s)
+
+    def trace_duration(items: List[Dict[str, Any]]) -> float:
+        origin = min(s['start'] for s in items)
+        return max(s['start'] - origin + s['duration_ms'] / 1000 for s in items)
+
+    selected = sorted(traces.values(), key=trace_duration, reverse=True)
+    if not args.trace:
+        selected = selected[:args.top]
+    for items in selected:
+        print(render_trace(items))
+        print()
+
+
+if __name__ == '__main__':
+    main()